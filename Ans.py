@@ -6,13 +6,6 @@ import logging
 from pathlib import Path
 import sys
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from sqlalchemy import Column, Integer, String, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -60,6 +53,12 @@ logger = logging.getLogger(__name__)
 
 def setup_driver():
     """Configura e retorna o driver do Selenium"""
+    # Importados aqui para que o script não carregue o Selenium antes de precisar dele
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from webdriver_manager.chrome import ChromeDriverManager
+
     chrome_options = Options()
     # Descomente para execução sem interface
     # chrome_options.add_argument("--headless")
@@ -93,6 +92,8 @@ def download_file(url, output_path):
 
 def find_and_download_anexos():
     """Encontra e baixa os anexos I e II do site da ANS"""
+    from selenium.webdriver.common.by import By
+
     driver = setup_driver()
 
     try:
@@ -0,0 +1,73 @@
+"""
+Benchmark: consultas de painel (contagem por capítulo coberta por HCO e lista
+de subgrupos de um grupo) pelo agregado materializado x GROUP BY na tabela
+
+Uso: python benchmarks/bench_coverage.py [linhas]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+DB_FILE = Path(tempfile.mkdtemp()) / "bench_coverage.db"
+os.environ["DB_URL"] = f"sqlite:///{DB_FILE}"
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from database.db_manager import (count_procedures_by_capitulo, list_subgrupos,  # noqa: E402
+                                 refresh_coverage_summary, _covered_sql)
+from database.models import setup_database  # noqa: E402
+
+
+def timed(func, repeat=10):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+    engine = setup_database()
+    rng = np.random.default_rng(1)
+    subgrupo = rng.integers(0, 400, rows)
+    pd.DataFrame({
+        'procedimento': [f"PROCEDIMENTO {i}" for i in range(rows)],
+        'capitulo': [f"CAPÍTULO {s // 80}" for s in subgrupo],
+        'grupo': [f"GRUPO {s // 8}" for s in subgrupo],
+        'subgrupo': [f"SUBGRUPO {s}" for s in subgrupo],
+        'hco': np.where(rng.random(rows) < 0.4, "Seg. Hospitalar Com Obstetrícia", ""),
+    }).to_sql('rol_procedimentos', engine, if_exists='append', index=False)
+
+    session = sessionmaker(bind=engine)()
+    start = time.perf_counter()
+    refresh_coverage_summary(session)
+    session.commit()
+    print(f"Tabela: {rows} linhas | atualização do agregado: {time.perf_counter() - start:.2f} s")
+
+    def scan_capitulo():
+        with engine.connect() as conn:
+            return conn.execute(text(f"SELECT capitulo, COUNT(*) FROM rol_procedimentos "
+                                     f"WHERE {_covered_sql('hco')} GROUP BY capitulo")).fetchall()
+
+    def scan_subgrupos():
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT DISTINCT subgrupo FROM rol_procedimentos "
+                                     "WHERE grupo = 'GRUPO 7'")).fetchall()
+
+    print(f"Capítulos cobertos por HCO  agregado: {timed(lambda: count_procedures_by_capitulo('HCO')):7.2f} ms "
+          f"| GROUP BY: {timed(scan_capitulo):7.2f} ms")
+    print(f"Subgrupos de um grupo       agregado: {timed(lambda: list_subgrupos('GRUPO 7')):7.2f} ms "
+          f"| DISTINCT: {timed(scan_subgrupos):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
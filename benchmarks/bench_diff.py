@@ -0,0 +1,63 @@
+"""
+Benchmark: diff_rol entre duas revisões sintéticas de 100 mil linhas
+
+Uso: python benchmarks/bench_diff.py [linhas]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config.settings import ABBREVIATIONS  # noqa: E402
+from utils.rol_diff import diff_rol  # noqa: E402
+
+
+def synthetic_rol(rows, rng):
+    """DataFrame no formato de clean_table_data com cobertura aleatória"""
+    subgrupo = rng.integers(0, 300, rows)
+    df = pd.DataFrame({
+        'PROCEDIMENTO': [f"PROCEDIMENTO SINTÉTICO {i}" for i in range(rows)],
+        'RN': "RN 465/2021",
+        'VIGÊNCIA': "01/04/2021",
+        'SUBGRUPO': [f"SUBGRUPO {s}" for s in subgrupo],
+        'GRUPO': [f"GRUPO {s // 10}" for s in subgrupo],
+        'CAPÍTULO': [f"CAPÍTULO {s // 60}" for s in subgrupo],
+    })
+    for column, full_name in ABBREVIATIONS.items():
+        df[column] = np.where(rng.random(rows) < 0.5, full_name, None)
+    return df
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = np.random.default_rng(5)
+
+    old = synthetic_rol(rows, rng)
+
+    # Nova revisão: 1% excluídos, 1% incluídos, 2% com PAC alternado, 1% com nova RN
+    new = old.sample(frac=0.99, random_state=1).reset_index(drop=True)
+    extra = synthetic_rol(rows // 100, rng)
+    extra['PROCEDIMENTO'] = extra['PROCEDIMENTO'] + " NOVO"
+    new = pd.concat([new, extra], ignore_index=True)
+    flip = rng.random(len(new)) < 0.02
+    new.loc[flip, 'PAC'] = np.where(new.loc[flip, 'PAC'].isna(), ABBREVIATIONS['PAC'], None)
+    new.loc[rng.random(len(new)) < 0.01, 'RN'] = "RN 600/2024"
+
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        changelog = diff_rol(old, new)
+        timings.append(time.perf_counter() - start)
+
+    print(f"Revisões: {len(old)} x {len(new)} linhas")
+    print(f"diff_rol: mediana {np.median(timings) * 1000:.0f} ms | mínimo {min(timings) * 1000:.0f} ms")
+    print(f"Meta (< 1 s para 100 mil linhas): {'OK' if np.median(timings) < 1 else 'NÃO ATINGIDA'}")
+    print(changelog.groupby(['tipo', 'coluna', 'alteracao'], dropna=False).size().to_string())
+
+
+if __name__ == "__main__":
+    main()
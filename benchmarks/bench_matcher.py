@@ -0,0 +1,49 @@
+"""
+Benchmark: casamento em lote de nomes de procedimentos com RolMatcher
+
+Uso: python benchmarks/bench_matcher.py [linhas_do_rol] [nomes]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.matcher import RolMatcher  # noqa: E402
+
+WORDS = ["ressonância", "magnética", "tomografia", "computadorizada", "crânio", "tórax",
+         "biópsia", "pulmão", "cirurgia", "coração", "artroscopia", "joelho", "implante",
+         "dentário", "exame", "sangue", "ultrassonografia", "abdômen", "endoscopia", "digestiva"]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 6000
+    names = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    rng = np.random.default_rng(7)
+    vocabulary = WORDS + [f"termo{i}" for i in range(3000)]
+    rol_names = [" de ".join(vocabulary[j] for j in rng.integers(0, len(vocabulary), 4)) for _ in range(rows)]
+    rol = pd.DataFrame({'id': np.arange(rows), 'procedimento': rol_names})
+
+    start = time.perf_counter()
+    matcher = RolMatcher.build(rol)
+    build_s = time.perf_counter() - start
+
+    # Metade exata (com variações de caixa/acentos), metade com erros de digitação
+    picks = rng.integers(0, rows, names)
+    queries = [rol_names[i].upper() if k % 2 else rol_names[i][:-3] + "xyz" for k, i in enumerate(picks)]
+
+    start = time.perf_counter()
+    result = matcher.match_batch(queries)
+    match_s = time.perf_counter() - start
+
+    accuracy = (result['id'].to_numpy() == picks).mean()
+    print(f"Índice: {rows} linhas em {build_s:.2f} s")
+    print(f"Casamento: {names} nomes em {match_s:.2f} s ({names / match_s:,.0f} nomes/s), acerto {accuracy:.1%}")
+
+
+if __name__ == "__main__":
+    main()
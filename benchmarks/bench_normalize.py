@@ -0,0 +1,108 @@
+"""
+Benchmark: normalização vetorizada das células do Rol (normalize_table_text)
+comparada a uma implementação linha a linha com apply, sobre um Rol sintético
+com hifenização de quebra de linha, espaços repetidos, texto em NFD, células
+mescladas vazias e o cabeçalho repetido a cada página
+
+Uso: python benchmarks/bench_normalize.py [linhas]
+"""
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config.settings import ROL_COLUMNS, ABBREVIATIONS  # noqa: E402
+from utils.pdf_processor import normalize_table_text, HIERARCHY_LEVELS  # noqa: E402
+
+WORDS = ["RESSO-\nNÂNCIA", "MAGNÉTICA", "TOMO- GRAFIA", "CRÂNIO", "TÓRAX", "BIÓPSIA",
+         "PULMÃO", "CIRURGIA", "CORAÇÃO", "ARTROS-\nCOPIA", "JOELHO", "EXAME"]
+ROWS_PER_PAGE = 40
+TEXT_COLUMNS = [col for col in ROL_COLUMNS if col not in ABBREVIATIONS]
+
+
+def build_raw(rows):
+    """Rol sintético como sai do Docling: hierarquia só na primeira linha de cada bloco"""
+    rng = np.random.default_rng(7)
+    words = rng.integers(0, len(WORDS), size=(rows, 3))
+    names = [unicodedata.normalize('NFD', "  ".join(WORDS[w] for w in row)) + f" {i}"
+             for i, row in enumerate(words)]
+
+    df = pd.DataFrame({'PROCEDIMENTO': names})
+    df['RN'] = "465/2021"
+    df['VIGÊNCIA'] = "01/04/2021"
+    for col in ['OD', 'AMB', 'HCO', 'HSO', 'REF', 'PAC']:
+        df[col] = np.where(rng.random(rows) < 0.4, col, "")
+    df['DUT'] = ""
+
+    # Um capítulo novo a cada 2000 linhas, grupo a cada 200, subgrupo a cada 20
+    position = np.arange(rows)
+    for col, size in zip(HIERARCHY_LEVELS, (2000, 200, 20)):
+        df[col] = np.where(position % size == 0, [f"{col}  {p // size}" for p in position], None)
+
+    # Cabeçalho repetido no início de cada página
+    header = pd.DataFrame([{col: col for col in ROL_COLUMNS}])
+    pages = [df.iloc[i:i + ROWS_PER_PAGE] for i in range(0, rows, ROWS_PER_PAGE)]
+    return pd.concat([part for page in pages for part in (header, page)], ignore_index=True) \
+        .reindex(columns=ROL_COLUMNS)
+
+
+def _normalize_cell(value):
+    if pd.isna(value):
+        return None
+    text = re.sub(r'(\w)-\s+(\w)', r'\1\2', str(value))
+    text = unicodedata.normalize('NFC', re.sub(r'\s+', ' ', text).strip())
+    return text or None
+
+
+def normalize_by_row(df):
+    """Referência linha a linha: mesmo resultado, com apply por célula e por linha"""
+    df = df.copy()
+    for col in ROL_COLUMNS:
+        df[col] = df[col].apply(_normalize_cell)
+
+    def is_header(row):
+        matches = [c for c in TEXT_COLUMNS if isinstance(row[c], str) and row[c].upper() == c]
+        return 'PROCEDIMENTO' in matches or len(matches) >= 2
+
+    df = df[~df.apply(is_header, axis=1)]
+
+    last = {}
+    filled = []
+    for _, row in df.iterrows():
+        for level, col in enumerate(HIERARCHY_LEVELS):
+            if isinstance(row[col], str):
+                last[col] = row[col]
+                for lower in HIERARCHY_LEVELS[level + 1:]:
+                    last.pop(lower, None)
+        filled.append([last.get(col) for col in HIERARCHY_LEVELS])
+    df[HIERARCHY_LEVELS] = filled
+    return df
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    raw = build_raw(rows)
+    print(f"Rol sintético: {len(raw)} linhas ({len(raw) - rows} cabeçalhos repetidos)")
+
+    start = time.perf_counter()
+    vectorized = normalize_table_text(raw)
+    vectorized_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    by_row = normalize_by_row(raw)
+    by_row_s = time.perf_counter() - start
+
+    same = vectorized.astype(object).fillna('').equals(by_row.astype(object).fillna(''))
+    print(f"vetorizado:     {vectorized_s:7.2f} s")
+    print(f"linha a linha:  {by_row_s:7.2f} s ({by_row_s / vectorized_s:.0f}x)")
+    print(f"resultados iguais: {same} | {len(vectorized)} linhas normalizadas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: busca FTS5 (search_procedures) x varredura com LIKE '%...%'
+sobre uma tabela rol_procedimentos sintética com várias revisões
+
+Uso: python benchmarks/bench_search.py [linhas_por_revisao] [revisoes]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+DB_FILE = Path(tempfile.mkdtemp()) / "bench_search.db"
+os.environ["DB_URL"] = f"sqlite:///{DB_FILE}"
+
+from sqlalchemy import text  # noqa: E402
+
+from database.db_manager import search_procedures, setup_search_index  # noqa: E402
+from database.models import setup_database  # noqa: E402
+
+WORDS = ["ressonância", "magnética", "tomografia", "computadorizada", "crânio", "tórax",
+         "biópsia", "pulmão", "cirurgia", "coração", "artroscopia", "joelho", "implante",
+         "dentário", "exame", "sangue", "ultrassonografia", "abdômen", "endoscopia", "digestiva"]
+QUERIES = ["ressonancia magnetica", "biopsia pulmao", "artroscopia", "implante dentario"]
+
+
+def build_table(engine, rows, revisions):
+    """Popula a tabela com nomes sintéticos repetidos em várias revisões"""
+    rng = np.random.default_rng(42)
+    # Vocabulário realista: poucos termos do Rol e muitos termos raros
+    vocabulary = WORDS + [f"termo{i}" for i in range(5000)]
+    picks = rng.integers(0, len(vocabulary), size=(rows, 6))
+    names = [" ".join(vocabulary[i] for i in row) for row in picks]
+
+    base = pd.DataFrame({
+        'procedimento': names,
+        'capitulo': [f"CAPÍTULO {i % 10}" for i in range(rows)],
+        'grupo': [f"GRUPO {i % 50}" for i in range(rows)],
+        'subgrupo': [f"SUBGRUPO {i % 200}" for i in range(rows)],
+        'hco': np.where(rng.random(rows) < 0.5, "Seg. Hospitalar Com Obstetrícia", ""),
+    })
+    for _ in range(revisions):
+        base.to_sql('rol_procedimentos', engine, if_exists='append', index=False)
+
+
+def timed(func, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    revisions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    engine = setup_database()
+    setup_search_index(engine)
+    build_table(engine, rows, revisions)
+    print(f"Tabela: {rows * revisions} linhas ({revisions} revisões)")
+
+    for query in QUERIES:
+        like_sql = text("SELECT * FROM rol_procedimentos WHERE "
+                        + " AND ".join(f"procedimento LIKE :t{i}" for i in range(len(query.split()))))
+        params = {f"t{i}": f"%{term}%" for i, term in enumerate(query.split())}
+
+        def like_scan():
+            with engine.connect() as conn:
+                return conn.execute(like_sql, params).fetchall()
+
+        fts_ms = timed(lambda: search_procedures(query, limit=20))
+        like_ms = timed(like_scan)
+        print(f"{query!r:28} FTS5: {fts_ms:8.2f} ms | LIKE: {like_ms:8.2f} ms "
+              f"| LIKE sem acento encontra {len(like_scan())} linhas")
+
+
+if __name__ == "__main__":
+    main()
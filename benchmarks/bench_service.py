@@ -0,0 +1,128 @@
+"""
+Teste de carga do serviço HTTP de consulta do Rol (utils/rol_service.py)
+Sobe o serviço em localhost sobre um banco sintético e dispara requisições
+de vários clientes simultâneos (conexões persistentes), com e sem ETag
+
+Uso: python benchmarks/bench_service.py [linhas] [clientes] [requisicoes_por_cliente]
+"""
+import http.client
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+DB_FILE = Path(tempfile.mkdtemp()) / "bench_service.db"
+os.environ["DB_URL"] = f"sqlite:///{DB_FILE}"
+
+from config.settings import ROL_COLUMNS  # noqa: E402
+from database.db_manager import save_to_database  # noqa: E402
+from utils.rol_service import create_server  # noqa: E402
+
+SEGMENTS = {'OD': "Seg. Odontológica", 'AMB': "Seg. Ambulatorial", 'HCO': "Seg. Hospitalar Com Obstetrícia",
+            'HSO': "Seg. Hospitalar Sem Obstetrícia", 'REF': "Plano Referência", 'PAC': "Procedimento de Alta Complexidade"}
+WORDS = ["ressonância", "magnética", "tomografia", "crânio", "tórax", "biópsia", "pulmão",
+         "cirurgia", "coração", "artroscopia", "joelho", "implante", "exame", "sangue"]
+
+
+def build_rol(rows):
+    """Rol sintético com hierarquia de 400 subgrupos e cobertura aleatória"""
+    rng = np.random.default_rng(7)
+    subgrupo = rng.integers(0, 400, rows)
+    words = rng.integers(0, len(WORDS), size=(rows, 3))
+    df = pd.DataFrame({
+        'PROCEDIMENTO': [f"{' '.join(WORDS[w] for w in row)} {i}" for i, row in enumerate(words)],
+        'CAPÍTULO': [f"CAPÍTULO {s // 80}" for s in subgrupo],
+        'GRUPO': [f"GRUPO {s // 8}" for s in subgrupo],
+        'SUBGRUPO': [f"SUBGRUPO {s}" for s in subgrupo],
+    })
+    for column, label in SEGMENTS.items():
+        df[column] = np.where(rng.random(rows) < 0.4, label, "")
+    return df.reindex(columns=ROL_COLUMNS)
+
+
+def run_clients(port, paths, clients, per_client, use_etag):
+    """Executa as requisições e retorna (latências em ms, duração total, respostas 304)"""
+    latencies = [[] for _ in range(clients)]
+    not_modified = [0] * clients
+
+    def client(n):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        etags = {}
+        for i in range(per_client):
+            path = paths[(n + i) % len(paths)]
+            headers = {'If-None-Match': etags[path]} if use_etag and path in etags else {}
+
+            start = time.perf_counter()
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            latencies[n].append((time.perf_counter() - start) * 1000)
+
+            etags[path] = response.getheader('ETag')
+            not_modified[n] += response.status == 304
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return np.concatenate(latencies), time.perf_counter() - start, sum(not_modified)
+
+
+def run_server(ready):
+    """Processo do serviço: carrega o índice, informa a porta e atende até ser encerrado"""
+    start = time.perf_counter()
+    server = create_server(port=0)
+    ready.put((server.server_address[1], time.perf_counter() - start))
+    server.serve_forever()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    per_client = int(sys.argv[3]) if len(sys.argv) > 3 else 250
+
+    save_to_database(build_rol(rows))
+
+    # O serviço roda em outro processo para não disputar o GIL com os clientes
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run_server, args=(ready,), daemon=True)
+    process.start()
+    port, load_time = ready.get()
+    print(f"Rol: {rows} linhas | carga do índice: {load_time:.2f} s | "
+          f"{clients} clientes x {per_client} requisições")
+
+    paths = ["/procedimentos?" + urlencode(params) for params in [
+        {'capitulo': "CAPÍTULO 2", 'limit': 50},
+        {'grupo': "GRUPO 17", 'segmento': "hco,pac"},
+        {'subgrupo': "SUBGRUPO 123"},
+        {'q': "biopsia pulmao", 'limit': 20},
+        {'segmento': "od", 'limit': 100},
+        {'capitulo': "CAPÍTULO 1", 'format': "arrow", 'limit': 500},
+    ]]
+
+    try:
+        for label, use_etag in (("sem ETag", False), ("com ETag", True)):
+            latencies, elapsed, not_modified = run_clients(port, paths, clients, per_client, use_etag)
+            print(f"{label:9s} p50: {np.percentile(latencies, 50):6.2f} ms | "
+                  f"p99: {np.percentile(latencies, 99):6.2f} ms | "
+                  f"{len(latencies) / elapsed:8.0f} req/s | 304: {not_modified}")
+    finally:
+        process.terminate()
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: tempo de importação e memória (RSS) de cada subcomando do cli.py
+em comparação com o main.py, a partir do relatório de python -X importtime
+
+Uso: python benchmarks/bench_startup.py [modulos_no_ranking]
+"""
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Módulos importados por cada comando (os mesmos importados nas funções do cli.py)
+SCENARIOS = {
+    'cli (parser)': ['cli'],
+    'cli check': ['cli', 'utils.web_scraper'],
+    'cli query': ['cli', 'database.db_manager'],
+    'cli load': ['cli', 'pandas', 'database.db_manager', 'utils.downloads'],
+    'cli extract': ['cli', 'utils.pdf_processor'],
+    'main.py': ['main'],
+}
+
+# Linha do relatório: "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+CODE = ("import resource, sys; sys.path.insert(0, {root!r}); {imports}; "
+        "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)")
+
+
+def measure(modules):
+    """Importa os módulos em um processo novo e retorna (ms, RSS em MiB, ranking de módulos)"""
+    code = CODE.format(root=str(ROOT), imports='; '.join(f"import {m}" for m in modules))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, cwd=ROOT)
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'erro'
+        return None, None, error
+
+    total_us = 0
+    packages = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us = int(match.group(1))
+        total_us += self_us
+
+        # Tempo próprio somado por pacote de topo (ex.: "sqlalchemy" para "sqlalchemy.orm")
+        top = match.group(4).split('.')[0]
+        packages[top] = packages.get(top, 0) + self_us
+
+    rss_mib = int(result.stdout.strip().splitlines()[-1]) / 1024
+    ranking = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return total_us / 1000, rss_mib, ranking
+
+
+def main():
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print(f"{'Comando':14s} {'importação':>12s} {'RSS':>10s}   maiores pacotes (ms)")
+    for label, modules in SCENARIOS.items():
+        elapsed_ms, rss_mib, ranking = measure(modules)
+        if elapsed_ms is None:
+            print(f"{label:14s} {'-':>12s} {'-':>10s}   falhou: {ranking}")
+            continue
+
+        packages = ', '.join(f"{name} {us / 1000:.0f}" for name, us in ranking[:top])
+        print(f"{label:14s} {elapsed_ms:9.0f} ms {rss_mib:7.0f} MiB   {packages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: espaço em disco do layout largo x esquema normalizado
+(dimensões + máscara de bits) para o mesmo DataFrame sintético do Rol
+
+Uso: python benchmarks/bench_storage.py [linhas]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+DB_FILE = Path(tempfile.mkdtemp()) / "bench_storage.db"
+os.environ["DB_URL"] = f"sqlite:///{DB_FILE}"
+
+from config.settings import ABBREVIATIONS  # noqa: E402
+from database.db_manager import save_to_database  # noqa: E402
+from database.normalized import bulk_load_normalized, storage_report  # noqa: E402
+
+
+def synthetic_rol(rows):
+    """DataFrame no formato de clean_table_data com cobertura aleatória"""
+    rng = np.random.default_rng(3)
+    subgrupo = rng.integers(0, 300, rows)
+    df = pd.DataFrame({
+        'PROCEDIMENTO': [f"PROCEDIMENTO SINTÉTICO NÚMERO {i}" for i in range(rows)],
+        'RN': "RN 465/2021",
+        'VIGÊNCIA': "01/04/2021",
+        'SUBGRUPO': [f"SUBGRUPO DE PROCEDIMENTOS {s}" for s in subgrupo],
+        'GRUPO': [f"GRUPO DE PROCEDIMENTOS {s // 10}" for s in subgrupo],
+        'CAPÍTULO': [f"CAPÍTULO DE PROCEDIMENTOS {s // 60}" for s in subgrupo],
+    })
+    for column, full_name in ABBREVIATIONS.items():
+        df[column] = np.where(rng.random(rows) < 0.5, full_name, None)
+    return df
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    df = synthetic_rol(rows)
+
+    start = time.perf_counter()
+    save_to_database(df)
+    print(f"Carga larga (save_to_database): {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    bulk_load_normalized(df)
+    print(f"Carga normalizada (bulk_load_normalized): {time.perf_counter() - start:.2f} s")
+
+    report = storage_report()
+    wide, compact = report['bytes'].tolist()
+    print(report.to_string(index=False))
+    print(f"Redução: {1 - compact / wide:.1%}")
+
+
+if __name__ == "__main__":
+    main()
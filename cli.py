@@ -0,0 +1,183 @@
+"""
+Linha de comando do projeto, com um subcomando por etapa:
+
+    python cli.py check      verifica se há uma revisão nova do Anexo I no site
+    python cli.py download   baixa os anexos I e II
+    python cli.py extract    extrai a tabela do Rol do Anexo I (CSV + ZIP)
+    python cli.py load       grava o CSV extraído no banco de dados
+    python cli.py query      consulta o Rol gravado no banco
+    python cli.py run        executa o pipeline completo (com checkpoints)
+
+Cada subcomando importa apenas os módulos de que precisa: uma consulta ao banco
+não carrega o Selenium nem o Docling
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+current_dir = Path(__file__).resolve().parent
+sys.path.append(str(current_dir))
+
+logger = logging.getLogger(__name__)
+
+
+def cmd_check(args):
+    """Compara o ETag/Last-Modified do Anexo I publicado com os do último download"""
+    from config.settings import DOWNLOADS_DIR, ANEXO_I_NAME
+    from utils.web_scraper import check_new_revision
+
+    result = check_new_revision(DOWNLOADS_DIR / ANEXO_I_NAME)
+    if result is None:
+        return False
+
+    if result['nova']:
+        print(f"Nova revisão disponível: {result['url']}")
+    else:
+        print(f"Nenhuma revisão nova (baixada em {result['data_download']})")
+    return True
+
+
+def cmd_download(args):
+    """Baixa os anexos I e II e os compacta"""
+    from utils.web_scraper import find_and_download_anexos, compress_files
+
+    anexo_i_path, anexo_ii_path = find_and_download_anexos()
+    if not anexo_i_path or not anexo_ii_path:
+        logger.error("Não foi possível baixar os anexos.")
+        return False
+
+    compress_files([anexo_i_path, anexo_ii_path])
+    print(f"{anexo_i_path}\n{anexo_ii_path}")
+    return True
+
+
+def cmd_extract(args):
+    """Extrai a tabela do Rol do PDF do Anexo I e grava o CSV e o ZIP"""
+    from config.settings import DOWNLOADS_DIR, ANEXO_I_NAME
+    from utils.pdf_processor import process_anexo_i
+
+    rol_df, csv_path, zip_path = process_anexo_i(args.pdf or DOWNLOADS_DIR / ANEXO_I_NAME)
+    if rol_df is None:
+        return False
+
+    print(csv_path)
+    return True
+
+
+def cmd_load(args):
+    """Grava no banco de dados o CSV gerado por extract"""
+    import pandas as pd
+
+    from config.settings import OUTPUT_DIR, OUTPUT_CSV, DOWNLOADS_DIR, ANEXO_I_NAME, FINGERPRINT_COLUMN
+    from database.db_manager import save_to_database, get_revision
+    from utils.downloads import build_revision_info
+
+    csv_path = Path(args.csv or OUTPUT_DIR / OUTPUT_CSV)
+    rol_df = pd.read_csv(csv_path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+
+    # A impressão digital é recalculada a partir dos valores lidos do CSV
+    rol_df = rol_df.drop(columns=[FINGERPRINT_COLUMN], errors='ignore')
+
+    pdf_path = Path(args.pdf or DOWNLOADS_DIR / ANEXO_I_NAME)
+    revision = build_revision_info(pdf_path) if pdf_path.exists() else None
+
+    if not save_to_database(rol_df, revision=revision):
+        return False
+
+    info = get_revision(revision['pdf_hash'] if revision else None)
+    if info:
+        print(f"Revisão {info['id']}: {info['total_registros']} registros "
+              f"({info['linhas_novas']} linhas novas, {info['linhas_vistas']} já vistas)")
+    return True
+
+
+def _parse_filters(items):
+    """Converte os filtros "coluna=valor" (valor "*" = coberto) em dicionário"""
+    filters = {}
+    for item in items or []:
+        column, _, value = item.partition('=')
+        filters[column] = True if value == '*' else value
+    return filters
+
+
+def cmd_query(args):
+    """Consulta o Rol gravado no banco (busca por nome ou revisão inteira) e imprime o resultado"""
+    from database.db_manager import query_database, search_procedures
+
+    filters = _parse_filters(args.filtro)
+    if args.busca:
+        result = search_procedures(args.busca, limit=args.limite or 10 ** 9, filters=filters)
+    else:
+        as_of = int(args.as_of) if args.as_of and args.as_of.isdigit() else args.as_of
+        result = query_database(as_of=as_of, filters=filters)
+        if result is not None and args.limite:
+            result = result.head(args.limite)
+
+    if result is None:
+        return False
+
+    if args.formato == 'json':
+        print(result.to_json(orient='records', force_ascii=False))
+    else:
+        result.to_csv(sys.stdout, index=False)
+    return True
+
+
+def cmd_run(args):
+    """Executa o pipeline completo de main.py"""
+    import main
+
+    return main.main(force_stage=args.force_stage)
+
+
+def build_parser():
+    from utils.checkpoint import STAGES
+
+    parser = argparse.ArgumentParser(description="Extração do Rol de Procedimentos da ANS")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    subparsers.add_parser('check', help="verifica se há uma revisão nova do Anexo I") \
+        .set_defaults(func=cmd_check)
+    subparsers.add_parser('download', help="baixa os anexos I e II").set_defaults(func=cmd_download)
+
+    extract = subparsers.add_parser('extract', help="extrai a tabela do Rol do Anexo I")
+    extract.add_argument('pdf', nargs='?', help="PDF do Anexo I (padrão: o último baixado)")
+    extract.set_defaults(func=cmd_extract)
+
+    load = subparsers.add_parser('load', help="grava o CSV extraído no banco de dados")
+    load.add_argument('csv', nargs='?', help="CSV gerado por extract (padrão: o último gerado)")
+    load.add_argument('--pdf', help="PDF de origem, para registrar hash e metadados da revisão")
+    load.set_defaults(func=cmd_load)
+
+    query = subparsers.add_parser('query', help="consulta o Rol gravado no banco")
+    query.add_argument('--busca', help="texto buscado no nome do procedimento")
+    query.add_argument('--as-of', help="id da revisão ou data (AAAA-MM-DD); padrão: vigente")
+    query.add_argument('--filtro', action='append', metavar='COLUNA=VALOR',
+                       help="filtro por coluna (ex.: pac=*, grupo=...); pode ser repetido")
+    query.add_argument('--limite', type=int, default=20, help="quantidade máxima de linhas (0 = todas)")
+    query.add_argument('--formato', choices=['csv', 'json'], default='csv')
+    query.set_defaults(func=cmd_query)
+
+    run = subparsers.add_parser('run', help="executa o pipeline completo")
+    run.add_argument('--force-stage', choices=STAGES,
+                     help="refaz a etapa indicada e as seguintes, ignorando os checkpoints")
+    run.set_defaults(func=cmd_run)
+
+    return parser
+
+
+def cli(argv=None):
+    """Executa o subcomando e retorna o código de saída"""
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    try:
+        return 0 if args.func(args) else 1
+    except Exception as e:
+        logger.error(f"Erro no comando {args.comando}: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
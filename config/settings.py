@@ -37,4 +37,65 @@ ABBREVIATIONS = {
     "REF": "Plano Referência",
     "PAC": "Procedimento de Alta Complexidade",
     "DUT": "Diretrizes de Utilização"
-}
\ No newline at end of file
+}
+
+# Colunas padronizadas da tabela do Rol (na ordem do Anexo I)
+ROL_COLUMNS = ['PROCEDIMENTO', 'RN', 'VIGÊNCIA', 'OD', 'AMB', 'HCO', 'HSO',
+               'REF', 'PAC', 'DUT', 'SUBGRUPO', 'GRUPO', 'CAPÍTULO']
+
+# Coluna com o hash (64 bits) das colunas normalizadas de cada linha
+FINGERPRINT_COLUMN = "FINGERPRINT"
+
+# Pool de conexões (MySQL/pymysql)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+
+# Pragmas de desempenho do SQLite (cache em KiB, mmap em bytes)
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Grava também o esquema normalizado (dimensões + máscara de bits de segmentos)
+DB_NORMALIZED_SCHEMA = os.getenv("DB_NORMALIZED_SCHEMA", "0").lower() in ("1", "true", "yes")
+
+# Processamento do Anexo II (DUT): páginas por tarefa e processos do pool
+DUT_PAGES_PER_TASK = int(os.getenv("DUT_PAGES_PER_TASK", "16"))
+PDF_MAX_WORKERS = int(os.getenv("PDF_MAX_WORKERS", str(os.cpu_count() or 1)))
+
+# Coleta de revisões históricas (crawler)
+REVISIONS_DIR = DOWNLOADS_DIR / "revisoes"
+CRAWLER_MAX_WORKERS = int(os.getenv("CRAWLER_MAX_WORKERS", "4"))
+CRAWLER_PER_HOST = int(os.getenv("CRAWLER_PER_HOST", "2"))
+CRAWLER_DELAY = float(os.getenv("CRAWLER_DELAY", "1.0"))
+CRAWLER_MAX_DEPTH = int(os.getenv("CRAWLER_MAX_DEPTH", "1"))
+CRAWLER_MAX_PAGES = int(os.getenv("CRAWLER_MAX_PAGES", "50"))
+CRAWLER_TIMEOUT = int(os.getenv("CRAWLER_TIMEOUT", "60"))
+
+# Processamento em lote de PDFs do Anexo I (um Parquet por PDF + dataset combinado)
+BATCH_OUTPUT_DIR = OUTPUT_DIR / "lote"
+BATCH_DATASET = "rol_dataset.parquet"
+
+# Pontos de controle das etapas do pipeline (retomada de execuções interrompidas)
+CHECKPOINT_DIR = OUTPUT_DIR / "checkpoints"
+
+# Selenium (usado quando os links dos anexos não estão no HTML estático)
+SELENIUM_HEADLESS = os.getenv("SELENIUM_HEADLESS", "1").lower() in ("1", "true", "yes")
+SELENIUM_TIMEOUT = int(os.getenv("SELENIUM_TIMEOUT", "30"))
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")
+CHROMEDRIVER_CACHE_FILE = DOWNLOADS_DIR / ".chromedriver_path"
+
+# Cache das consultas ao Rol (memória limitada + camada opcional em disco, Arrow/Feather)
+QUERY_CACHE_MAX_MB = int(os.getenv("QUERY_CACHE_MAX_MB", "256"))
+QUERY_CACHE_DISK = os.getenv("QUERY_CACHE_DISK", "0").lower() in ("1", "true", "yes")
+QUERY_CACHE_DIR = OUTPUT_DIR / "cache"
+
+# Serviço HTTP de consulta do Rol (somente leitura)
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8080"))
+SERVICE_RELOAD_INTERVAL = float(os.getenv("SERVICE_RELOAD_INTERVAL", "5"))
+
+# Extração do Anexo I com memória limitada: só quando o orçamento é excedido as tabelas
+# extraídas vão para Parquets temporários; o PDF é convertido em faixas de páginas (0 = inteiro)
+PDF_MEMORY_BUDGET_MB = int(os.getenv("PDF_MEMORY_BUDGET_MB", "512"))
+PDF_PAGES_PER_CHUNK = int(os.getenv("PDF_PAGES_PER_CHUNK", "50"))
+PDF_STAGING_DIR = OUTPUT_DIR / "staging"
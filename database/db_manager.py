@@ -1,79 +1,778 @@
-import os
+import re
+import hashlib
+import numbers
+from datetime import datetime
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine, Column, String, Integer, Float, MetaData, Table, text
-
-import config
-
-
-def get_engine():
-    """Cria e retorna uma conexão com o banco de dados SQLite"""
-    # Usar SQLite para simplicidade
-    db_path = os.path.join(config.OUTPUT_FOLDER, f"{config.DB_NAME}.db")
-    return create_engine(f'sqlite:///{db_path}')
-
-
-def create_tables(engine):
-    """Cria a tabela para armazenar os dados do Rol de Procedimentos"""
-    metadata = MetaData()
-
-    # Definição da tabela
-    rol_table = Table(
-        'rol_procedimentos', metadata,
-        Column('id', Integer, primary_key=True, autoincrement=True),
-        Column('procedimento', String),
-        Column('rn', String),
-        Column('vigencia', String),
-        Column('od', String),
-        Column('amb', String),
-        Column('hco', String),
-        Column('hso', String),
-        Column('ref', String),
-        Column('pac', String),
-        Column('dut', String),
-        Column('subgrupo', String),
-        Column('grupo', String),
-        Column('capitulo', String)
-    )
-
-    # Cria as tabelas no banco de dados
-    metadata.create_all(engine)
-    return rol_table
-
-
-def insert_into_database(df):
-    """Insere os dados do DataFrame no banco de dados"""
-    engine = get_engine()
-    table = create_tables(engine)
-
-    # Prepara os dados para inserção
-    data_to_insert = []
-    for _, row in df.iterrows():
-        record = {}
-        for column in table.columns.keys():
-            if column != 'id':  # Ignora a coluna ID (autoincremento)
-                # Converte o nome da coluna para maiúsculo para comparar com o DataFrame
-                df_column = column.upper()
-                record[column] = row.get(df_column, None)
-
-        data_to_insert.append(record)
-
-    # Insere os dados no banco de dados
-    with engine.connect() as conn:
-        for record in data_to_insert:
-            insert_stmt = table.insert().values(**record)
-            conn.execute(insert_stmt)
-        conn.commit()
-
-    print(f"Inseridos {len(data_to_insert)} registros no banco de dados")
-
-
-def get_data_from_database():
-    """Recupera os dados do banco de dados"""
-    engine = get_engine()
-
-    query = text("SELECT * FROM rol_procedimentos")
-    with engine.connect() as conn:
-        result = conn.execute(query)
-        data = [dict(row) for row in result]
-
-    return pd.DataFrame(data)
\ No newline at end of file
+from sqlalchemy import func, insert, update, or_, text, DateTime
+from sqlalchemy.orm import sessionmaker
+import logging
+
+from database.models import setup_database, RolProcedimento, RolRevisao, RowFingerprint, RolCoberturaResumo, \
+    DutDiretriz, DutProcedimento, SEGMENT_COLUMNS, HIERARCHY_COLUMNS
+from config.settings import FINGERPRINT_COLUMN
+from utils.fingerprint import add_row_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Quantidade máxima de parâmetros por consulta IN (limite do SQLite)
+FINGERPRINT_CHUNK_SIZE = 500
+
+# Tamanho dos lotes de inserção em rol_procedimentos
+INSERT_CHUNK_SIZE = 1000
+
+# Coluna do DataFrame -> coluna de rol_procedimentos
+COLUMN_MAPPING = {
+    'PROCEDIMENTO': 'procedimento',
+    'RN': 'rn',
+    'VIGÊNCIA': 'vigencia',
+    'OD': 'od',
+    'AMB': 'amb',
+    'HCO': 'hco',
+    'HSO': 'hso',
+    'REF': 'ref',
+    'PAC': 'pac',
+    'DUT': 'dut',
+    'SUBGRUPO': 'subgrupo',
+    'GRUPO': 'grupo',
+    'CAPÍTULO': 'capitulo',
+}
+
+# Tabela virtual FTS5 (conteúdo externo) sobre rol_procedimentos
+SEARCH_TABLE = 'rol_procedimentos_fts'
+SEARCH_COLUMNS = ['procedimento', 'subgrupo', 'grupo', 'capitulo']
+
+# Colunas aceitas como filtro em search_procedures
+FILTER_COLUMNS = ['rn', 'vigencia', 'od', 'amb', 'hco', 'hso', 'ref', 'pac', 'dut',
+                  'subgrupo', 'grupo', 'capitulo']
+
+# Valores gravados em colunas de segmento sem cobertura
+EMPTY_VALUES = ('', 'None', 'nan', 'NaN')
+
+# Data da revisão criada para as linhas gravadas antes do controle de revisões
+LEGACY_REVISION_DATE = datetime(1970, 1, 1)
+
+
+def revision_date():
+    """Data da revisão: a de publicação do PDF ou, sem ela, a do download"""
+    return func.coalesce(RolRevisao.data_publicacao, RolRevisao.data_download, type_=DateTime)
+
+
+def register_fingerprints(session, df):
+    """
+    Compara as impressões digitais do DataFrame com o índice persistente
+    e registra as novas. Retorna um dicionário com as contagens de linhas
+    novas e de linhas já vistas em revisões anteriores
+    """
+    if FINGERPRINT_COLUMN not in df.columns:
+        df = add_row_fingerprint(df)
+
+    fingerprints = set(int(fp) for fp in df[FINGERPRINT_COLUMN].unique())
+
+    # Busca no índice (chave primária) apenas as impressões digitais do lote
+    seen = set()
+    pending = list(fingerprints)
+    for start in range(0, len(pending), FINGERPRINT_CHUNK_SIZE):
+        chunk = pending[start:start + FINGERPRINT_CHUNK_SIZE]
+        rows = session.query(RowFingerprint.fingerprint) \
+            .filter(RowFingerprint.fingerprint.in_(chunk)).all()
+        seen.update(row[0] for row in rows)
+
+    new_fingerprints = fingerprints - seen
+    if new_fingerprints:
+        session.bulk_insert_mappings(RowFingerprint,
+                                     [{'fingerprint': fp} for fp in new_fingerprints])
+
+    is_seen = df[FINGERPRINT_COLUMN].isin(seen)
+    counts = {'novas': int((~is_seen).sum()), 'vistas': int(is_seen.sum())}
+    logger.info(f"Linhas novas: {counts['novas']} | Linhas já vistas em revisões anteriores: {counts['vistas']}")
+
+    return counts
+
+
+def setup_search_index(engine):
+    """
+    Cria o índice de busca textual (FTS5) sobre os procedimentos, insensível
+    a acentos, e os gatilhos que o mantêm sincronizado com rol_procedimentos
+    Retorna True se o índice estiver disponível (apenas SQLite)
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'new.{c}' for c in SEARCH_COLUMNS)
+    old_values = ', '.join(f'old.{c}' for c in SEARCH_COLUMNS)
+
+    with engine.begin() as conn:
+        exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+                              {'name': SEARCH_TABLE}).first()
+        if exists:
+            return True
+
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5({columns}, "
+            f"content='rol_procedimentos', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')"))
+
+        conn.execute(text(
+            f"CREATE TRIGGER {SEARCH_TABLE}_ai AFTER INSERT ON rol_procedimentos BEGIN "
+            f"INSERT INTO {SEARCH_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"))
+        conn.execute(text(
+            f"CREATE TRIGGER {SEARCH_TABLE}_ad AFTER DELETE ON rol_procedimentos BEGIN "
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); END"))
+        conn.execute(text(
+            f"CREATE TRIGGER {SEARCH_TABLE}_au AFTER UPDATE ON rol_procedimentos BEGIN "
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {SEARCH_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"))
+
+        # Indexa os registros que já existiam antes da criação do índice
+        conn.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+
+    logger.info("Índice de busca textual dos procedimentos criado")
+    return True
+
+
+def _build_match_query(query):
+    """Converte o texto livre em uma consulta FTS5 (todos os termos, por prefixo)"""
+    terms = re.findall(r'\w+', str(query))
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _build_filters(filters, params):
+    """Monta as condições SQL dos filtros (valor exato, lista de valores ou True = coberto)"""
+    conditions = []
+
+    for i, (column, value) in enumerate((filters or {}).items()):
+        column = column.lower()
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Filtro inválido: {column}")
+
+        if value is True:
+            conditions.append(f"r.{column} IS NOT NULL AND r.{column} NOT IN "
+                              f"({', '.join(repr(v) for v in EMPTY_VALUES)})")
+        elif isinstance(value, (list, tuple, set)):
+            names = []
+            for j, item in enumerate(value):
+                params[f'f{i}_{j}'] = item
+                names.append(f':f{i}_{j}')
+            conditions.append(f"r.{column} IN ({', '.join(names) or 'NULL'})")
+        else:
+            params[f'f{i}'] = value
+            conditions.append(f"r.{column} = :f{i}")
+
+    return conditions
+
+
+def search_procedures(query, limit=20, filters=None):
+    """
+    Busca procedimentos pelo nome (sem diferenciar acentos e maiúsculas)
+    Retorna um DataFrame ordenado por relevância (coluna rank, menor é melhor)
+    ou None em caso de erro
+    """
+    engine = setup_database()
+    if not engine:
+        logger.error("Não foi possível configurar o banco de dados")
+        return None
+
+    try:
+        params = {'limit': int(limit)}
+        conditions = _build_filters(filters, params)
+        match_query = _build_match_query(query)
+
+        if not match_query:
+            return pd.DataFrame()
+
+        if setup_search_index(engine):
+            params['match'] = match_query
+            where = ' AND '.join([f"{SEARCH_TABLE} MATCH :match", "r.valid_to IS NULL"] + conditions)
+            sql = (f"SELECT r.*, bm25({SEARCH_TABLE}, 10.0, 1.0, 1.0, 1.0) AS rank "
+                   f"FROM {SEARCH_TABLE} JOIN rol_procedimentos r ON r.id = {SEARCH_TABLE}.rowid "
+                   f"WHERE {where} ORDER BY rank LIMIT :limit")
+        else:
+            # Sem FTS5 (ex.: MySQL): busca por LIKE em cada termo
+            for i, term in enumerate(re.findall(r'\w+', str(query))):
+                params[f't{i}'] = f'%{term}%'
+                conditions.append(f"r.procedimento LIKE :t{i}")
+            sql = (f"SELECT r.*, 0 AS rank FROM rol_procedimentos r "
+                   f"WHERE {' AND '.join(['r.valid_to IS NULL'] + conditions)} "
+                   f"ORDER BY r.procedimento LIMIT :limit")
+
+        with engine.connect() as conn:
+            result = pd.read_sql_query(text(sql), conn, params=params)
+
+        logger.info(f"Busca por '{query}': {len(result)} procedimentos encontrados")
+        return result
+
+    except Exception as e:
+        logger.error(f"Erro ao buscar procedimentos: {str(e)}")
+        return None
+
+
+def _covered_sql(column):
+    """Expressão SQL verdadeira quando o segmento da coluna cobre o procedimento"""
+    empty = ', '.join(repr(v) for v in EMPTY_VALUES)
+    return f"{column} IS NOT NULL AND {column} NOT IN ({empty})"
+
+
+def refresh_coverage_summary(session):
+    """
+    Recalcula o agregado materializado rol_cobertura_resumo a partir de
+    rol_procedimentos vigentes (um GROUP BY por nível da hierarquia)
+    """
+    table = RolCoberturaResumo.__tablename__
+    counts = ', '.join(f"SUM(CASE WHEN {_covered_sql(c)} THEN 1 ELSE 0 END)" for c in SEGMENT_COLUMNS)
+    target = ', '.join(['nivel'] + HIERARCHY_COLUMNS + ['total'] + SEGMENT_COLUMNS)
+
+    session.execute(text(f"DELETE FROM {table}"))
+
+    for depth, level in enumerate(HIERARCHY_COLUMNS, start=1):
+        keys = HIERARCHY_COLUMNS[:depth]
+        selected = ', '.join(keys + ['NULL'] * (len(HIERARCHY_COLUMNS) - depth))
+        session.execute(text(
+            f"INSERT INTO {table} ({target}) "
+            f"SELECT '{level}', {selected}, COUNT(*), {counts} "
+            f"FROM rol_procedimentos WHERE valid_to IS NULL GROUP BY {', '.join(keys)}"))
+
+    logger.info("Resumo de cobertura por capítulo/grupo/subgrupo atualizado")
+
+
+def get_coverage_summary(nivel='capitulo', segmento=None, capitulo=None, grupo=None):
+    """
+    Lê o agregado de cobertura de um nível da hierarquia
+    Com segmento (ex.: 'HCO') retorna apenas a contagem desse segmento
+    Retorna um DataFrame ou None em caso de erro
+    """
+    nivel = nivel.lower()
+    if nivel not in HIERARCHY_COLUMNS:
+        raise ValueError(f"Nível inválido: {nivel}")
+    if segmento is not None and segmento.lower() not in SEGMENT_COLUMNS:
+        raise ValueError(f"Segmento inválido: {segmento}")
+
+    engine = setup_database()
+    if not engine:
+        logger.error("Não foi possível configurar o banco de dados")
+        return None
+
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    try:
+        keys = HIERARCHY_COLUMNS[:HIERARCHY_COLUMNS.index(nivel) + 1]
+        counts = [segmento.lower()] if segmento else ['total'] + SEGMENT_COLUMNS
+
+        query = session.query(*(getattr(RolCoberturaResumo, c) for c in keys + counts)) \
+            .filter(RolCoberturaResumo.nivel == nivel)
+        if capitulo is not None:
+            query = query.filter(RolCoberturaResumo.capitulo == capitulo)
+        if grupo is not None:
+            query = query.filter(RolCoberturaResumo.grupo == grupo)
+
+        return pd.DataFrame(query.order_by(*(getattr(RolCoberturaResumo, c) for c in keys)).all(),
+                            columns=keys + counts)
+
+    except Exception as e:
+        logger.error(f"Erro ao consultar resumo de cobertura: {str(e)}")
+        return None
+
+    finally:
+        session.close()
+
+
+def count_procedures_by_capitulo(segmento):
+    """Quantidade de procedimentos por capítulo cobertos pelo segmento (ex.: 'HCO')"""
+    return get_coverage_summary('capitulo', segmento=segmento)
+
+
+def list_grupos(capitulo):
+    """Lista os grupos de um capítulo"""
+    summary = get_coverage_summary('grupo', capitulo=capitulo)
+    return [] if summary is None else summary['grupo'].tolist()
+
+
+def list_subgrupos(grupo):
+    """Lista os subgrupos de um grupo"""
+    summary = get_coverage_summary('subgrupo', grupo=grupo)
+    return [] if summary is None else summary['subgrupo'].tolist()
+
+
+def _content_hash(df):
+    """Hash do conteúdo do DataFrame (impressões digitais ordenadas), usado sem PDF de origem"""
+    fingerprints = np.sort(df[FINGERPRINT_COLUMN].to_numpy())
+    return hashlib.sha256(fingerprints.tobytes()).hexdigest()
+
+
+def resolve_revision(session, as_of=None):
+    """
+    Retorna o id da revisão vigente em as_of: um id de revisão (inteiro ou
+    texto só com dígitos) ou uma data (a última revisão publicada até essa
+    data: a de maior id entre as datadas até as_of, pois os intervalos de
+    validade seguem a ordem de carga). Sem as_of, a mais recente
+    """
+    if isinstance(as_of, str) and as_of.strip().isdigit():
+        as_of = int(as_of)
+    if isinstance(as_of, numbers.Integral) and not isinstance(as_of, bool):
+        return session.query(RolRevisao.id).filter(RolRevisao.id == int(as_of)).scalar()
+
+    query = session.query(RolRevisao.id)
+    if as_of is not None:
+        as_of = pd.Timestamp(as_of)
+        # Datas sem horário incluem o dia inteiro
+        if as_of == as_of.normalize():
+            as_of = as_of + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+        query = query.filter(revision_date() <= as_of.to_pydatetime())
+
+    return query.order_by(RolRevisao.id.desc()).limit(1).scalar()
+
+
+def _to_records(df):
+    """Converte o DataFrame do Rol nos registros da tabela rol_procedimentos"""
+    records = pd.DataFrame({
+        attribute: df[column] if column in df.columns else None
+        for column, attribute in COLUMN_MAPPING.items()
+    }, index=df.index)
+    records = records.astype(object).where(records.notna(), None)
+    records['fingerprint'] = df[FINGERPRINT_COLUMN].astype('int64').to_numpy()
+    return records.to_dict('records')
+
+
+def prepare_revision(df, revision=None):
+    """
+    Prepara uma revisão para save_prepared_revision sem acessar o banco (só
+    pandas): impressões digitais, linhas repetidas, informações da revisão e
+    registros de rol_procedimentos. A versão assíncrona a executa em uma thread,
+    fora do event loop
+    """
+    if FINGERPRINT_COLUMN not in df.columns:
+        df = add_row_fingerprint(df)
+    df = df[~df[FINGERPRINT_COLUMN].duplicated()]
+
+    revision = dict(revision or {})
+    revision.setdefault('pdf_hash', _content_hash(df))
+    revision.setdefault('data_download', datetime.now())
+
+    return {'df': df, 'revision': revision, 'records': _to_records(df)}
+
+
+def save_revision(session, df, revision=None):
+    """
+    Grava uma revisão do Rol na sessão, sem commit (ver save_prepared_revision)
+    revision é o dicionário de build_revision_info (hash do PDF, URL, ETag,
+    datas do download e de publicação)
+    Retorna o id da revisão (a existente, se o PDF já foi carregado)
+    """
+    return save_prepared_revision(session, prepare_revision(df, revision))
+
+
+def save_prepared_revision(session, prepared):
+    """
+    Grava na sessão, sem commit, uma revisão preparada por prepare_revision
+    (usado pela versão síncrona e, via run_sync, pela assíncrona)
+    Apenas as linhas novas são inseridas (valid_from = revisão) e as linhas
+    que deixaram de existir são encerradas (valid_to = revisão); as inalteradas
+    não são regravadas
+    Retorna o id da revisão (a existente, se o PDF já foi carregado)
+    Gera ValueError para uma revisão anterior à última carregada
+    """
+    df, revision, records = prepared['df'], prepared['revision'], prepared['records']
+
+    existing = session.query(RolRevisao).filter(RolRevisao.pdf_hash == revision['pdf_hash']).first()
+    if existing:
+        logger.info(f"Revisão já carregada (id {existing.id}, hash {existing.pdf_hash[:12]}). Nada a fazer.")
+        return existing.id
+
+    # Os intervalos de validade seguem a ordem dos ids: uma revisão publicada antes
+    # da última carregada tornaria vigente um Rol desatualizado. Só datas de
+    # publicação são comparadas; a data do download (ou da carga) não indica a
+    # idade do Rol e, sem publicação, vale a ordem de carga
+    published = revision.get('data_publicacao')
+    latest = session.query(func.max(RolRevisao.data_publicacao)).scalar()
+    if published is not None and latest is not None and published < latest:
+        raise ValueError(f"Revisão publicada em {published:%Y-%m-%d} é anterior à última carregada "
+                         f"({latest:%Y-%m-%d}): as revisões devem ser carregadas em ordem cronológica")
+
+    rol_revisao = RolRevisao(total_registros=len(df), **revision)
+    session.add(rol_revisao)
+    session.flush()
+
+    # Linhas vigentes antes desta revisão
+    current = dict(session.query(RolProcedimento.fingerprint, RolProcedimento.id)
+                   .filter(RolProcedimento.valid_to.is_(None)).all())
+
+    # Encerra as linhas que não existem mais na nova revisão
+    new_fingerprints = {record['fingerprint'] for record in records}
+    closed_ids = [row_id for fp, row_id in current.items() if fp not in new_fingerprints]
+    for start in range(0, len(closed_ids), FINGERPRINT_CHUNK_SIZE):
+        session.query(RolProcedimento) \
+            .filter(RolProcedimento.id.in_(closed_ids[start:start + FINGERPRINT_CHUNK_SIZE])) \
+            .update({RolProcedimento.valid_to: rol_revisao.id}, synchronize_session=False)
+
+    # Insere apenas as linhas novas
+    records = [{**record, 'valid_from': rol_revisao.id} for record in records if record['fingerprint'] not in current]
+
+    total_rows = len(records)
+    logger.info(f"Revisão {rol_revisao.id}: {total_rows} registros novos, "
+                f"{len(closed_ids)} encerrados, {len(df) - total_rows} inalterados")
+
+    for start in range(0, total_rows, INSERT_CHUNK_SIZE):
+        session.execute(insert(RolProcedimento), records[start:start + INSERT_CHUNK_SIZE])
+        logger.info(f"Inseridos {min(start + INSERT_CHUNK_SIZE, total_rows)}/{total_rows} registros")
+
+    # Atualiza o índice persistente de impressões digitais e guarda as contagens na revisão
+    counts = register_fingerprints(session, df)
+    rol_revisao.linhas_novas = counts['novas']
+    rol_revisao.linhas_vistas = counts['vistas']
+
+    # Atualiza o agregado de cobertura usado pelos painéis
+    session.flush()
+    refresh_coverage_summary(session)
+
+    return rol_revisao.id
+
+
+def backfill_legacy_rows(engine):
+    """
+    Associa as linhas gravadas antes do controle de revisões (sem impressão
+    digital e sem valid_from) a uma revisão "legado", calculando as impressões
+    digitais, para que a próxima carga encerre apenas as linhas que mudaram
+    Se já existem revisões, essas linhas foram substituídas por elas e recebem
+    um intervalo vazio. Linhas repetidas também recebem um intervalo vazio
+    Retorna a quantidade de linhas atualizadas
+    """
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    try:
+        columns = [RolProcedimento.id] + [getattr(RolProcedimento, c) for c in COLUMN_MAPPING.values()]
+        legacy = pd.read_sql(session.query(*columns).filter(RolProcedimento.valid_from.is_(None)).statement,
+                             session.connection())
+        if legacy.empty:
+            return 0
+
+        df = add_row_fingerprint(legacy.rename(columns={a: c for c, a in COLUMN_MAPPING.items()}))
+
+        first_revision = session.query(func.min(RolRevisao.id)).scalar()
+        if first_revision is None:
+            revision = RolRevisao(pdf_hash=f"legado-{_content_hash(df)}", data_download=LEGACY_REVISION_DATE,
+                                  total_registros=len(df))
+            session.add(revision)
+            session.flush()
+            valid_from = revision.id
+            closed = df[FINGERPRINT_COLUMN].duplicated().to_numpy()
+        else:
+            valid_from = first_revision
+            closed = np.ones(len(df), dtype=bool)
+            logger.warning(f"{len(df)} linhas anteriores à revisão {first_revision} não podem mais ser "
+                           f"consultadas por data e foram encerradas")
+
+        records = pd.DataFrame({
+            'id': df['id'].astype('int64'),
+            'fingerprint': df[FINGERPRINT_COLUMN].astype('int64'),
+            'valid_from': valid_from,
+            'valid_to': np.where(closed, valid_from, None),
+        }).to_dict('records')
+        session.execute(update(RolProcedimento), records)
+
+        session.flush()
+        refresh_coverage_summary(session)
+        session.commit()
+
+        logger.info(f"{len(records)} linhas anteriores ao controle de revisões associadas à revisão {valid_from}")
+        return len(records)
+
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Erro ao associar as linhas antigas a uma revisão: {str(e)}")
+        return 0
+
+    finally:
+        session.close()
+
+
+# Funções chamadas após o commit de uma nova revisão (ex.: invalidação de caches)
+_revision_listeners = []
+
+
+def on_revision_saved(callback):
+    """Registra uma função chamada com o id da revisão sempre que uma revisão é gravada"""
+    _revision_listeners.append(callback)
+    return callback
+
+
+def notify_revision_saved(revision_id):
+    """Avisa os interessados que uma revisão foi gravada no banco"""
+    for callback in _revision_listeners:
+        try:
+            callback(revision_id)
+        except Exception as e:
+            logger.warning(f"Erro ao notificar a gravação da revisão: {str(e)}")
+
+
+def save_to_database(df, revision=None):
+    """
+    Salva uma revisão do Rol no banco de dados (ver save_revision)
+    Retorna True em caso de sucesso
+    """
+    engine = setup_database()
+    if not engine:
+        logger.error("Não foi possível configurar o banco de dados")
+        return False
+
+    # Garante o índice de busca antes da inserção (sincronizado por gatilhos)
+    setup_search_index(engine)
+
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    try:
+        revision_id = save_revision(session, df, revision)
+
+        # Commit único: a revisão é gravada por inteiro ou não é gravada
+        session.commit()
+        notify_revision_saved(revision_id)
+        logger.info("Revisão gravada no banco de dados")
+        return True
+
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Erro ao inserir dados no banco de dados: {str(e)}")
+        return False
+
+    finally:
+        session.close()
+
+
+def _query_filters(filters):
+    """Condições do ORM para os filtros (valor exato, lista de valores ou True = coberto)"""
+    conditions = []
+
+    for column, value in (filters or {}).items():
+        column = column.lower()
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Filtro inválido: {column}")
+
+        attribute = getattr(RolProcedimento, column)
+        if value is True:
+            conditions.append(attribute.isnot(None))
+            conditions.append(attribute.notin_(EMPTY_VALUES))
+        elif isinstance(value, (list, tuple, set)):
+            conditions.append(attribute.in_(list(value)))
+        else:
+            conditions.append(attribute == value)
+
+    return conditions
+
+
+def revision_exists(pdf_hash):
+    """
+    Indica se a revisão do PDF com esse hash está gravada no banco atual
+    (usado para validar o checkpoint da carga após reset ou troca de DB_URL)
+    """
+    engine = setup_database()
+    if not engine:
+        return False
+
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    try:
+        return session.query(RolRevisao.id).filter(RolRevisao.pdf_hash == pdf_hash).first() is not None
+    except Exception as e:
+        logger.error(f"Erro ao consultar a revisão no banco de dados: {str(e)}")
+        return False
+    finally:
+        session.close()
+
+
+def get_revision(pdf_hash=None):
+    """
+    Informações de uma revisão gravada (a do PDF com esse hash ou, sem hash,
+    a última): id, hash, datas, total de registros e linhas novas/já vistas
+    Retorna um dicionário ou None
+    """
+    engine = setup_database()
+    if not engine:
+        return None
+
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    try:
+        query = session.query(RolRevisao)
+        if pdf_hash is not None:
+            query = query.filter(RolRevisao.pdf_hash == pdf_hash)
+        rol_revisao = query.order_by(RolRevisao.id.desc()).first()
+        if rol_revisao is None:
+            return None
+
+        return {column.name: getattr(rol_revisao, column.name) for column in RolRevisao.__table__.columns}
+    except Exception as e:
+        logger.error(f"Erro ao consultar a revisão no banco de dados: {str(e)}")
+        return None
+    finally:
+        session.close()
+
+
+def current_revision_id(session):
+    """Id da última revisão gravada (a que define as linhas vigentes) ou None"""
+    return session.query(func.max(RolRevisao.id)).scalar()
+
+
+def query_database(as_of=None, filters=None):
+    """
+    Recupera os registros de uma revisão do banco de dados
+    as_of pode ser o id de uma revisão ou uma data ("o que o Rol dizia na data X");
+    sem as_of, retorna os registros vigentes
+    filters restringe as linhas como em search_procedures (ex.: {'pac': True})
+    """
+    engine = setup_database()
+    if not engine:
+        logger.error("Não foi possível configurar o banco de dados")
+        return None
+
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    try:
+        columns = [RolProcedimento.id] + [getattr(RolProcedimento, c) for c in COLUMN_MAPPING.values()]
+        query = session.query(*columns)
+
+        if as_of is None:
+            query = query.filter(RolProcedimento.valid_to.is_(None))
+        else:
+            revision_id = resolve_revision(session, as_of)
+            if revision_id is None:
+                logger.warning(f"Nenhuma revisão do Rol encontrada para {as_of}")
+                return pd.DataFrame(columns=[c.key for c in columns])
+
+            # Predicado de intervalo: valid_from <= revisão < valid_to
+            query = query.filter(RolProcedimento.valid_from <= revision_id,
+                                 or_(RolProcedimento.valid_to.is_(None),
+                                     RolProcedimento.valid_to > revision_id))
+
+        query = query.filter(*_query_filters(filters))
+        dados = pd.read_sql(query.order_by(RolProcedimento.id).statement, session.connection())
+        logger.info(f"Recuperados {len(dados)} registros do banco de dados")
+
+        return dados
+
+    except Exception as e:
+        logger.error(f"Erro ao consultar banco de dados: {str(e)}")
+        return None
+
+    finally:
+        session.close()
+
+
+def link_dut_procedures(session):
+    """
+    Vincula as diretrizes aos procedimentos vigentes do Rol com a coluna DUT
+    preenchida: pelo número da diretriz quando a coluna traz o número, senão
+    pelo nome normalizado do procedimento
+    """
+    from utils.matcher import normalize_names
+
+    rol = pd.read_sql(session.query(RolProcedimento.id, RolProcedimento.procedimento, RolProcedimento.dut)
+                      .filter(RolProcedimento.valid_to.is_(None))
+                      .filter(text(_covered_sql('dut'))).statement, session.connection())
+    dut = pd.read_sql(session.query(DutDiretriz.id, DutDiretriz.numero, DutDiretriz.procedimento_normalizado)
+                      .statement, session.connection())
+
+    rol['numero'] = pd.to_numeric(rol['dut'].astype(str).str.extract(r'^\s*(\d+)\s*$')[0], errors='coerce')
+    rol['procedimento_normalizado'] = normalize_names(rol['procedimento']).to_numpy()
+
+    by_number = rol.dropna(subset=['numero']).astype({'numero': 'int64'}) \
+        .merge(dut[['id', 'numero']], on='numero', suffixes=('', '_dut'))
+    by_name = rol[rol['numero'].isna()] \
+        .merge(dut[['id', 'procedimento_normalizado']], on='procedimento_normalizado', suffixes=('', '_dut'))
+
+    links = pd.concat([by_number, by_name])[['id_dut', 'id']].drop_duplicates()
+    links.columns = ['dut_id', 'rol_procedimento_id']
+
+    session.query(DutProcedimento).delete()
+    if not links.empty:
+        session.execute(insert(DutProcedimento), links.astype(int).to_dict('records'))
+
+    logger.info(f"{len(links)} vínculos entre diretrizes e procedimentos do Rol")
+    return len(links)
+
+
+def save_dut_to_database(dut_df):
+    """
+    Substitui as diretrizes de utilização gravadas pelas do DataFrame
+    (colunas NUMERO, PROCEDIMENTO, CRITERIOS) e refaz os vínculos com o Rol
+    """
+    from utils.matcher import normalize_names
+
+    engine = setup_database()
+    if not engine:
+        logger.error("Não foi possível configurar o banco de dados")
+        return False
+
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    try:
+        records = pd.DataFrame({
+            'numero': dut_df['NUMERO'].astype(int),
+            'procedimento': dut_df['PROCEDIMENTO'],
+            'procedimento_normalizado': normalize_names(dut_df['PROCEDIMENTO']).to_numpy(),
+            'criterios': dut_df['CRITERIOS'],
+        }).to_dict('records')
+
+        session.query(DutProcedimento).delete()
+        session.query(DutDiretriz).delete()
+        for start in range(0, len(records), INSERT_CHUNK_SIZE):
+            session.execute(insert(DutDiretriz), records[start:start + INSERT_CHUNK_SIZE])
+
+        link_dut_procedures(session)
+
+        session.commit()
+        logger.info(f"Inserção concluída: {len(records)} diretrizes de utilização")
+        return True
+
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Erro ao inserir diretrizes no banco de dados: {str(e)}")
+        return False
+
+    finally:
+        session.close()
+
+
+def find_dut(numero=None, procedimento=None, rol_procedimento_id=None):
+    """
+    Busca diretrizes de utilização pelo número, pelo nome do procedimento
+    (normalizado) ou pelo id de um procedimento do Rol
+    Retorna um DataFrame ou None em caso de erro
+    """
+    from utils.matcher import normalize_names
+
+    engine = setup_database()
+    if not engine:
+        logger.error("Não foi possível configurar o banco de dados")
+        return None
+
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    try:
+        query = session.query(DutDiretriz.id, DutDiretriz.numero, DutDiretriz.procedimento, DutDiretriz.criterios)
+        if numero is not None:
+            query = query.filter(DutDiretriz.numero == int(numero))
+        if procedimento is not None:
+            normalized = normalize_names([procedimento]).iloc[0]
+            query = query.filter(DutDiretriz.procedimento_normalizado == normalized)
+        if rol_procedimento_id is not None:
+            query = query.join(DutProcedimento, DutProcedimento.dut_id == DutDiretriz.id) \
+                .filter(DutProcedimento.rol_procedimento_id == rol_procedimento_id)
+
+        return pd.read_sql(query.order_by(DutDiretriz.numero).statement, session.connection())
+
+    except Exception as e:
+        logger.error(f"Erro ao consultar diretrizes de utilização: {str(e)}")
+        return None
+
+    finally:
+        session.close()
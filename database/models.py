@@ -1,112 +1,303 @@
-import pandas as pd
-from sqlalchemy.orm import sessionmaker
 import logging
+import threading
+from datetime import datetime
+from functools import lru_cache
 
-from database.models import setup_database, RolProcedimento
+from sqlalchemy import create_engine, event, inspect, Column, String, Text, Integer, SmallInteger, BigInteger, DateTime, \
+    ForeignKey, Index, text
+from sqlalchemy.orm import declarative_base
+
+from config.settings import DB_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, \
+    SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE
 
 logger = logging.getLogger(__name__)
 
+Base = declarative_base()
 
-def save_to_database(df):
-    """Salva os dados do DataFrame no banco de dados"""
-    engine = setup_database()
-    if not engine:
-        logger.error("Não foi possível configurar o banco de dados")
-        return False
+# URLs cujo esquema já foi criado neste processo
+_schema_ready = set()
+_schema_lock = threading.Lock()
 
-    Session = sessionmaker(bind=engine)
-    session = Session()
+# Colunas de segmentação (cobertura) e da hierarquia do Rol
+SEGMENT_COLUMNS = ['od', 'amb', 'hco', 'hso', 'ref', 'pac', 'dut']
+COVERAGE_SEGMENTS = ['od', 'amb', 'hco', 'hso', 'ref']
+HIERARCHY_COLUMNS = ['capitulo', 'grupo', 'subgrupo']
 
-    try:
-        # Conta linhas no DataFrame
-        total_rows = len(df)
-        logger.info(f"Iniciando inserção de {total_rows} registros no banco de dados")
-
-        # Contador para log de progresso
-        inserted_count = 0
-
-        # Percorre cada linha do DataFrame
-        for index, row in df.iterrows():
-            # Cria novo objeto RolProcedimento
-            rol = RolProcedimento(
-                procedimento=str(row.get('PROCEDIMENTO', '')),
-                rn=str(row.get('RN', '')),
-                vigencia=str(row.get('VIGÊNCIA', '')),
-                od=str(row.get('OD', '')),
-                amb=str(row.get('AMB', '')),
-                hco=str(row.get('HCO', '')),
-                hso=str(row.get('HSO', '')),
-                ref=str(row.get('REF', '')),
-                pac=str(row.get('PAC', '')),
-                dut=str(row.get('DUT', '')),
-                subgrupo=str(row.get('SUBGRUPO', '')),
-                grupo=str(row.get('GRUPO', '')),
-                capitulo=str(row.get('CAPÍTULO', ''))
-            )
-
-            # Adiciona à sessão
-            session.add(rol)
-
-            # A cada 100 registros, faz commit e log
-            inserted_count += 1
-            if inserted_count % 100 == 0:
-                session.commit()
-                logger.info(f"Inseridos {inserted_count}/{total_rows} registros")
-
-        # Commit final
-        session.commit()
-        logger.info(f"Inserção concluída: {inserted_count} registros inseridos no banco de dados")
-        return True
+# Bit de cada segmento na máscara do esquema normalizado
+SEGMENT_BITS = {segment: 1 << i for i, segment in enumerate(SEGMENT_COLUMNS)}
 
-    except Exception as e:
-        session.rollback()
-        logger.error(f"Erro ao inserir dados no banco de dados: {str(e)}")
-        return False
 
-    finally:
-        session.close()
+class RolRevisao(Base):
+    """
+    Registro de cada revisão do Rol carregada (PDF de origem e download)
+    A data da revisão é a de publicação ou, sem ela, a do download; as
+    revisões com data de publicação são carregadas em ordem cronológica
+    (os ids crescem com a publicação)
+    """
+    __tablename__ = 'rol_revisoes'
 
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    pdf_hash = Column(String(64), nullable=False, unique=True)
+    pdf_path = Column(String(500))
+    url = Column(String(1000))
+    etag = Column(String(200))
+    data_download = Column(DateTime, nullable=False, index=True)
+    # Data de publicação do PDF (Last-Modified do servidor), quando conhecida
+    data_publicacao = Column(DateTime, index=True)
+    criado_em = Column(DateTime, default=datetime.now)
+    total_registros = Column(Integer)
+    # Linhas da revisão ainda não vistas e já vistas em revisões anteriores (register_fingerprints)
+    linhas_novas = Column(Integer)
+    linhas_vistas = Column(Integer)
 
-def query_database():
-    """Recupera todos os registros do banco de dados"""
-    engine = setup_database()
-    if not engine:
-        logger.error("Não foi possível configurar o banco de dados")
-        return None
 
-    Session = sessionmaker(bind=engine)
-    session = Session()
+class RolProcedimento(Base):
+    """
+    Modelo para a tabela de procedimentos do Rol
+    Cada linha vale da revisão valid_from até a revisão anterior a valid_to
+    (valid_to nulo = linha vigente), de modo que procedimentos inalterados
+    não são regravados a cada revisão
+    """
+    __tablename__ = 'rol_procedimentos'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    procedimento = Column(String(500))
+    rn = Column(String(100))
+    vigencia = Column(String(100))
+    od = Column(String(100))
+    amb = Column(String(100))
+    hco = Column(String(100))
+    hso = Column(String(100))
+    ref = Column(String(100))
+    pac = Column(String(100))
+    dut = Column(String(100))
+    subgrupo = Column(String(200))
+    grupo = Column(String(200))
+    capitulo = Column(String(200))
+    fingerprint = Column(BigInteger)
+    valid_from = Column(Integer, ForeignKey('rol_revisoes.id'))
+    valid_to = Column(Integer, ForeignKey('rol_revisoes.id'))
+
+    __table_args__ = (
+        Index('ix_rol_validade', 'valid_to', 'valid_from'),
+        Index('ix_rol_fingerprint', 'fingerprint', 'valid_to'),
+        Index('ix_rol_hierarquia', 'capitulo', 'grupo', 'subgrupo'),
+        *(Index(f'ix_rol_{segment}', segment, 'capitulo', 'grupo') for segment in COVERAGE_SEGMENTS),
+    )
+
+
+class RolCoberturaResumo(Base):
+    """
+    Agregado materializado: quantidade de procedimentos por nível da hierarquia
+    (capítulo, grupo, subgrupo) e por segmento, atualizado a cada carga
+    """
+    __tablename__ = 'rol_cobertura_resumo'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    nivel = Column(String(20), nullable=False)
+    capitulo = Column(String(200))
+    grupo = Column(String(200))
+    subgrupo = Column(String(200))
+    total = Column(Integer, nullable=False, default=0)
+    od = Column(Integer, nullable=False, default=0)
+    amb = Column(Integer, nullable=False, default=0)
+    hco = Column(Integer, nullable=False, default=0)
+    hso = Column(Integer, nullable=False, default=0)
+    ref = Column(Integer, nullable=False, default=0)
+    pac = Column(Integer, nullable=False, default=0)
+    dut = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('ix_resumo_hierarquia', 'nivel', 'capitulo', 'grupo', 'subgrupo'),
+    )
+
+
+class DimCapitulo(Base):
+    """Dimensão de capítulos do esquema normalizado"""
+    __tablename__ = 'dim_capitulo'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    nome = Column(String(200), nullable=False, unique=True)
+
+
+class DimGrupo(Base):
+    """Dimensão de grupos do esquema normalizado"""
+    __tablename__ = 'dim_grupo'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    nome = Column(String(200), nullable=False, unique=True)
+
+
+class DimSubgrupo(Base):
+    """Dimensão de subgrupos do esquema normalizado"""
+    __tablename__ = 'dim_subgrupo'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    nome = Column(String(200), nullable=False, unique=True)
+
+
+class RolProcedimentoCompacto(Base):
+    """
+    Esquema normalizado (opcional) dos procedimentos: hierarquia em tabelas de
+    dimensão e a cobertura OD/AMB/HCO/HSO/REF/PAC/DUT em uma máscara de bits
+    A coluna dut guarda o valor original (o número da diretriz, quando o Rol o
+    traz), como em rol_procedimentos
+    As linhas têm o mesmo intervalo de validade de rol_procedimentos
+    """
+    __tablename__ = 'rol_procedimentos_compacto'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    procedimento = Column(String(500))
+    rn = Column(String(100))
+    vigencia = Column(String(100))
+    segmentos = Column(SmallInteger, nullable=False, default=0)
+    dut = Column(String(100))
+    capitulo_id = Column(Integer, ForeignKey('dim_capitulo.id'))
+    grupo_id = Column(Integer, ForeignKey('dim_grupo.id'))
+    subgrupo_id = Column(Integer, ForeignKey('dim_subgrupo.id'))
+    fingerprint = Column(BigInteger)
+    valid_from = Column(Integer, ForeignKey('rol_revisoes.id'))
+    valid_to = Column(Integer, ForeignKey('rol_revisoes.id'))
+
+    __table_args__ = (
+        Index('ix_compacto_hierarquia', 'capitulo_id', 'grupo_id', 'subgrupo_id'),
+        Index('ix_compacto_validade', 'valid_to', 'valid_from'),
+        Index('ix_compacto_fingerprint', 'fingerprint', 'valid_to'),
+    )
+
+
+class DutDiretriz(Base):
+    """Diretrizes de Utilização (Anexo II) extraídas do PDF"""
+    __tablename__ = 'dut_diretrizes'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    numero = Column(Integer, nullable=False, index=True)
+    procedimento = Column(String(500))
+    procedimento_normalizado = Column(String(500), index=True)
+    criterios = Column(Text)
+
 
+class DutProcedimento(Base):
+    """Vínculo entre as diretrizes e os procedimentos do Rol com DUT"""
+    __tablename__ = 'dut_procedimentos'
+
+    dut_id = Column(Integer, ForeignKey('dut_diretrizes.id'), primary_key=True)
+    rol_procedimento_id = Column(Integer, ForeignKey('rol_procedimentos.id'), primary_key=True, index=True)
+
+
+class RowFingerprint(Base):
+    """Índice persistente das impressões digitais (hash) das linhas já vistas"""
+    __tablename__ = 'rol_fingerprints'
+
+    # Hash de 64 bits das colunas normalizadas (armazenado com sinal)
+    fingerprint = Column(BigInteger, primary_key=True, autoincrement=False)
+    first_seen = Column(DateTime, default=datetime.now)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Aplica os pragmas de desempenho em cada nova conexão SQLite"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def get_engine(db_url=None):
+    """
+    Retorna o engine do banco de dados (um único por URL em cada processo)
+    SQLite recebe pragmas de desempenho; MySQL usa pool de conexões configurável
+    """
+    return _create_engine(db_url or DB_URL)
+
+
+@lru_cache(maxsize=None)
+def _create_engine(db_url):
+    """Cria o engine de uma URL; o cache garante uma única instância por processo"""
+    if db_url.startswith("sqlite"):
+        engine = create_engine(db_url)
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    else:
+        engine = create_engine(db_url,
+                               pool_size=DB_POOL_SIZE,
+                               max_overflow=DB_MAX_OVERFLOW,
+                               pool_recycle=DB_POOL_RECYCLE,
+                               pool_pre_ping=True)
+
+    return engine
+
+
+def async_db_url(db_url=None):
+    """Converte a URL do banco para o driver assíncrono (aiosqlite/aiomysql)"""
+    db_url = db_url or DB_URL
+    if db_url.startswith("sqlite:"):
+        return db_url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if db_url.startswith("mysql"):
+        return "mysql+aiomysql:" + db_url.split(":", 1)[1]
+    return db_url
+
+
+def create_async_db_engine(db_url=None):
+    """
+    Cria um engine assíncrono do SQLAlchemy para a URL do banco
+    As conexões ficam presas ao event loop, por isso o engine não é compartilhado
+    entre loops: quem cria deve chamar dispose() ao final
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = async_db_url(db_url)
+    if url.startswith("sqlite"):
+        engine = create_async_engine(url)
+        event.listen(engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    else:
+        engine = create_async_engine(url,
+                                     pool_size=DB_POOL_SIZE,
+                                     max_overflow=DB_MAX_OVERFLOW,
+                                     pool_recycle=DB_POOL_RECYCLE,
+                                     pool_pre_ping=True)
+
+    return engine
+
+
+def _add_missing_columns(engine, table):
+    """Adiciona a uma tabela existente as colunas novas do modelo (nulas)"""
+    existing = {c['name'] for c in inspect(engine).get_columns(table.name)}
+
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                logger.info(f"Coluna {column.name} adicionada à tabela {table.name}")
+
+
+def setup_database():
+    """Configura a conexão com o banco de dados e cria as tabelas (uma vez por processo)"""
     try:
-        # Recupera todos os registros
-        registros = session.query(RolProcedimento).all()
-        logger.info(f"Recuperados {len(registros)} registros do banco de dados")
-
-        # Converte para um DataFrame
-        dados = []
-        for r in registros:
-            dados.append({
-                'id': r.id,
-                'procedimento': r.procedimento,
-                'rn': r.rn,
-                'vigencia': r.vigencia,
-                'od': r.od,
-                'amb': r.amb,
-                'hco': r.hco,
-                'hso': r.hso,
-                'ref': r.ref,
-                'pac': r.pac,
-                'dut': r.dut,
-                'subgrupo': r.subgrupo,
-                'grupo': r.grupo,
-                'capitulo': r.capitulo
-            })
-
-        return pd.DataFrame(dados)
+        engine = get_engine()
+
+        with _schema_lock:
+            if DB_URL not in _schema_ready:
+                Base.metadata.create_all(engine)
+
+                # create_all não altera tabelas que já existiam
+                _add_missing_columns(engine, RolRevisao.__table__)
+                _add_missing_columns(engine, RolProcedimento.__table__)
+                for table in (RolRevisao.__table__, RolProcedimento.__table__):
+                    for index in table.indexes:
+                        index.create(engine, checkfirst=True)
+
+                # Linhas gravadas antes das revisões não têm impressão digital nem validade
+                from database.db_manager import backfill_legacy_rows
+                backfill_legacy_rows(engine)
+
+                _schema_ready.add(DB_URL)
+                logger.info(f"Banco de dados configurado com sucesso: {DB_URL}")
 
+        return engine
     except Exception as e:
-        logger.error(f"Erro ao consultar banco de dados: {str(e)}")
+        logger.error(f"Erro ao configurar banco de dados: {str(e)}")
         return None
 
-    finally:
-        session.close()
\ No newline at end of file
@@ -0,0 +1,240 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from config.settings import ABBREVIATIONS, FINGERPRINT_COLUMN
+from database.models import setup_database, RolProcedimento, RolProcedimentoCompacto, \
+    DimCapitulo, DimGrupo, DimSubgrupo, SEGMENT_COLUMNS, SEGMENT_BITS, _add_missing_columns
+from database.db_manager import current_revision_id
+from utils.fingerprint import add_row_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Visão de compatibilidade com o layout largo de rol_procedimentos
+COMPAT_VIEW = 'vw_rol_procedimentos'
+
+# Dimensão de cada coluna da hierarquia (coluna do DataFrame, coluna de FK, modelo)
+DIMENSIONS = [
+    ('CAPÍTULO', 'capitulo_id', DimCapitulo),
+    ('GRUPO', 'grupo_id', DimGrupo),
+    ('SUBGRUPO', 'subgrupo_id', DimSubgrupo),
+]
+
+# Valores sem cobertura no DataFrame ou na tabela larga
+EMPTY_VALUES = ['', 'None', 'nan', 'NaN']
+
+# Tamanho dos lotes de inserção em massa
+BULK_CHUNK_SIZE = 5000
+
+# Quantidade máxima de parâmetros por consulta IN (limite do SQLite)
+ID_CHUNK_SIZE = 500
+
+
+def setup_normalized_schema(engine):
+    """
+    Atualiza a tabela compacta criada por versões anteriores (colunas de
+    validade e índices) e cria a visão que apresenta o esquema normalizado
+    no layout largo atual
+    """
+    table = RolProcedimentoCompacto.__table__
+    _add_missing_columns(engine, table)
+    for index in table.indexes:
+        index.create(engine, checkfirst=True)
+
+    def covered(segment):
+        return f"CASE WHEN (c.segmentos & {SEGMENT_BITS[segment]}) <> 0 " \
+               f"THEN '{ABBREVIATIONS[segment.upper()]}' ELSE '' END"
+
+    # A DUT vem da coluna própria (número da diretriz); linhas gravadas antes dela só têm o bit
+    segments = ',\n'.join(f"COALESCE(c.dut, {covered(s)}) AS {s}" if s == 'dut' else f"{covered(s)} AS {s}"
+                           for s in SEGMENT_COLUMNS)
+
+    body = (f"SELECT c.id, c.procedimento, c.rn, c.vigencia,\n{segments},\n"
+            f"s.nome AS subgrupo, g.nome AS grupo, cap.nome AS capitulo,\n"
+            f"c.fingerprint, c.valid_from, c.valid_to\n"
+            f"FROM {RolProcedimentoCompacto.__tablename__} c\n"
+            f"LEFT JOIN {DimCapitulo.__tablename__} cap ON cap.id = c.capitulo_id\n"
+            f"LEFT JOIN {DimGrupo.__tablename__} g ON g.id = c.grupo_id\n"
+            f"LEFT JOIN {DimSubgrupo.__tablename__} s ON s.id = c.subgrupo_id")
+
+    with engine.begin() as conn:
+        # O SQLite não tem CREATE OR REPLACE VIEW: a visão é recriada
+        if engine.dialect.name == 'sqlite':
+            conn.execute(text(f"DROP VIEW IF EXISTS {COMPAT_VIEW}"))
+            conn.execute(text(f"CREATE VIEW {COMPAT_VIEW} AS {body}"))
+        else:
+            conn.execute(text(f"CREATE OR REPLACE VIEW {COMPAT_VIEW} AS {body}"))
+
+
+def segment_bitmask(df):
+    """Calcula a máscara de bits de cobertura de cada linha (vetorizado)"""
+    mask = np.zeros(len(df), dtype=np.int16)
+
+    for segment in SEGMENT_COLUMNS:
+        column = segment.upper()
+        if column not in df.columns:
+            continue
+        values = df[column]
+        covered = ~values.astype('string').fillna('').str.strip().isin(EMPTY_VALUES)
+        mask |= np.where(covered.to_numpy(), SEGMENT_BITS[segment], 0).astype(np.int16)
+
+    return mask
+
+
+def _dimension_ids(session, model, names):
+    """Garante que os nomes existem na dimensão e retorna o mapa nome -> id"""
+    names = [n for n in pd.unique(names) if n not in EMPTY_VALUES]
+
+    existing = dict(session.execute(select(model.nome, model.id)).all())
+    missing = [n for n in names if n not in existing]
+    if missing:
+        session.execute(insert(model), [{'nome': n} for n in missing])
+        existing = dict(session.execute(select(model.nome, model.id)).all())
+
+    return existing
+
+
+def bulk_load_normalized(df, revision_id=None, replace=True):
+    """
+    Carrega uma revisão do Rol no esquema normalizado em massa (dimensões por
+    factorização e cobertura como máscara de bits), com os mesmos intervalos
+    de validade de rol_procedimentos: as linhas inalteradas são mantidas, as
+    que deixaram de existir são encerradas e as novas são inseridas
+    revision_id é a revisão gravada por save_to_database (padrão: a vigente)
+    Com replace, uma carga repetida da mesma revisão substitui apenas as
+    linhas dessa revisão; o histórico das anteriores é preservado
+    Retorna True em caso de sucesso
+    """
+    engine = setup_database()
+    if not engine:
+        logger.error("Não foi possível configurar o banco de dados")
+        return False
+
+    setup_normalized_schema(engine)
+
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    try:
+        if revision_id is None:
+            revision_id = current_revision_id(session)
+        if revision_id is None:
+            logger.error("Nenhuma revisão do Rol gravada: execute save_to_database antes da carga normalizada")
+            return False
+
+        if FINGERPRINT_COLUMN not in df.columns:
+            df = add_row_fingerprint(df)
+        df = df[~df[FINGERPRINT_COLUMN].duplicated()]
+
+        if replace:
+            # Desfaz uma carga anterior desta revisão: remove as linhas inseridas e reabre as encerradas
+            session.query(RolProcedimentoCompacto) \
+                .filter(RolProcedimentoCompacto.valid_from == revision_id).delete(synchronize_session=False)
+            session.query(RolProcedimentoCompacto) \
+                .filter(RolProcedimentoCompacto.valid_to == revision_id) \
+                .update({RolProcedimentoCompacto.valid_to: None}, synchronize_session=False)
+
+        current = dict(session.query(RolProcedimentoCompacto.fingerprint, RolProcedimentoCompacto.id)
+                       .filter(RolProcedimentoCompacto.valid_to.is_(None)).all())
+
+        # Encerra as linhas que não existem mais nesta revisão
+        new_fingerprints = set(df[FINGERPRINT_COLUMN].tolist())
+        closed_ids = [row_id for fp, row_id in current.items() if fp not in new_fingerprints]
+        for start in range(0, len(closed_ids), ID_CHUNK_SIZE):
+            session.query(RolProcedimentoCompacto) \
+                .filter(RolProcedimentoCompacto.id.in_(closed_ids[start:start + ID_CHUNK_SIZE])) \
+                .update({RolProcedimentoCompacto.valid_to: revision_id}, synchronize_session=False)
+
+        # Apenas as linhas novas são inseridas
+        df = df[~df[FINGERPRINT_COLUMN].isin(list(current))]
+
+        records = pd.DataFrame({
+            'procedimento': df.get('PROCEDIMENTO', pd.Series(index=df.index, dtype=object)),
+            'rn': df.get('RN', pd.Series(index=df.index, dtype=object)),
+            'vigencia': df.get('VIGÊNCIA', pd.Series(index=df.index, dtype=object)),
+            'dut': df.get('DUT', pd.Series(index=df.index, dtype=object)),
+        }).astype(object).where(lambda d: d.notna(), None)
+        records['segmentos'] = segment_bitmask(df)
+
+        for column, fk, model in DIMENSIONS:
+            names = df[column].astype('string').fillna('').str.strip().astype(object) \
+                if column in df.columns else pd.Series('', index=df.index, dtype=object)
+            ids = _dimension_ids(session, model, names)
+            records[fk] = names.map(ids).astype('Int64').astype(object).where(lambda s: s.notna(), None)
+
+        records['fingerprint'] = df[FINGERPRINT_COLUMN].astype('int64').to_numpy()
+        records['valid_from'] = revision_id
+
+        rows = records.to_dict('records')
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            session.execute(insert(RolProcedimentoCompacto), rows[start:start + BULK_CHUNK_SIZE])
+
+        session.commit()
+        logger.info(f"Carga normalizada da revisão {revision_id}: {len(rows)} registros novos, "
+                    f"{len(closed_ids)} encerrados")
+        return True
+
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Erro na carga do esquema normalizado: {str(e)}")
+        return False
+
+    finally:
+        session.close()
+
+
+def _object_sizes(conn, dialect):
+    """Retorna o tamanho em disco (bytes) de cada tabela e índice"""
+    if dialect == 'sqlite':
+        rows = conn.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")).all()
+        return {name: int(size) for name, size in rows}
+
+    rows = conn.execute(text("SELECT table_name, data_length + index_length FROM information_schema.tables "
+                             "WHERE table_schema = DATABASE()")).all()
+    return {name: int(size or 0) for name, size in rows}
+
+
+def storage_report():
+    """
+    Compara o espaço em disco do layout largo (rol_procedimentos e seus índices)
+    com o do esquema normalizado (tabela compacta, dimensões e índices); as
+    duas tabelas guardam as mesmas colunas de validade e impressão digital
+    Retorna um DataFrame com os bytes de cada layout ou None em caso de erro
+    """
+    engine = setup_database()
+    if not engine:
+        logger.error("Não foi possível configurar o banco de dados")
+        return None
+
+    layouts = {
+        'largo': [RolProcedimento.__table__],
+        'normalizado': [RolProcedimentoCompacto.__table__] + [m.__table__ for _, _, m in DIMENSIONS],
+    }
+
+    try:
+        with engine.connect() as conn:
+            sizes = _object_sizes(conn, engine.dialect.name)
+
+        report = []
+        for layout, tables in layouts.items():
+            names = set()
+            for table in tables:
+                names.add(table.name)
+                names.update(index.name for index in table.indexes)
+                # Índices automáticos do SQLite (UNIQUE)
+                names.update(n for n in sizes if n.startswith(f"sqlite_autoindex_{table.name}_"))
+            report.append({'layout': layout, 'bytes': sum(sizes.get(n, 0) for n in names)})
+
+        report = pd.DataFrame(report)
+        wide, compact = report['bytes'].tolist()
+        if wide:
+            logger.info(f"Espaço em disco: largo {wide / 1024:.0f} KiB | normalizado {compact / 1024:.0f} KiB "
+                        f"| redução de {(1 - compact / wide):.1%}")
+        return report
+
+    except Exception as e:
+        logger.error(f"Erro ao gerar relatório de espaço em disco: {str(e)}")
+        return None
@@ -0,0 +1,198 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy.orm import sessionmaker
+
+from config.settings import QUERY_CACHE_MAX_MB, QUERY_CACHE_DISK, QUERY_CACHE_DIR
+from database.db_manager import query_database, resolve_revision, current_revision_id, on_revision_saved
+from database.models import setup_database, RolRevisao
+
+logger = logging.getLogger(__name__)
+
+
+def _freeze(value):
+    """Converte o valor de um filtro em uma forma imutável e canônica"""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(str(v) for v in value))
+    return value
+
+
+def cache_key(revision_id, filters=None, current=False, pdf_hash=None, database=None):
+    """
+    Chave do cache: (vigente ou revisão, banco, id e hash do PDF da revisão,
+    filtros normalizados). O banco e o hash distinguem revisões com o mesmo id
+    em outro DB_URL ou em um banco recriado (os ids recomeçam em 1)
+    """
+    frozen = tuple(sorted((column.lower(), _freeze(value)) for column, value in (filters or {}).items()))
+    return ('vigente' if current else 'revisao', database, revision_id, pdf_hash, frozen)
+
+
+class QueryCache:
+    """
+    Cache LRU de DataFrames limitado pelo tamanho em memória, com uma camada
+    opcional em disco (arquivos Arrow/Feather) que guarda todas as entradas e
+    recupera as despejadas da memória ou gravadas por execuções anteriores
+    """
+
+    def __init__(self, max_bytes=None, disk_dir=None):
+        self.max_bytes = max_bytes if max_bytes is not None else QUERY_CACHE_MAX_MB * 1024 * 1024
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def size_bytes(self):
+        return sum(self._sizes.values())
+
+    def _disk_path(self, key):
+        return self.disk_dir / f"{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()}.feather"
+
+    def get(self, key):
+        """Retorna uma cópia do DataFrame em cache ou None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._entries[key].copy()
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            if path.exists():
+                try:
+                    df = pd.read_feather(path)
+                    with self._lock:
+                        self.stats['disk_hits'] += 1
+                    self._store(key, df)
+                    return df.copy()
+                except Exception as e:
+                    logger.warning(f"Erro ao ler entrada do cache em disco: {str(e)}")
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, key, df):
+        """Guarda o DataFrame em memória e, se habilitado, no disco"""
+        if self.disk_dir:
+            path = self._disk_path(key)
+            tmp_path = path.with_name(path.name + '.tmp')
+            try:
+                df.reset_index(drop=True).to_feather(tmp_path)
+                tmp_path.replace(path)
+            except Exception as e:
+                logger.warning(f"Erro ao gravar entrada do cache em disco: {str(e)}")
+
+        self._store(key, df.copy())
+
+    def _store(self, key, df):
+        """Insere em memória e despeja as entradas menos usadas até caber no limite"""
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._entries[key] = df
+            self._sizes[key] = size
+            self._entries.move_to_end(key)
+
+            while self.size_bytes > self.max_bytes:
+                evicted, _ = self._entries.popitem(last=False)
+                del self._sizes[evicted]
+                self.stats['evictions'] += 1
+
+    def invalidate(self):
+        """Descarta todas as entradas do cache (em memória e em disco)"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.stats['invalidations'] += 1
+
+        if self.disk_dir:
+            for path in self.disk_dir.glob('*.feather'):
+                path.unlink(missing_ok=True)
+
+    def get_stats(self):
+        """Estatísticas de acertos e falhas, entradas e memória ocupada"""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['disk_hits'] + self.stats['misses']
+            hits = self.stats['hits'] + self.stats['disk_hits']
+            return {**self.stats,
+                    'entries': len(self._entries),
+                    'bytes': self.size_bytes,
+                    'hit_rate': hits / lookups if lookups else 0.0}
+
+
+# Cache padrão do processo
+_cache = QueryCache(disk_dir=QUERY_CACHE_DIR if QUERY_CACHE_DISK else None)
+
+
+@on_revision_saved
+def _invalidate_on_save(revision_id):
+    """Uma nova revisão muda as linhas vigentes: as consultas em cache são descartadas"""
+    _cache.invalidate()
+    logger.info(f"Cache de consultas invalidado (revisão {revision_id})")
+
+
+def _resolve_key(as_of, filters):
+    """
+    Resolve as_of para a revisão e monta a chave do cache
+    Retorna None se o banco não estiver disponível ou a revisão não existir
+    """
+    engine = setup_database()
+    if not engine:
+        return None
+
+    session = sessionmaker(bind=engine)()
+    try:
+        # Sem as_of, a última revisão gravada entra na chave: outro processo que
+        # grave uma revisão nova torna a entrada antiga inalcançável
+        revision_id = current_revision_id(session) if as_of is None else resolve_revision(session, as_of)
+        if revision_id is None:
+            return None
+
+        pdf_hash = session.query(RolRevisao.pdf_hash).filter(RolRevisao.id == revision_id).scalar()
+        return cache_key(revision_id, filters, current=as_of is None, pdf_hash=pdf_hash,
+                         database=engine.url.render_as_string(hide_password=True))
+    finally:
+        session.close()
+
+
+def cached_query(as_of=None, filters=None):
+    """
+    Versão com cache de query_database: mesmos parâmetros e retorno
+    Consultas repetidas da mesma revisão e filtros não acessam o banco
+    """
+    try:
+        key = _resolve_key(as_of, filters)
+    except Exception as e:
+        logger.error(f"Erro ao consultar banco de dados: {str(e)}")
+        return None
+
+    if key is not None:
+        df = _cache.get(key)
+        if df is not None:
+            return df
+
+    df = query_database(as_of=as_of, filters=filters)
+    if df is not None and key is not None:
+        _cache.put(key, df)
+    return df
+
+
+def cache_stats():
+    """Estatísticas do cache padrão de consultas"""
+    return _cache.get_stats()
+
+
+def clear_cache():
+    """Esvazia o cache padrão de consultas"""
+    _cache.invalidate()
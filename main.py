@@ -1,3 +1,4 @@
+import argparse
 import logging
 from pathlib import Path
 import sys
@@ -6,9 +7,13 @@ current_dir = Path(__file__).resolve().parent
 sys.path.append(str(current_dir))
 
 
-from utils import find_and_download_anexos, compress_files
-from utils import process_anexo_i
-from database.db_manager import save_to_database
+from utils.web_scraper import find_and_download_anexos, compress_files
+from utils.pdf_processor import extract_rol_tables, process_rol_tables, save_to_csv, create_output_zip, \
+    process_anexo_ii, peak_rss_mb
+from database.db_manager import save_to_database, revision_exists
+from utils.downloads import build_revision_info
+from utils.checkpoint import Checkpoints, STAGES, load_pickle, save_pickle, save_json
+from config.settings import DB_NORMALIZED_SCHEMA
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO,
@@ -21,44 +26,124 @@ logging.basicConfig(level=logging.INFO,
 logger = logging.getLogger(__name__)
 
 
-def main():
-    """Função principal do programa"""
+def main(force_stage=None):
+    """
+    Função principal do programa
+    Cada etapa grava um checkpoint; uma nova execução retoma da primeira etapa
+    incompleta ou invalidada (force_stage refaz a etapa indicada e as seguintes)
+    """
     logger.info("Iniciando o processo de extração e processamento dos dados da ANS")
 
+    checkpoints = Checkpoints()
+    checkpoints.start_run(force_stage)
+
     try:
         # =================== PARTE 1: WEB SCRAPING ===================
         logger.info("ETAPA 1: WEB SCRAPING")
 
-        # 1.1 Baixar os anexos do site da ANS
-        anexo_i_path, anexo_ii_path = find_and_download_anexos()
+        if checkpoints.is_valid('download'):
+            anexos = checkpoints.outputs('download')
+            anexo_i_path, anexo_ii_path = anexos['anexo_i'], anexos['anexo_ii']
+            logger.info("Anexos já baixados (checkpoint)")
+        else:
+            # 1.1 Baixar os anexos do site da ANS
+            anexo_i_path, anexo_ii_path = find_and_download_anexos()
 
-        if not anexo_i_path or not anexo_ii_path:
-            logger.error("Não foi possível baixar os anexos. Abortando.")
-            return False
+            if not anexo_i_path or not anexo_ii_path:
+                logger.error("Não foi possível baixar os anexos. Abortando.")
+                return False
 
-        # 1.2 Compactar os anexos em um único arquivo
-        anexos_zip = compress_files([anexo_i_path, anexo_ii_path])
-        if not anexos_zip:
-            logger.error("Não foi possível compactar os anexos. Continuando com a próxima etapa...")
+            # 1.2 Compactar os anexos em um único arquivo
+            anexos_zip = compress_files([anexo_i_path, anexo_ii_path])
+            if not anexos_zip:
+                logger.error("Não foi possível compactar os anexos. Continuando com a próxima etapa...")
+
+            checkpoints.complete('download', outputs={'anexo_i': anexo_i_path, 'anexo_ii': anexo_ii_path})
 
         # =================== PARTE 2: TRANSFORMAÇÃO DE DADOS ===================
         logger.info("ETAPA 2: TRANSFORMAÇÃO DE DADOS")
 
-        # 2.1 & 2.2 Extrair tabela do PDF e salvar como CSV
+        # 2.1 Extrair as tabelas do Rol do PDF
+        extract_inputs = {'anexo_i': checkpoints.output_hash('download', 'anexo_i')}
+        if checkpoints.is_valid('extract', extract_inputs):
+            # As tabelas só são lidas do checkpoint se a limpeza precisar ser refeita
+            rol_tables = None
+            logger.info("Tabelas do Rol já extraídas (checkpoint)")
+        else:
+            rol_tables = extract_rol_tables(anexo_i_path)
+            if not rol_tables:
+                logger.error("Nenhuma tabela do Rol encontrada no PDF. Abortando.")
+                return False
+
+            tables_path = save_pickle(rol_tables, checkpoints.path('tabelas_brutas.pkl'))
+            checkpoints.complete('extract', extract_inputs, {'tabelas': tables_path})
+
+        # 2.2 Limpar e unificar as tabelas e salvar como CSV
         # 2.4 Substituir abreviações por descrições completas
-        rol_df, csv_path, zip_path = process_anexo_i(anexo_i_path)
-
-        if not rol_df is not None:
-            logger.error("Não foi possível processar o PDF. Abortando.")
-            return False
+        clean_inputs = {'tabelas': checkpoints.output_hash('extract', 'tabelas')}
+        if checkpoints.is_valid('clean', clean_inputs):
+            rol_df = load_pickle(checkpoints.outputs('clean')['rol'])
+            logger.info(f"Rol limpo carregado do checkpoint: {len(rol_df)} registros")
+        else:
+            if rol_tables is None:
+                rol_tables = load_pickle(checkpoints.outputs('extract')['tabelas'])
+            rol_df = process_rol_tables(rol_tables)
+
+            if rol_df is None:
+                logger.error("Não foi possível processar o PDF. Abortando.")
+                return False
+
+            csv_path = save_to_csv(rol_df)
+            zip_path = create_output_zip(csv_path) if csv_path else None
+
+            rol_path = save_pickle(rol_df, checkpoints.path('rol_limpo.pkl'))
+            # CSV e ZIP publicados também são saídas: se forem apagados, a etapa é refeita
+            outputs = {'rol': rol_path, 'csv': csv_path, 'zip': zip_path}
+            checkpoints.complete('clean', clean_inputs, {name: path for name, path in outputs.items() if path})
 
         # 2.3 Salvar os dados no banco de dados
-        logger.info("Salvando dados no banco de dados...")
-        db_result = save_to_database(rol_df)
-
-        if not db_result:
-            logger.warning("Não foi possível salvar os dados no banco de dados.")
-
+        load_inputs = {'rol': checkpoints.output_hash('clean', 'rol'), **extract_inputs}
+        # O marcador só vale se a revisão ainda estiver no banco atual (reset ou outro DB_URL)
+        if checkpoints.is_valid('load', load_inputs) and revision_exists(extract_inputs['anexo_i']):
+            logger.info("Dados já gravados no banco de dados (checkpoint)")
+        else:
+            logger.info("Salvando dados no banco de dados...")
+            db_result = save_to_database(rol_df, revision=build_revision_info(anexo_i_path))
+
+            if not db_result:
+                logger.error("Não foi possível salvar os dados no banco de dados. Abortando.")
+                return False
+
+            # 2.4 Carga opcional no esquema normalizado
+            if DB_NORMALIZED_SCHEMA:
+                from database.normalized import bulk_load_normalized, storage_report
+
+                # Sem a carga normalizada a etapa não é concluída: a próxima execução a refaz
+                if not bulk_load_normalized(rol_df):
+                    logger.error("Não foi possível carregar o esquema normalizado. Abortando.")
+                    return False
+                storage_report()
+
+            marker_path = save_json({'registros': len(rol_df), 'pdf_hash': extract_inputs['anexo_i']},
+                                    checkpoints.path('carga.json'))
+            checkpoints.complete('load', load_inputs, {'marcador': marker_path})
+
+        # 2.5 Processar o Anexo II (Diretrizes de Utilização)
+        dut_inputs = {'anexo_ii': checkpoints.output_hash('download', 'anexo_ii'),
+                      'marcador': checkpoints.output_hash('load', 'marcador')}
+        if checkpoints.is_valid('dut', dut_inputs):
+            logger.info("Diretrizes de Utilização já processadas (checkpoint)")
+        else:
+            logger.info("Processando as Diretrizes de Utilização (Anexo II)...")
+            dut_df = process_anexo_ii(anexo_ii_path)
+
+            if dut_df is None:
+                logger.warning("Não foi possível processar o Anexo II.")
+            else:
+                marker_path = save_json({'diretrizes': len(dut_df)}, checkpoints.path('dut.json'))
+                checkpoints.complete('dut', dut_inputs, {'marcador': marker_path})
+
+        checkpoints.finish_run()
         logger.info("Processo concluído com sucesso!")
         return True
 
@@ -66,7 +151,70 @@ def main():
         logger.error(f"Erro durante a execução: {str(e)}")
         return False
 
+    finally:
+        peak = peak_rss_mb(include_children=True)
+        if peak is not None:
+            logger.info(f"Pico de memória (RSS) da execução: {peak:.0f} MiB")
+
+
+def crawl():
+    """Modo crawler: baixa todas as revisões publicadas do Anexo I e extrai cada uma"""
+    from utils.crawler import crawl_revisions
+    from utils.pdf_processor import extract_revisions
+
+    logger.info("Iniciando a coleta de revisões históricas do Rol")
+
+    try:
+        pdf_paths = crawl_revisions()
+        if not pdf_paths:
+            logger.error("Nenhuma revisão do Anexo I encontrada. Abortando.")
+            return False
+
+        results = extract_revisions(pdf_paths)
+        return any(csv_path is not None for csv_path in results.values())
+
+    except Exception as e:
+        logger.error(f"Erro durante a coleta de revisões: {str(e)}")
+        return False
+
+
+def batch(source, max_workers=None):
+    """Modo lote: extrai o Rol de todos os PDFs de um diretório ou padrão glob"""
+    from utils.pdf_processor import process_batch
+
+    logger.info(f"Iniciando o processamento em lote: {source}")
+
+    try:
+        return process_batch(source, max_workers=max_workers) is not None
+
+    except Exception as e:
+        logger.error(f"Erro durante o processamento em lote: {str(e)}")
+        return False
+
 
 if __name__ == "__main__":
-    success = main()
+    parser = argparse.ArgumentParser(description="Extração do Rol de Procedimentos da ANS")
+    parser.add_argument("--crawl", action="store_true",
+                        help="coleta e extrai todas as revisões históricas dos anexos")
+    parser.add_argument("--batch", metavar="ORIGEM",
+                        help="processa em lote os PDFs do Anexo I de um diretório ou padrão glob")
+    parser.add_argument("--serve", action="store_true",
+                        help="inicia o serviço HTTP de consulta do Rol (somente leitura)")
+    parser.add_argument("--force-stage", choices=STAGES,
+                        help="refaz a etapa indicada e as seguintes, ignorando os checkpoints")
+    parser.add_argument("--workers", type=int,
+                        help="quantidade de processos do processamento em lote")
+    args = parser.parse_args()
+
+    if args.serve:
+        from utils.rol_service import serve
+
+        serve()
+        success = True
+    elif args.batch:
+        success = batch(args.batch, max_workers=args.workers)
+    elif args.crawl:
+        success = crawl()
+    else:
+        success = main(force_stage=args.force_stage)
     sys.exit(0 if success else 1)
\ No newline at end of file
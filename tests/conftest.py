@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Nenhum teste grava no banco padrão do projeto (output/ans_rol.db)
+os.environ.setdefault("DB_URL", f"sqlite:///{Path(tempfile.mkdtemp()) / 'testes.db'}")
+
+
+@pytest.fixture
+def db_url(tmp_path, monkeypatch):
+    """Banco SQLite vazio e exclusivo do teste"""
+    from database import models
+
+    url = f"sqlite:///{tmp_path / 'rol.db'}"
+    monkeypatch.setattr(models, 'DB_URL', url)
+    return url
+
+
+@pytest.fixture
+def build_rol():
+    """Monta um Rol com as colunas de ROL_COLUMNS: build_rol(nomes, COLUNA=valores, ...)"""
+    import pandas as pd
+    from config.settings import ROL_COLUMNS
+
+    def build(names, **columns):
+        columns.setdefault('CAPÍTULO', "CAP 1")
+        return pd.DataFrame({'PROCEDIMENTO': names, **columns}).reindex(columns=ROL_COLUMNS)
+
+    return build
+
+
+@pytest.fixture
+def revision():
+    """Informações de uma revisão baixada em janeiro de 2024: revision(hash, dia, campo=valor, ...)"""
+    from datetime import datetime
+
+    def build(pdf_hash, day, **fields):
+        return {'pdf_hash': pdf_hash, 'data_download': datetime(2024, 1, day), **fields}
+
+    return build
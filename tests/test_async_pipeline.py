@@ -0,0 +1,48 @@
+import asyncio
+
+import httpx
+
+from database.db_manager import query_database
+from utils import async_pipeline
+
+
+def test_run_jobs_saves_revisions_in_chronological_order(db_url, monkeypatch, build_rol, revision):
+    rols = {"antigo.pdf": ["A", "B"], "novo.pdf": ["A", "C"]}
+    days = {"antigo.pdf": 10, "novo.pdf": 20}
+    # A revisão mais nova termina a extração primeiro
+    delays = {"antigo.pdf": 0.2, "novo.pdf": 0}
+
+    async def extract_rol(pdf_path, executor):
+        await asyncio.sleep(delays[pdf_path])
+        return build_rol(rols[pdf_path])
+
+    monkeypatch.setattr(async_pipeline, 'extract_rol', extract_rol)
+    monkeypatch.setattr(async_pipeline, 'build_revision_info', lambda pdf_path: revision(pdf_path, days[pdf_path]))
+
+    results = asyncio.run(async_pipeline.run_jobs(["novo.pdf", "antigo.pdf"], max_workers=1))
+
+    assert results == {"novo.pdf": True, "antigo.pdf": True}
+    assert sorted(query_database()['procedimento']) == ["A", "C"]
+    assert sorted(query_database(as_of="2024-01-15")['procedimento']) == ["A", "B"]
+
+
+class BrokenStream(httpx.AsyncByteStream):
+    """Corpo da resposta que falha depois do primeiro bloco"""
+
+    async def __aiter__(self):
+        yield b"%PDF-1.4 parte"
+        raise httpx.ReadError("conexão interrompida")
+
+
+def test_download_file_removes_partial_file_on_error(tmp_path):
+    output_path = tmp_path / "Anexo_I.pdf"
+    output_path.write_bytes(b"%PDF-1.4 anterior")
+
+    async def download():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, stream=BrokenStream()))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await async_pipeline.download_file(client, "https://x/Anexo_I.pdf", output_path)
+
+    assert asyncio.run(download()) is False
+    assert output_path.read_bytes() == b"%PDF-1.4 anterior"
+    assert [p.name for p in tmp_path.iterdir()] == ["Anexo_I.pdf"]
@@ -0,0 +1,43 @@
+import pandas as pd
+
+from utils import pdf_processor
+from utils.fingerprint import add_row_fingerprint
+from utils.pdf_processor import resolve_pdf_inputs, combine_batch_outputs, _extract_batch_item
+
+
+def write_pdfs(directory, names):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (directory / name).write_bytes(b"%PDF-1.4")
+
+
+def test_resolve_pdf_inputs_from_directory_glob_and_file(tmp_path):
+    write_pdfs(tmp_path / "2021", ["b.pdf", "a.PDF", "notas.txt"])
+    write_pdfs(tmp_path / "2022", ["c.pdf"])
+
+    assert [p.name for p in resolve_pdf_inputs(tmp_path / "2021")] == ["a.PDF", "b.pdf"]
+    assert [p.name for p in resolve_pdf_inputs(f"{tmp_path}/**/*.pdf")] == ["b.pdf", "c.pdf"]
+    assert resolve_pdf_inputs(tmp_path / "2022" / "c.pdf") == [(tmp_path / "2022" / "c.pdf").resolve()]
+    assert resolve_pdf_inputs(tmp_path / "inexistente") == []
+
+
+def test_batch_items_are_extracted_once_and_combined(tmp_path, build_rol, monkeypatch):
+    extracted = []
+
+    def extract_rol_dataframe(pdf_path):
+        extracted.append(pdf_path)
+        return add_row_fingerprint(build_rol([f"PROC {pdf_path.stem}"]))
+
+    monkeypatch.setattr(pdf_processor, 'extract_rol_dataframe', extract_rol_dataframe)
+    write_pdfs(tmp_path, ["a.pdf", "b.pdf"])
+
+    first, rows = _extract_batch_item(tmp_path / "a.pdf", "a" * 64, tmp_path)
+    second, _ = _extract_batch_item(tmp_path / "b.pdf", "b" * 64, tmp_path)
+    again, cached_rows = _extract_batch_item(tmp_path / "a.pdf", "a" * 64, tmp_path)
+
+    assert rows == 1 and cached_rows is None and again == first
+    assert len(extracted) == 2
+
+    dataset = pd.read_parquet(combine_batch_outputs([second, first], tmp_path / "rol.parquet"))
+    assert list(dataset['PROCEDIMENTO']) == ["PROC a", "PROC b"]
+    assert list(dataset['PDF_ARQUIVO']) == ["a.pdf", "b.pdf"]
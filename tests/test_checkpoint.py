@@ -0,0 +1,54 @@
+from database.db_manager import save_to_database, revision_exists
+from utils.checkpoint import Checkpoints, save_json
+
+
+def test_resume_skips_completed_stage(tmp_path):
+    checkpoints = Checkpoints(tmp_path)
+    csv_path = tmp_path / "Rol.csv"
+    csv_path.write_text("PROCEDIMENTO\nA\n")
+    checkpoints.complete('clean', {'tabelas': 'h1'}, {'csv': csv_path})
+
+    resumed = Checkpoints(tmp_path)
+    resumed.start_run()
+
+    assert resumed.is_valid('clean', {'tabelas': 'h1'})
+    assert not resumed.is_valid('clean', {'tabelas': 'h2'})
+
+
+def test_deleted_or_changed_output_invalidates_stage(tmp_path):
+    checkpoints = Checkpoints(tmp_path)
+    csv_path, zip_path = tmp_path / "Rol.csv", tmp_path / "Rol.zip"
+    csv_path.write_text("PROCEDIMENTO\nA\n")
+    zip_path.write_bytes(b"zip")
+    checkpoints.complete('clean', outputs={'csv': csv_path, 'zip': zip_path})
+
+    zip_path.unlink()
+    assert not checkpoints.is_valid('clean')
+
+    zip_path.write_bytes(b"zip")
+    csv_path.write_text("PROCEDIMENTO\nB\n")
+    assert not checkpoints.is_valid('clean')
+
+
+def test_force_stage_invalidates_following_stages(tmp_path):
+    checkpoints = Checkpoints(tmp_path)
+    for stage in ('extract', 'clean', 'load'):
+        checkpoints.complete(stage, outputs={'marcador': save_json({}, tmp_path / f"{stage}.json")})
+
+    checkpoints.start_run(force_stage='clean')
+
+    assert checkpoints.is_valid('extract')
+    assert not checkpoints.is_valid('clean')
+    assert not checkpoints.is_valid('load')
+
+
+def test_load_marker_requires_revision_in_current_database(db_url, tmp_path, monkeypatch, build_rol, revision):
+    from database import models
+
+    assert save_to_database(build_rol(["A"]), revision=revision('pdf1', 10))
+    assert revision_exists('pdf1')
+    assert not revision_exists('pdf2')
+
+    # Outro DB_URL (ou banco recriado): o marcador da carga não vale mais
+    monkeypatch.setattr(models, 'DB_URL', f"sqlite:///{tmp_path / 'novo.db'}")
+    assert not revision_exists('pdf1')
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from cli import cli
+from utils.pdf_processor import save_to_csv
+
+
+def test_load_and_query_subcommands(db_url, build_rol, tmp_path, capsys):
+    csv_path = save_to_csv(build_rol(["TOMOGRAFIA DE CRÂNIO", "BIÓPSIA DE PULMÃO"], PAC=["PAC", ""]),
+                           tmp_path / "Rol.csv")
+
+    assert cli(['load', str(csv_path), '--pdf', str(tmp_path / "sem_pdf.pdf")]) == 0
+    assert "Revisão 1: 2 registros (2 linhas novas, 0 já vistas)" in capsys.readouterr().out
+
+    assert cli(['query', '--busca', 'cranio', '--formato', 'json']) == 0
+    assert [row['procedimento'] for row in json.loads(capsys.readouterr().out)] == ["TOMOGRAFIA DE CRÂNIO"]
+
+    assert cli(['query', '--as-of', '1', '--filtro', 'pac=*', '--formato', 'json']) == 0
+    assert [row['procedimento'] for row in json.loads(capsys.readouterr().out)] == ["TOMOGRAFIA DE CRÂNIO"]
+
+
+def test_failed_command_returns_error_code(db_url, tmp_path):
+    assert cli(['load', str(tmp_path / "inexistente.csv")]) == 1
+    assert cli(['query', '--filtro', 'coluna_invalida=1']) == 1
+
+
+def test_subcommand_is_required():
+    with pytest.raises(SystemExit) as exc:
+        cli([])
+    assert exc.value.code == 2
@@ -0,0 +1,33 @@
+import pytest
+
+from database.db_manager import save_to_database, get_coverage_summary, count_procedures_by_capitulo, \
+    list_grupos, list_subgrupos
+
+
+@pytest.fixture
+def rol(build_rol):
+    return build_rol(["A", "B", "C"],
+                     HCO=["Seg. Hospitalar Com Obstetrícia", "", "Seg. Hospitalar Com Obstetrícia"],
+                     OD=["", "Seg. Odontológica", None],
+                     CAPÍTULO=["CAP 1", "CAP 1", "CAP 2"],
+                     GRUPO=["G1", "G2", "G3"],
+                     SUBGRUPO=["S1", "S2", "S3"])
+
+
+def test_coverage_summary_counts_segments_per_level(db_url, rol):
+    assert save_to_database(rol)
+
+    summary = get_coverage_summary('capitulo')
+
+    assert summary['capitulo'].tolist() == ["CAP 1", "CAP 2"]
+    assert summary['total'].tolist() == [2, 1]
+    assert summary['hco'].tolist() == [1, 1]
+    assert summary['od'].tolist() == [1, 0]
+    assert count_procedures_by_capitulo('HCO')['hco'].tolist() == [1, 1]
+
+
+def test_hierarchy_listing(db_url, rol):
+    assert save_to_database(rol)
+
+    assert list_grupos("CAP 1") == ["G1", "G2"]
+    assert list_subgrupos("G3") == ["S3"]
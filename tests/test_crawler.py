@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from utils.crawler import ANNEX_PDF_PATTERN, ARCHIVE_PAGE_PATTERN, _download_revision
+
+
+@pytest.mark.parametrize('name, expected', [
+    ("Anexo_I_Rol_2021_RN_465.2021.pdf", True),
+    ("anexo-ii-dut.pdf", True),
+    ("rol-de-procedimentos-2018.pdf", True),
+    ("relatorio-de-controle-interno.pdf", False),
+    ("protocolo-de-atendimento.pdf", False),
+])
+def test_annex_pdf_pattern(name, expected):
+    assert bool(ANNEX_PDF_PATTERN.search(name)) is expected
+
+
+@pytest.mark.parametrize('path, expected', [
+    ("/assuntos/consumidor/o-que-o-seu-plano-de-saude-deve-cobrir-1/o-que-e-o-rol-de-procedimentos", True),
+    ("/legislacao/historico-de-atualizacoes", True),
+    ("/acesso-a-informacao/controle-interno", False),
+    ("/servicos/protocolo-eletronico", False),
+])
+def test_archive_page_pattern(path, expected):
+    assert bool(ARCHIVE_PAGE_PATTERN.search(path)) is expected
+
+
+class FakeFetcher:
+    def __init__(self, status_code=200, fail=False):
+        self.status_code = status_code
+        self.fail = fail
+
+    @contextmanager
+    def stream(self, url, **kwargs):
+        def iter_content(chunk_size):
+            yield b"%PDF-1.4 parte"
+            if self.fail:
+                raise ConnectionError("conexão interrompida")
+            yield b" final"
+
+        yield SimpleNamespace(status_code=self.status_code, headers={'ETag': '"1"'}, iter_content=iter_content)
+
+
+def test_download_revision_writes_temp_file(tmp_path):
+    url, content_hash, path, headers = _download_revision(FakeFetcher(), "https://x/Anexo_I.pdf", tmp_path, {})
+
+    assert path.read_bytes() == b"%PDF-1.4 parte final"
+    assert headers['ETag'] == '"1"'
+
+
+@pytest.mark.parametrize('fetcher', [FakeFetcher(status_code=500), FakeFetcher(fail=True)])
+def test_failed_download_leaves_no_temp_file(tmp_path, fetcher):
+    (tmp_path / "sobra.part").write_bytes(b"")
+
+    assert _download_revision(fetcher, "https://x/Anexo_I.pdf", tmp_path, {}) is None
+    assert [p.name for p in tmp_path.iterdir()] == ["sobra.part"]
@@ -0,0 +1,37 @@
+from utils.pdf_processor import parse_dut_entries
+
+PAGES = [
+    "ANEXO II - DIRETRIZES DE UTILIZAÇÃO\n"
+    "1. ANGIOGRAFIA\n"
+    "Cobertura obrigatória quando preenchido:\n"
+    "1. pacientes com suspeita clínica;\n",
+    "2. BIÓPSIA PERCUTÂNEA\n"
+    "Cobertura obrigatória em casos selecionados.\n",
+]
+
+
+def test_parse_dut_entries_splits_headings_and_criteria():
+    dut = parse_dut_entries(PAGES)
+
+    assert dut['NUMERO'].tolist() == [1, 2]
+    assert dut['PROCEDIMENTO'].tolist() == ["ANGIOGRAFIA", "BIÓPSIA PERCUTÂNEA"]
+    assert dut['CRITERIOS'].iloc[0] == "Cobertura obrigatória quando preenchido:\n1. pacientes com suspeita clínica;"
+
+
+def test_out_of_order_heading_starts_its_own_entry(caplog):
+    pages = PAGES + ["4. ANGIOTOMOGRAFIA CORONARIANA\nCritério A\n3. CINTILOGRAFIA\nCritério B\n"]
+
+    dut = parse_dut_entries(pages)
+
+    assert dut['NUMERO'].tolist() == [1, 2, 3, 4]
+    assert dut.set_index('NUMERO').loc[2, 'CRITERIOS'] == "Cobertura obrigatória em casos selecionados."
+    assert dut.set_index('NUMERO').loc[3, 'CRITERIOS'] == "Critério B"
+    assert "fora de sequência" in caplog.text
+
+
+def test_repeated_heading_is_reported(caplog):
+    dut = parse_dut_entries(PAGES + ["1. ANGIOGRAFIA\n"])
+
+    assert len(dut) == 2
+    assert "1. ANGIOGRAFIA" in dut.set_index('NUMERO').loc[2, 'CRITERIOS']
+    assert "repetido" in caplog.text
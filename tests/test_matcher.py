@@ -0,0 +1,45 @@
+import pandas as pd
+
+from utils.matcher import RolMatcher, normalize_names
+
+ROL = pd.DataFrame({
+    'id': [1, 2, 3],
+    'procedimento': ["RESSONÂNCIA MAGNÉTICA DE CRÂNIO", "TOMOGRAFIA DE TÓRAX", "BIÓPSIA DE PULMÃO"],
+})
+
+
+def test_normalize_names_removes_accents_and_hyphenation():
+    names = pd.Series(["RESSO-\nNÂNCIA  Magnética", "Biópsia de pulmão"], dtype='string[pyarrow]')
+
+    assert normalize_names(names).tolist() == ["ressonancia magnetica", "biopsia de pulmao"]
+
+
+def test_match_batch_exact_and_fuzzy():
+    matcher = RolMatcher.build(ROL)
+
+    result = matcher.match_batch(["tomografia de torax", "biopsia pulmao", "xyz"])
+
+    assert result['id'].tolist()[:2] == [2, 3]
+    assert result['score'].iloc[0] == 1.0
+    assert 0 < result['score'].iloc[1] < 1.0
+    assert pd.isna(result['id'].iloc[2])
+
+
+def test_match_batch_on_empty_index():
+    matcher = RolMatcher.build(ROL.iloc[0:0])
+
+    result = matcher.match_batch(["tomografia de torax"])
+
+    assert result['score'].tolist() == [0.0]
+    assert pd.isna(result['id'].iloc[0])
+
+
+def test_save_and_load_reuses_dense_postings(tmp_path):
+    matcher = RolMatcher.build(ROL)
+    matcher.save(tmp_path)
+
+    loaded = RolMatcher.load(tmp_path, mmap=True)
+
+    assert (tmp_path / 'dense_postings.npy').exists()
+    assert loaded.dense_postings.shape == matcher.dense_postings.shape
+    assert loaded.match_batch(["biopsia de pulmao"])['id'].tolist() == [3]
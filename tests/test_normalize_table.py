@@ -0,0 +1,64 @@
+import unicodedata
+
+import pandas as pd
+
+from config.settings import ROL_COLUMNS
+from utils.pdf_processor import normalize_table_text
+
+HEADER = {col: col for col in ROL_COLUMNS}
+
+
+def build_raw(rows):
+    return pd.DataFrame(rows).reindex(columns=ROL_COLUMNS)
+
+
+def test_cell_text_is_joined_collapsed_and_composed():
+    raw = build_raw([{'PROCEDIMENTO': unicodedata.normalize('NFD', "RESSO-\nNÂNCIA   MAGNÉTICA "),
+                      'RN': " 465/2021 ", 'OD': "", 'CAPÍTULO': "TOMO- GRAFIA"}])
+
+    row = normalize_table_text(raw).iloc[0]
+
+    assert row['PROCEDIMENTO'] == "RESSONÂNCIA MAGNÉTICA"
+    assert unicodedata.is_normalized('NFC', row['PROCEDIMENTO'])
+    assert row['RN'] == "465/2021"
+    assert row['CAPÍTULO'] == "TOMOGRAFIA"
+    assert pd.isna(row['OD'])
+
+
+def test_repeated_headers_are_removed_but_data_rows_kept():
+    raw = build_raw([
+        HEADER,
+        {'PROCEDIMENTO': "CONSULTA", 'RN': "RN", 'CAPÍTULO': "CAP 1"},
+        {'PROCEDIMENTO': "procedimento", 'RN': "rn"},
+        {'RN': "RN", 'VIGÊNCIA': "VIGÊNCIA", 'OD': "OD"},
+        {'PROCEDIMENTO': "EXAME", 'OD': "OD", 'AMB': "AMB"},
+    ])
+
+    result = normalize_table_text(raw)
+
+    # Só a coluna RN traz o próprio nome: é uma linha de dados
+    assert list(result['PROCEDIMENTO']) == ["CONSULTA", "EXAME"]
+    assert list(result['RN'].fillna('')) == ["RN", ""]
+    assert list(result['OD'].fillna('')) == ["", "OD"]
+
+
+def test_hierarchy_is_filled_and_reset_below_a_new_level():
+    raw = build_raw([
+        {'PROCEDIMENTO': "A", 'CAPÍTULO': "CAP 1", 'GRUPO': "G1", 'SUBGRUPO': "S1"},
+        {'PROCEDIMENTO': "B"},
+        {'PROCEDIMENTO': "C", 'GRUPO': "G2"},
+        {'PROCEDIMENTO': "D", 'SUBGRUPO': "S2"},
+        {'PROCEDIMENTO': "E", 'CAPÍTULO': "CAP 2"},
+        {'PROCEDIMENTO': "F"},
+    ])
+
+    result = normalize_table_text(raw)[['PROCEDIMENTO'] + ['CAPÍTULO', 'GRUPO', 'SUBGRUPO']]
+
+    assert [tuple(row) for row in result.astype(object).fillna('').itertuples(index=False)] == [
+        ("A", "CAP 1", "G1", "S1"),
+        ("B", "CAP 1", "G1", "S1"),
+        ("C", "CAP 1", "G2", ""),
+        ("D", "CAP 1", "G2", "S2"),
+        ("E", "CAP 2", "", ""),
+        ("F", "CAP 2", "", ""),
+    ]
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import text
+
+from database.db_manager import save_to_database
+from database.models import setup_database
+from database.normalized import bulk_load_normalized, COMPAT_VIEW
+
+
+@pytest.fixture
+def build_rol(build_rol):
+    def build(names, **columns):
+        return build_rol(names, HCO="Seg. Hospitalar Com Obstetrícia", GRUPO="G1", SUBGRUPO="S1", **columns)
+
+    return build
+
+
+def compact_rows():
+    with setup_database().connect() as conn:
+        return conn.execute(text(f"SELECT procedimento, hco, valid_from, valid_to FROM {COMPAT_VIEW} "
+                                 f"ORDER BY procedimento, valid_from")).all()
+
+
+def test_normalized_load_keeps_history(db_url, build_rol):
+    assert save_to_database(build_rol(["A", "B"]), revision={'pdf_hash': 'r1'})
+    assert bulk_load_normalized(build_rol(["A", "B"]))
+    assert save_to_database(build_rol(["A", "C"]), revision={'pdf_hash': 'r2'})
+    assert bulk_load_normalized(build_rol(["A", "C"]))
+
+    assert compact_rows() == [
+        ("A", "Seg. Hospitalar Com Obstetrícia", 1, None),
+        ("B", "Seg. Hospitalar Com Obstetrícia", 1, 2),
+        ("C", "Seg. Hospitalar Com Obstetrícia", 2, None),
+    ]
+
+
+def test_reloading_a_revision_replaces_only_its_rows(db_url, build_rol):
+    assert save_to_database(build_rol(["A", "B"]), revision={'pdf_hash': 'r1'})
+    assert bulk_load_normalized(build_rol(["A", "B"]))
+    assert save_to_database(build_rol(["A", "C"]), revision={'pdf_hash': 'r2'})
+    assert bulk_load_normalized(build_rol(["A", "C"]))
+
+    assert bulk_load_normalized(build_rol(["A", "C"]), revision_id=2)
+
+    assert [(row[0], row[2], row[3]) for row in compact_rows()] == [("A", 1, None), ("B", 1, 2), ("C", 2, None)]
+
+
+def test_compat_view_keeps_the_dut_number(db_url, build_rol):
+    rol = build_rol(["A", "B", "C"], DUT=["65", "Diretrizes de Utilização", None])
+    assert save_to_database(rol, revision={'pdf_hash': 'r1'})
+    assert bulk_load_normalized(rol)
+
+    with setup_database().connect() as conn:
+        rows = conn.execute(text(f"SELECT procedimento, dut FROM {COMPAT_VIEW} ORDER BY procedimento")).all()
+
+    assert rows == [("A", "65"), ("B", "Diretrizes de Utilização"), ("C", "")]
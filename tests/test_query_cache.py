@@ -0,0 +1,54 @@
+import pytest
+
+from database import models, query_cache
+from database.db_manager import save_to_database
+from database.query_cache import QueryCache, cached_query
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = QueryCache(disk_dir=tmp_path / "cache")
+    monkeypatch.setattr(query_cache, '_cache', cache)
+    return cache
+
+
+def test_repeated_query_hits_cache_and_new_revision_invalidates(db_url, cache, build_rol, revision):
+    assert save_to_database(build_rol(["A", "B"]), revision=revision('r1', 10))
+
+    assert sorted(cached_query()['procedimento']) == ["A", "B"]
+    assert sorted(cached_query()['procedimento']) == ["A", "B"]
+    assert cache.get_stats()['hits'] == 1
+
+    assert save_to_database(build_rol(["A", "C"]), revision=revision('r2', 20))
+
+    assert cache.get_stats()['entries'] == 0
+    assert sorted(cached_query()['procedimento']) == ["A", "C"]
+    assert sorted(cached_query(as_of=1)['procedimento']) == ["A", "B"]
+
+
+def test_disk_tier_does_not_leak_between_databases(tmp_path, monkeypatch, cache, build_rol, revision):
+    first, second = (f"sqlite:///{tmp_path / name}" for name in ("primeiro.db", "segundo.db"))
+
+    # Os dois bancos têm uma única revisão, com o mesmo id (1)
+    monkeypatch.setattr(models, 'DB_URL', second)
+    assert save_to_database(build_rol(["B"]), revision=revision('r2', 10))
+    monkeypatch.setattr(models, 'DB_URL', first)
+    assert save_to_database(build_rol(["A"]), revision=revision('r1', 10))
+    assert list(cached_query()['procedimento']) == ["A"]
+
+    # Nova execução (só a camada em disco) apontando para o outro banco
+    monkeypatch.setattr(query_cache, '_cache', QueryCache(disk_dir=cache.disk_dir))
+    monkeypatch.setattr(models, 'DB_URL', second)
+
+    assert list(cached_query()['procedimento']) == ["B"]
+    assert query_cache.cache_stats()['disk_hits'] == 0
+
+
+def test_disk_tier_serves_entries_of_previous_runs(db_url, tmp_path, monkeypatch, cache, build_rol, revision):
+    assert save_to_database(build_rol(["A"]), revision=revision('r1', 10))
+    assert list(cached_query()['procedimento']) == ["A"]
+
+    monkeypatch.setattr(query_cache, '_cache', QueryCache(disk_dir=cache.disk_dir))
+
+    assert list(cached_query()['procedimento']) == ["A"]
+    assert query_cache.cache_stats()['disk_hits'] == 1
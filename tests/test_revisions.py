@@ -0,0 +1,89 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from database.db_manager import save_to_database, query_database, get_revision
+
+
+def names(df):
+    return sorted(df['procedimento'])
+
+
+def test_query_as_of_revision_and_date(db_url, build_rol, revision):
+    assert save_to_database(build_rol(["A", "B"]), revision=revision('r1', 10))
+    assert save_to_database(build_rol(["A", "C"]), revision=revision('r2', 20))
+
+    assert names(query_database()) == ["A", "C"]
+    assert names(query_database(as_of=1)) == ["A", "B"]
+    assert names(query_database(as_of="1")) == ["A", "B"]
+    assert names(query_database(as_of=np.int64(2))) == ["A", "C"]
+    assert names(query_database(as_of="2024-01-15")) == ["A", "B"]
+    assert names(query_database(as_of="2024-01-20")) == ["A", "C"]
+    assert query_database(as_of="2024-01-01").empty
+
+
+def test_unchanged_rows_are_not_rewritten(db_url, build_rol, revision):
+    assert save_to_database(build_rol(["A", "B"]), revision=revision('r1', 10))
+    assert save_to_database(build_rol(["A", "C"]), revision=revision('r2', 20))
+
+    assert query_database(as_of=1).set_index('procedimento').loc["A", 'id'] == \
+        query_database(as_of=2).set_index('procedimento').loc["A", 'id']
+
+
+def test_reloading_the_same_pdf_is_a_no_op(db_url, build_rol, revision):
+    assert save_to_database(build_rol(["A"]), revision=revision('r1', 10))
+    assert save_to_database(build_rol(["A"]), revision=revision('r1', 10))
+
+    assert len(query_database()) == 1
+
+
+def test_out_of_order_revision_is_rejected(db_url, build_rol, revision):
+    assert save_to_database(build_rol(["A", "C"]), revision=revision('r2', 20, data_publicacao=datetime(2024, 1, 20)))
+
+    older = revision('r1', 25, data_publicacao=datetime(2024, 1, 5))
+    assert not save_to_database(build_rol(["A", "B"]), revision=older)
+
+    assert names(query_database()) == ["A", "C"]
+
+
+def test_published_revision_after_load_without_publication_date(db_url, build_rol, revision):
+    # Carga sem PDF (cli.py load sem --pdf): só a data da carga, que é posterior à publicação
+    assert save_to_database(build_rol(["A", "B"]))
+
+    published = datetime.now() - timedelta(days=30)
+    assert save_to_database(build_rol(["A", "C"]), revision=revision('r2', 20, data_publicacao=published))
+
+    assert names(query_database()) == ["A", "C"]
+    assert names(query_database(as_of=datetime.now())) == ["A", "C"]
+    assert names(query_database(as_of=1)) == ["A", "B"]
+
+
+def test_rows_from_before_revisions_are_backfilled(db_url, build_rol, revision):
+    path = db_url.replace("sqlite:///", "")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE rol_procedimentos (id INTEGER PRIMARY KEY, procedimento VARCHAR(500), "
+                     "rn VARCHAR(100), vigencia VARCHAR(100), od VARCHAR(100), amb VARCHAR(100), "
+                     "hco VARCHAR(100), hso VARCHAR(100), ref VARCHAR(100), pac VARCHAR(100), "
+                     "dut VARCHAR(100), subgrupo VARCHAR(200), grupo VARCHAR(200), capitulo VARCHAR(200))")
+        conn.executemany("INSERT INTO rol_procedimentos (procedimento, capitulo) VALUES (?, 'CAP 1')",
+                         [("A",), ("B",)])
+
+    assert names(query_database()) == ["A", "B"]
+    assert names(query_database(as_of="2000-01-01")) == ["A", "B"]
+
+    assert save_to_database(build_rol(["A", "C"]), revision=revision('r1', 10))
+
+    assert names(query_database()) == ["A", "C"]
+    assert names(query_database(as_of="2000-01-01")) == ["A", "B"]
+    assert len(query_database(as_of=2)) == 2
+
+
+def test_revision_records_new_and_seen_rows(db_url, build_rol, revision):
+    assert save_to_database(build_rol(["A", "B"]), revision=revision('r1', 10))
+    assert save_to_database(build_rol(["A", "B", "C"]), revision=revision('r2', 20))
+
+    first, latest = get_revision('r1'), get_revision()
+
+    assert (first['linhas_novas'], first['linhas_vistas']) == (2, 0)
+    assert (latest['pdf_hash'], latest['linhas_novas'], latest['linhas_vistas']) == ('r2', 1, 2)
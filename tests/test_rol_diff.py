@@ -0,0 +1,47 @@
+from database.db_manager import save_to_database
+from utils.rol_diff import diff_rol, diff_revisions, export_changelog
+
+
+def rows(changelog):
+    return [tuple(row) for row in changelog.fillna('').itertuples(index=False)]
+
+
+def test_added_removed_and_changed_rows(build_rol):
+    old = build_rol(["A", "B", "C"], PAC=["", "PAC", ""], RN=["465/2021", "465/2021", "465/2021"])
+    new = build_rol(["a ", "C", "D"], PAC=["PAC", "", ""], RN=["465/2021", "500/2022", "500/2022"])
+
+    # A junção ignora maiúsculas e espaços; o changelog traz o nome da revisão nova
+    assert rows(diff_rol(old, new)) == [
+        ("D", 'incluído', '', '', '', ''),
+        ("B", 'excluído', '', '', '', ''),
+        ("C", 'alterado', 'RN', 'alterado', '465/2021', '500/2022'),
+        ("a", 'alterado', 'PAC', 'adicionado', '', 'PAC'),
+    ]
+
+
+def test_repeated_names_are_matched_by_occurrence(build_rol):
+    # O segundo "A" da revisão nova corresponde ao segundo "A" da anterior
+    old = build_rol(["A", "B", "A"], DUT=["", "", "65"])
+    new = build_rol(["A", "A", "A"], DUT=["", "66", "67"])
+
+    assert rows(diff_rol(old, new)) == [
+        ("A", 'incluído', '', '', '', ''),
+        ("B", 'excluído', '', '', '', ''),
+        ("A", 'alterado', 'DUT', 'alterado', '65', '66'),
+    ]
+
+
+def test_identical_revisions_have_no_changes(build_rol):
+    rol = build_rol(["A", "B"], OD=["Seg. Odontológica", None])
+
+    assert diff_rol(rol, rol.copy()).empty
+
+
+def test_diff_revisions_from_database_and_export(db_url, build_rol, revision, tmp_path):
+    assert save_to_database(build_rol(["A", "B"]), revision=revision('r1', 10))
+    assert save_to_database(build_rol(["A", "C"]), revision=revision('r2', 20))
+
+    changelog = diff_revisions(1)
+
+    assert sorted(rows(changelog)) == [("B", 'excluído', '', '', '', ''), ("C", 'incluído', '', '', '', '')]
+    assert export_changelog(changelog, tmp_path / "changelog.csv").exists()
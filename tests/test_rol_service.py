@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from database.db_manager import save_to_database, query_database
+from utils import rol_service
+from utils.rol_service import RolIndex, RolService, create_server
+
+HCO = "Seg. Hospitalar Com Obstetrícia"
+
+
+@pytest.fixture
+def rol(build_rol):
+    return build_rol(["RESSONÂNCIA MAGNÉTICA DE CRÂNIO", "TOMOGRAFIA DE CRÂNIO", "BIÓPSIA DE PULMÃO"],
+                     HCO=[HCO, HCO, ""], PAC=["PAC", "", ""],
+                     CAPÍTULO=["CAP 1", "CAP 1", "CAP 2"], GRUPO=["G1", "G2", "G3"])
+
+
+def names(page):
+    return list(page['procedimento'])
+
+
+def test_index_select(db_url, rol):
+    assert save_to_database(rol)
+    index = RolIndex(1, query_database())
+
+    assert index.select({'capitulo': "CAP 1"})[0] == 2
+    assert names(index.select({'segmento': "hco,pac"})[1]) == ["RESSONÂNCIA MAGNÉTICA DE CRÂNIO"]
+    assert names(index.select({'nome': "tomografia de cranio"})[1]) == ["TOMOGRAFIA DE CRÂNIO"]
+    assert names(index.select({'q': "cran resson"})[1]) == ["RESSONÂNCIA MAGNÉTICA DE CRÂNIO"]
+
+    total, page = index.select({'q': "crânio", 'limit': 1, 'offset': 1})
+    assert (total, names(page)) == (2, ["TOMOGRAFIA DE CRÂNIO"])
+
+    with pytest.raises(ValueError):
+        index.select({'segmento': "xyz"})
+
+
+def test_failed_load_keeps_the_index_and_retries(db_url, build_rol, revision, monkeypatch):
+    assert save_to_database(build_rol(["A"]), revision=revision('r1', 10))
+    service = RolService(reload_interval=60)
+    assert service.index.revision_id == 1
+
+    assert save_to_database(build_rol(["A", "B"]), revision=revision('r2', 20))
+    monkeypatch.setattr(rol_service, 'query_database', lambda as_of=None, filters=None: None)
+
+    assert service.load() is False
+    assert (service.index.revision_id, names(service.index.rol)) == (1, ["A"])
+
+    monkeypatch.setattr(rol_service, 'query_database', query_database)
+    assert service.load() is True
+    assert (service.index.revision_id, sorted(names(service.index.rol))) == (2, ["A", "B"])
+
+
+def test_service_reloads_when_a_revision_is_saved(db_url, build_rol, revision):
+    service = RolService(reload_interval=60)
+    service.start()
+    try:
+        assert service.index.revision_id is None
+
+        assert save_to_database(build_rol(["A"]), revision=revision('r1', 10))
+
+        deadline = time.monotonic() + 5
+        while service.index.revision_id != 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert names(service.index.rol) == ["A"]
+    finally:
+        service.stop()
+
+
+def test_http_etag_and_not_modified(db_url, rol):
+    assert save_to_database(rol)
+    server = create_server(host='127.0.0.1', port=0, reload_interval=60)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/procedimentos?capitulo=CAP+1&segmento=hco"
+
+    try:
+        with urllib.request.urlopen(url) as response:
+            etag = response.headers['ETag']
+            body = json.loads(response.read())
+        assert (body['revisao'], body['total']) == (1, 2)
+        assert etag.startswith('"1-')
+
+        request = urllib.request.Request(url, headers={'If-None-Match': etag})
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            urllib.request.urlopen(request)
+        assert exc.value.code == 304
+    finally:
+        server.shutdown()
+        server.service.stop()
+        server.server_close()
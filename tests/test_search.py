@@ -0,0 +1,33 @@
+from database import db_manager
+from database.db_manager import save_to_database, search_procedures
+
+NAMES = ["RESSONÂNCIA MAGNÉTICA DE CRÂNIO", "TOMOGRAFIA DE CRÂNIO", "BIÓPSIA DE PULMÃO"]
+
+
+def test_search_ignores_accents_and_case(db_url, build_rol):
+    assert save_to_database(build_rol(NAMES))
+
+    result = search_procedures("cranio")
+    assert sorted(result['procedimento']) == ["RESSONÂNCIA MAGNÉTICA DE CRÂNIO", "TOMOGRAFIA DE CRÂNIO"]
+
+    # Todos os termos, por prefixo
+    assert list(search_procedures("resson cran")['procedimento']) == ["RESSONÂNCIA MAGNÉTICA DE CRÂNIO"]
+    assert search_procedures("coração").empty
+
+
+def test_search_returns_only_current_rows(db_url, build_rol, revision):
+    assert save_to_database(build_rol(NAMES), revision=revision('r1', 10))
+    assert save_to_database(build_rol(NAMES[1:]), revision=revision('r2', 20))
+
+    assert list(search_procedures("crânio")['procedimento']) == ["TOMOGRAFIA DE CRÂNIO"]
+
+
+def test_search_falls_back_to_like_without_fts5(db_url, build_rol, monkeypatch):
+    assert save_to_database(build_rol(NAMES))
+    monkeypatch.setattr(db_manager, 'setup_search_index', lambda engine: False)
+
+    # No SQLite o LIKE só ignora maiúsculas em ASCII (no MySQL a collation ignora também os acentos)
+    result = search_procedures("CRÂNIO tomo")
+
+    assert list(result['procedimento']) == ["TOMOGRAFIA DE CRÂNIO"]
+    assert result['rank'].tolist() == [0]
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from utils.pdf_processor import TableStaging
+
+
+def build_table(start, rows=3):
+    return pd.DataFrame({0: [f"PROC {i}" for i in range(start, start + rows)], 1: range(start, start + rows)})
+
+
+def test_tables_within_budget_are_returned_unchanged(tmp_path):
+    staging = TableStaging(10 * 1024 * 1024, staging_dir=tmp_path)
+    originals = [build_table(0), build_table(3)]
+    for table in originals:
+        staging.add(table)
+
+    tables = staging.tables()
+    staging.cleanup()
+
+    assert staging.spilled == []
+    assert all(table is original for table, original in zip(tables, originals))
+    assert tables[0][1].dtype == originals[0][1].dtype
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_tables_over_budget_are_spilled_and_combined(tmp_path):
+    staging = TableStaging(1, staging_dir=tmp_path)
+    duplicated = pd.DataFrame([["PROC 9", "OD", "AMB"]], columns=["PROCEDIMENTO", "SEG", "SEG"])
+    for table in (build_table(0), build_table(3), duplicated):
+        staging.add(table)
+
+    tables = staging.tables()
+    staging.cleanup()
+
+    assert len(staging.spilled) == 3
+    assert len(tables) == 1
+    combined = tables[0]
+    assert list(combined['0'].dropna()) == [f"PROC {i}" for i in range(6)]
+    assert list(combined.columns[-3:]) == ["PROCEDIMENTO", "SEG", "SEG.1"]
+    assert list(combined[['SEG', 'SEG.1']].dropna().iloc[0]) == ["OD", "AMB"]
+    assert list(tmp_path.iterdir()) == []
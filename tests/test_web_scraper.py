@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils import web_scraper
+from utils.web_scraper import download_file, find_and_download_anexos
+
+
+def fake_get(status_code=200, fail=False):
+    def iter_content(chunk_size):
+        yield b"%PDF-1.4 novo"
+        if fail:
+            raise ConnectionError("conexão interrompida")
+
+    return lambda url, stream=True: SimpleNamespace(status_code=status_code, headers={}, iter_content=iter_content)
+
+
+def test_download_replaces_the_file_only_when_complete(tmp_path, monkeypatch):
+    output_path = tmp_path / "Anexo_I.pdf"
+    monkeypatch.setattr(web_scraper.requests, 'get', fake_get())
+
+    assert download_file("https://x/Anexo_I.pdf", output_path)
+    assert output_path.read_bytes() == b"%PDF-1.4 novo"
+    assert not (tmp_path / "Anexo_I.pdf.part").exists()
+
+
+@pytest.mark.parametrize('response', [fake_get(status_code=404), fake_get(fail=True)])
+def test_failed_download_keeps_the_previous_file(tmp_path, monkeypatch, response):
+    output_path = tmp_path / "Anexo_I.pdf"
+    output_path.write_bytes(b"%PDF-1.4 anterior")
+    monkeypatch.setattr(web_scraper.requests, 'get', response)
+
+    assert not download_file("https://x/Anexo_I.pdf", output_path)
+    assert output_path.read_bytes() == b"%PDF-1.4 anterior"
+    assert [p.name for p in tmp_path.iterdir()] == ["Anexo_I.pdf"]
+
+
+def test_find_and_download_anexos_fails_if_any_download_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(web_scraper, 'DOWNLOADS_DIR', tmp_path)
+    monkeypatch.setattr(web_scraper, 'find_anexo_urls_static',
+                        lambda: ("https://x/Anexo_I_Rol.pdf", "https://x/Anexo_II_DUT.pdf"))
+    monkeypatch.setattr(web_scraper, 'download_file', lambda url, path: "Rol" in url)
+
+    assert find_and_download_anexos() == (None, None)
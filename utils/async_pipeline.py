@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import aiofiles
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import SITE_URL, DOWNLOADS_DIR, ANEXO_I_NAME, ANEXO_II_NAME, SELENIUM_TIMEOUT, \
+    PDF_MAX_WORKERS
+from database.db_manager import prepare_revision, save_prepared_revision, setup_search_index, save_dut_to_database, notify_revision_saved
+from database.models import setup_database, create_async_db_engine
+from utils.crawler import page_links
+from utils.downloads import write_download_metadata, build_revision_info
+from utils.pdf_processor import extract_rol_dataframe, extract_pdf_text_parallel, parse_dut_entries, _init_worker
+from utils.web_scraper import select_anexo_urls, find_anexo_urls_selenium
+
+logger = logging.getLogger(__name__)
+
+# Tamanho dos blocos gravados durante o download
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Uma trava de escrita por event loop: as revisões são gravadas uma de cada vez
+# em qualquer banco (cada uma lê as linhas vigentes, encerra-as e refaz o resumo)
+_write_locks = weakref.WeakKeyDictionary()
+
+
+def _write_lock():
+    """Retorna a trava de escrita do event loop atual"""
+    loop = asyncio.get_running_loop()
+    if loop not in _write_locks:
+        _write_locks[loop] = asyncio.Lock()
+    return _write_locks[loop]
+
+
+async def download_file(client, url, output_path):
+    """
+    Baixa um arquivo em streaming, gravando os blocos de forma assíncrona em um
+    arquivo temporário que só substitui o destino ao final do download
+    """
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(output_path.name + '.part')
+
+    try:
+        async with client.stream('GET', url) as response:
+            if response.status_code != 200:
+                logger.error(f"Erro ao baixar o arquivo: {response.status_code}")
+                return False
+
+            async with aiofiles.open(tmp_path, 'wb') as f:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+
+            os.replace(tmp_path, output_path)
+            write_download_metadata(output_path, url, response.headers)
+
+        logger.info(f"Arquivo baixado com sucesso: {output_path}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Exceção ao baixar arquivo: {str(e)}")
+        tmp_path.unlink(missing_ok=True)
+        return False
+
+
+async def find_anexo_urls(client):
+    """Busca os links dos anexos no HTML da página; usa o Selenium (em uma thread) se necessário"""
+    try:
+        response = await client.get(SITE_URL)
+        if response.status_code == 200:
+            anexo_urls = select_anexo_urls(page_links(response.text, str(response.url)))
+            if all(anexo_urls):
+                return anexo_urls
+    except Exception as e:
+        logger.warning(f"Erro ao buscar os links no HTML estático: {str(e)}")
+
+    logger.info("Links dos anexos não encontrados no HTML estático; usando o Selenium")
+    return await asyncio.to_thread(find_anexo_urls_selenium)
+
+
+async def find_and_download_anexos(client=None, directory=None):
+    """
+    Versão assíncrona de web_scraper.find_and_download_anexos: os dois anexos
+    são baixados simultaneamente
+    Retorna (caminho do Anexo I, caminho do Anexo II) ou (None, None)
+    """
+    directory = Path(directory or DOWNLOADS_DIR)
+
+    own_client = client is None
+    if own_client:
+        client = httpx.AsyncClient(timeout=SELENIUM_TIMEOUT, follow_redirects=True)
+
+    try:
+        anexo_i_url, anexo_ii_url = await find_anexo_urls(client)
+        if not anexo_i_url or not anexo_ii_url:
+            logger.error("Não foi possível encontrar os links dos anexos")
+            return None, None
+
+        anexo_i_path = directory / ANEXO_I_NAME
+        anexo_ii_path = directory / ANEXO_II_NAME
+
+        logger.info(f"Baixando os anexos: {anexo_i_url} | {anexo_ii_url}")
+        results = await asyncio.gather(download_file(client, anexo_i_url, anexo_i_path),
+                                       download_file(client, anexo_ii_url, anexo_ii_path))
+        if not all(results):
+            return None, None
+
+        return anexo_i_path, anexo_ii_path
+
+    finally:
+        if own_client:
+            await client.aclose()
+
+
+async def extract_rol(pdf_path, executor):
+    """Extrai o Rol de um PDF do Anexo I no pool de processos, sem bloquear o event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, extract_rol_dataframe, pdf_path)
+
+
+async def save_to_database(engine, df, revision=None):
+    """
+    Versão assíncrona de db_manager.save_to_database: a preparação dos dados
+    (pandas) é feita em uma thread e a gravação (save_prepared_revision) em uma
+    AsyncSession via run_sync, que fica só com o trabalho do ORM
+    Retorna True em caso de sucesso
+    """
+    async with AsyncSession(engine) as session:
+        try:
+            prepared = await asyncio.to_thread(prepare_revision, df, revision)
+            async with _write_lock():
+                revision_id = await session.run_sync(save_prepared_revision, prepared)
+                await session.commit()
+
+            notify_revision_saved(revision_id)
+            return True
+
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Erro ao inserir dados no banco de dados: {str(e)}")
+            return False
+
+
+async def process_rol_pdf(pdf_path, engine, executor, revision=None, previous=None):
+    """
+    Job de uma revisão do Rol: extrai o PDF no pool de processos e grava no banco
+    Vários jobs podem ser executados simultaneamente no mesmo event loop;
+    com previous (o job da revisão anterior), a gravação espera o fim desse job
+    """
+    rol_df = await extract_rol(pdf_path, executor)
+
+    if previous is not None:
+        await asyncio.wait([previous])
+
+    if rol_df is None:
+        logger.error(f"Não foi possível processar as tabelas do Rol: {pdf_path}")
+        return False
+
+    if revision is None:
+        revision = await asyncio.to_thread(build_revision_info, pdf_path)
+
+    return await save_to_database(engine, rol_df, revision)
+
+
+def _revision_date(revision):
+    """Data usada para ordenar as revisões (publicação ou, na falta dela, download)"""
+    return revision.get('data_publicacao') or revision['data_download']
+
+
+async def _prepare_database():
+    """Cria as tabelas e o índice de busca (DDL executada uma vez, em uma thread)"""
+    def prepare():
+        engine = setup_database()
+        if engine:
+            setup_search_index(engine)
+        return engine is not None
+
+    return await asyncio.to_thread(prepare)
+
+
+async def run_jobs(pdf_paths, max_workers=None):
+    """
+    Processa várias revisões do Rol simultaneamente em um único processo:
+    as extrações dividem um pool de processos e as cargas um engine assíncrono
+    As extrações são simultâneas, mas as gravações seguem a ordem cronológica
+    das revisões (save_revision rejeita uma revisão anterior à última carregada)
+    Retorna um dicionário PDF -> sucesso
+    """
+    if not await _prepare_database():
+        logger.error("Não foi possível configurar o banco de dados")
+        return {path: False for path in pdf_paths}
+
+    try:
+        revisions = await asyncio.gather(*(asyncio.to_thread(build_revision_info, path) for path in pdf_paths))
+    except Exception as e:
+        logger.error(f"Erro ao ler as informações das revisões: {str(e)}")
+        return {path: False for path in pdf_paths}
+
+    engine = create_async_db_engine()
+    max_workers = min(max_workers or PDF_MAX_WORKERS, max(len(pdf_paths), 1))
+
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+            jobs = [None] * len(pdf_paths)
+            previous = None
+            for i in sorted(range(len(pdf_paths)), key=lambda i: _revision_date(revisions[i])):
+                previous = jobs[i] = asyncio.create_task(
+                    process_rol_pdf(pdf_paths[i], engine, executor, revisions[i], previous))
+
+            results = await asyncio.gather(*jobs, return_exceptions=True)
+    finally:
+        await engine.dispose()
+
+    for path, result in zip(pdf_paths, results):
+        if isinstance(result, Exception):
+            logger.error(f"Erro no job de {path}: {str(result)}")
+
+    return {path: result is True for path, result in zip(pdf_paths, results)}
+
+
+async def run_pipeline(max_workers=None):
+    """
+    Versão assíncrona de main.main: baixa os anexos, extrai e grava o Rol
+    e processa as Diretrizes de Utilização sem bloquear o event loop
+    """
+    anexo_i_path, anexo_ii_path = await find_and_download_anexos()
+    if not anexo_i_path or not anexo_ii_path:
+        logger.error("Não foi possível baixar os anexos. Abortando.")
+        return False
+
+    # O texto do Anexo II é extraído enquanto o Rol é extraído e gravado
+    dut_task = asyncio.create_task(asyncio.to_thread(extract_pdf_text_parallel, anexo_ii_path))
+
+    results = await run_jobs([anexo_i_path], max_workers=max_workers)
+    if not results[anexo_i_path]:
+        logger.warning("Não foi possível salvar os dados no banco de dados.")
+
+    # As diretrizes são gravadas depois do Rol, pois são vinculadas aos seus procedimentos
+    try:
+        dut_df = parse_dut_entries(await dut_task)
+        if dut_df.empty or not await asyncio.to_thread(save_dut_to_database, dut_df):
+            logger.warning("Não foi possível processar o Anexo II.")
+    except Exception as e:
+        logger.warning(f"Não foi possível processar o Anexo II: {str(e)}")
+
+    return results[anexo_i_path]
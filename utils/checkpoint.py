@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import pickle
+from datetime import datetime
+from pathlib import Path
+
+from config.settings import CHECKPOINT_DIR
+from utils.downloads import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Etapas do pipeline, na ordem de execução
+STAGES = ['download', 'extract', 'clean', 'load', 'dut']
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def atomic_write(path, write):
+    """
+    Grava um arquivo de forma atômica: write(caminho_temporário) grava o conteúdo
+    e o arquivo final só é substituído depois de concluída a gravação
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+
+    write(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def save_pickle(obj, path):
+    """Grava um objeto Python (tabelas, DataFrames) em pickle de forma atômica"""
+    def write(tmp_path):
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return atomic_write(path, write)
+
+
+def load_pickle(path):
+    """Lê um objeto gravado por save_pickle"""
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def save_json(data, path):
+    """Grava um dicionário em JSON de forma atômica"""
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+
+    return atomic_write(path, write)
+
+
+class Checkpoints:
+    """
+    Pontos de controle das etapas do pipeline
+    O manifesto registra, para cada etapa concluída, o hash das entradas e das
+    saídas. Uma etapa é reaproveitada enquanto as entradas não mudarem e as
+    saídas continuarem íntegras; caso contrário ela (e as seguintes) é refeita
+    """
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or CHECKPOINT_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.directory / MANIFEST_FILE
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'stages': {}, 'run_complete': False}
+
+    def _save_manifest(self):
+        save_json(self.manifest, self.manifest_path)
+
+    def path(self, name):
+        """Caminho de um arquivo de saída dentro do diretório de checkpoints"""
+        return self.directory / name
+
+    def is_valid(self, stage, inputs=None):
+        """
+        Indica se a etapa foi concluída com as mesmas entradas (nome -> hash)
+        e se todas as suas saídas ainda existem com o hash registrado
+        """
+        entry = self.manifest['stages'].get(stage)
+        if entry is None:
+            return False
+
+        if entry['inputs'] != (inputs or {}):
+            logger.info(f"Checkpoint '{stage}' invalidado: entradas alteradas")
+            return False
+
+        for name, output in entry['outputs'].items():
+            path = Path(output['path'])
+            if not path.exists() or file_sha256(path) != output['sha256']:
+                logger.info(f"Checkpoint '{stage}' invalidado: saída '{name}' ausente ou alterada")
+                return False
+
+        return True
+
+    def outputs(self, stage):
+        """Caminhos das saídas registradas de uma etapa (nome -> Path)"""
+        entry = self.manifest['stages'].get(stage, {})
+        return {name: Path(output['path']) for name, output in entry.get('outputs', {}).items()}
+
+    def output_hash(self, stage, name):
+        """Hash registrado de uma saída da etapa (usado como entrada da etapa seguinte)"""
+        return self.manifest['stages'][stage]['outputs'][name]['sha256']
+
+    def complete(self, stage, inputs=None, outputs=None):
+        """Registra a etapa como concluída com suas entradas e saídas (nome -> caminho)"""
+        self.manifest['stages'][stage] = {
+            'inputs': inputs or {},
+            'outputs': {name: {'path': str(path), 'sha256': file_sha256(path)}
+                        for name, path in (outputs or {}).items()},
+            'concluido_em': datetime.now().isoformat(timespec='seconds'),
+        }
+        self.manifest['run_complete'] = False
+        self._save_manifest()
+
+    def invalidate(self, stage):
+        """Descarta o checkpoint da etapa e de todas as etapas seguintes"""
+        for name in STAGES[STAGES.index(stage):]:
+            self.manifest['stages'].pop(name, None)
+        self._save_manifest()
+
+    def start_run(self, force_stage=None):
+        """
+        Prepara uma execução: com force_stage a etapa e as seguintes são refeitas;
+        depois de uma execução concluída, os anexos são baixados novamente e as
+        demais etapas só são refeitas se o conteúdo dos PDFs mudar
+        """
+        if force_stage:
+            logger.info(f"Refazendo a partir da etapa '{force_stage}'")
+            self.invalidate(force_stage)
+        elif self.manifest.get('run_complete'):
+            self.manifest['stages'].pop('download', None)
+            self._save_manifest()
+
+    def finish_run(self):
+        """Marca a execução como concluída"""
+        self.manifest['run_complete'] = True
+        self._save_manifest()
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin, urlparse, unquote
+
+import requests
+
+from config.settings import SITE_URL, REVISIONS_DIR, ANEXO_I_PATTERN, ANEXO_II_PATTERN, CRAWLER_MAX_WORKERS, \
+    CRAWLER_PER_HOST, CRAWLER_DELAY, CRAWLER_MAX_DEPTH, CRAWLER_MAX_PAGES, CRAWLER_TIMEOUT
+from utils.downloads import write_download_metadata
+
+logger = logging.getLogger(__name__)
+
+# Manifesto das revisões baixadas (hash do conteúdo -> arquivo, URLs, ETag)
+MANIFEST_NAME = "manifest.json"
+
+# Links de PDF considerados anexos do Rol: os nomes publicados ou as palavras
+# "anexo"/"rol" isoladas (não como parte de "controle", "protocolo" etc.)
+ANNEX_PDF_PATTERN = re.compile(rf'{ANEXO_I_PATTERN}|{ANEXO_II_PATTERN}|(?<![a-z])(anexo|rol)(?![a-z])',
+                               re.IGNORECASE)
+
+# Páginas do mesmo site que podem listar anexos e RNs anteriores ("rol" isolado,
+# como em ANNEX_PDF_PATTERN)
+ARCHIVE_PAGE_PATTERN = re.compile(r'(?<![a-z])rol(?![a-z])|anexo|historico|resolucao-normativa|atualizacao',
+                                  re.IGNORECASE)
+
+USER_AGENT = "Mozilla/5.0 (compatible; ans-rol-crawler)"
+
+
+class _LinkParser(HTMLParser):
+    """Coleta os href de todos os elementos <a> de uma página"""
+
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href:
+                self.links.append(href)
+
+
+def page_links(html, base_url):
+    """Retorna os links absolutos (sem fragmento) dos elementos <a> de uma página HTML"""
+    parser = _LinkParser()
+    parser.feed(html)
+    return [urljoin(base_url, href).split('#', 1)[0] for href in parser.links]
+
+
+def annex_type(url):
+    """Classifica o link do anexo pelo nome do arquivo: anexo_i, anexo_ii ou outro"""
+    name = unquote(urlparse(url).path.rsplit('/', 1)[-1])
+    if ANEXO_II_PATTERN.lower() in name.lower() or re.search(r'anexo[_\s-]*ii\b', name, re.IGNORECASE):
+        return 'anexo_ii'
+    if ANEXO_I_PATTERN.lower() in name.lower() or re.search(r'anexo[_\s-]*i\b', name, re.IGNORECASE):
+        return 'anexo_i'
+    return 'outro'
+
+
+class PoliteFetcher:
+    """
+    Cliente HTTP compartilhado entre threads que limita as requisições
+    simultâneas por host e respeita um intervalo mínimo entre elas
+    """
+
+    def __init__(self, per_host=None, delay=None, timeout=None):
+        self.per_host = per_host or CRAWLER_PER_HOST
+        self.delay = CRAWLER_DELAY if delay is None else delay
+        self.timeout = timeout or CRAWLER_TIMEOUT
+        self._semaphores = defaultdict(lambda: threading.BoundedSemaphore(self.per_host))
+        self._last_request = defaultdict(float)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self):
+        """Uma sessão requests (conexões reutilizadas) por thread"""
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+            self._local.session.headers['User-Agent'] = USER_AGENT
+        return self._local.session
+
+    def _wait_turn(self, host):
+        """Aguarda o intervalo de cortesia desde a última requisição ao host"""
+        while True:
+            with self._lock:
+                wait = self._last_request[host] + self.delay - time.monotonic()
+                if wait <= 0:
+                    self._last_request[host] = time.monotonic()
+                    return
+            time.sleep(wait)
+
+    def get(self, url, **kwargs):
+        """GET com limite por host (resposta lida por inteiro)"""
+        with self.stream(url, **kwargs) as response:
+            # Lê o corpo enquanto a vaga do host está ocupada
+            _ = response.content
+            return response
+
+    @contextmanager
+    def stream(self, url, **kwargs):
+        """GET em stream; a vaga do host fica ocupada até o fim da leitura"""
+        host = urlparse(url).netloc
+        with self._semaphores[host]:
+            self._wait_turn(host)
+            response = self._session().get(url, timeout=self.timeout, stream=True, **kwargs)
+            try:
+                yield response
+            finally:
+                response.close()
+
+
+def load_manifest(directory=None):
+    """Lê o manifesto das revisões baixadas"""
+    path = Path(directory or REVISIONS_DIR) / MANIFEST_NAME
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, directory=None):
+    """Grava o manifesto de forma atômica"""
+    path = Path(directory or REVISIONS_DIR) / MANIFEST_NAME
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def collect_annex_links(start_url=None, fetcher=None, max_depth=None, max_pages=None):
+    """
+    Coleta todos os links de PDF de anexos na página da ANS e nas páginas de
+    arquivo do mesmo site ligadas a ela (até max_depth níveis)
+    Retorna a lista de URLs de PDFs, sem repetições
+    """
+    start_url = start_url or SITE_URL
+    fetcher = fetcher or PoliteFetcher()
+    max_depth = CRAWLER_MAX_DEPTH if max_depth is None else max_depth
+    max_pages = max_pages or CRAWLER_MAX_PAGES
+    host = urlparse(start_url).netloc
+
+    pdf_links = {}
+    visited = set()
+    frontier = [start_url]
+
+    for depth in range(max_depth + 1):
+        pages = [url for url in frontier if url not in visited][:max_pages - len(visited)]
+        if not pages:
+            break
+        visited.update(pages)
+
+        with ThreadPoolExecutor(max_workers=CRAWLER_MAX_WORKERS) as executor:
+            responses = list(executor.map(lambda url: _fetch_page_links(fetcher, url), pages))
+
+        frontier = []
+        for links in responses:
+            for link in links:
+                path = urlparse(link).path.lower()
+                if path.endswith('.pdf'):
+                    if ANNEX_PDF_PATTERN.search(unquote(path)):
+                        pdf_links.setdefault(link, None)
+                elif urlparse(link).netloc == host and ARCHIVE_PAGE_PATTERN.search(path):
+                    frontier.append(link)
+
+        logger.info(f"Nível {depth}: {len(pages)} páginas visitadas, {len(pdf_links)} PDFs de anexos encontrados")
+
+    return list(pdf_links)
+
+
+def _fetch_page_links(fetcher, url):
+    """Baixa uma página HTML e retorna os links absolutos (sem fragmento)"""
+    try:
+        response = fetcher.get(url)
+        if response.status_code != 200 or 'html' not in response.headers.get('Content-Type', 'text/html'):
+            return []
+
+        return page_links(response.text, url)
+    except Exception as e:
+        logger.warning(f"Erro ao acessar página {url}: {str(e)}")
+        return []
+
+
+def _download_revision(fetcher, url, directory, known_etags):
+    """
+    Baixa um PDF calculando o hash enquanto grava em um arquivo temporário
+    Retorna (url, hash, caminho temporário, headers) ou None se não mudou/falhou
+    """
+    headers = {}
+    if known_etags.get(url):
+        headers['If-None-Match'] = known_etags[url]
+
+    tmp_path = directory / f".{hashlib.sha1(url.encode()).hexdigest()}.part"
+    result = None
+    try:
+        with fetcher.stream(url, headers=headers) as response:
+            if response.status_code == 304:
+                logger.info(f"Sem alterações (ETag): {url}")
+            elif response.status_code != 200:
+                logger.error(f"Erro ao baixar {url}: {response.status_code}")
+            else:
+                digest = hashlib.sha256()
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        digest.update(chunk)
+                        f.write(chunk)
+
+                result = url, digest.hexdigest(), tmp_path, dict(response.headers)
+    except Exception as e:
+        logger.error(f"Exceção ao baixar {url}: {str(e)}")
+    finally:
+        # Sem download completo, não sobra arquivo temporário (nem de execuções anteriores)
+        if result is None:
+            tmp_path.unlink(missing_ok=True)
+
+    return result
+
+
+def download_revisions(urls, directory=None, fetcher=None):
+    """
+    Baixa os PDFs em paralelo (limitado por host), descarta conteúdos repetidos
+    pelo hash SHA-256 e grava cada revisão com nome versionado:
+    <nome original>_<hash[:12]>.pdf
+    Retorna o manifesto atualizado
+    """
+    directory = Path(directory or REVISIONS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    fetcher = fetcher or PoliteFetcher()
+
+    manifest = load_manifest(directory)
+    known_etags = {url: entry.get('etag') for entry in manifest.values() for url in entry['urls']}
+
+    with ThreadPoolExecutor(max_workers=CRAWLER_MAX_WORKERS) as executor:
+        results = list(executor.map(lambda url: _download_revision(fetcher, url, directory, known_etags), urls))
+
+    new_count = 0
+    for result in filter(None, results):
+        url, content_hash, tmp_path, headers = result
+
+        if content_hash in manifest:
+            # Mesmo conteúdo publicado em outra URL (ou novamente): não duplica o arquivo
+            tmp_path.unlink(missing_ok=True)
+            if url not in manifest[content_hash]['urls']:
+                manifest[content_hash]['urls'].append(url)
+            continue
+
+        stem = Path(unquote(urlparse(url).path)).stem
+        final_path = directory / f"{stem}_{content_hash[:12]}.pdf"
+        os.replace(tmp_path, final_path)
+        metadata = write_download_metadata(final_path, url, headers)
+
+        manifest[content_hash] = {
+            'arquivo': final_path.name,
+            'tipo': annex_type(url),
+            'urls': [url],
+            'etag': metadata['etag'],
+            'data_download': metadata['data_download'],
+        }
+        new_count += 1
+        logger.info(f"Nova revisão baixada: {final_path.name}")
+
+    save_manifest(manifest, directory)
+    logger.info(f"{new_count} novas revisões; {len(manifest)} revisões no total")
+    return manifest
+
+
+def crawl_revisions(start_url=None, directory=None):
+    """
+    Modo crawler: coleta todos os anexos publicados (atuais e históricos)
+    e baixa as revisões ainda não vistas
+    Retorna a lista de caminhos dos PDFs do Anexo I já baixados
+    As revisões não são gravadas no banco: main.py --crawl apenas as extrai
+    para CSV. Para carregá-las, use cli.py load em ordem cronológica (uma
+    revisão anterior à última carregada é rejeitada por save_revision)
+    """
+    directory = Path(directory or REVISIONS_DIR)
+    fetcher = PoliteFetcher()
+
+    urls = collect_annex_links(start_url, fetcher=fetcher)
+    manifest = download_revisions(urls, directory, fetcher=fetcher)
+
+    return [directory / entry['arquivo'] for entry in manifest.values() if entry['tipo'] == 'anexo_i']
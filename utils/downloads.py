@@ -0,0 +1,82 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Sufixo do arquivo com os metadados do download (URL, ETag, data)
+METADATA_SUFFIX = ".meta.json"
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Calcula o hash SHA-256 de um arquivo lendo-o em blocos"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def metadata_path(path):
+    """Caminho do arquivo de metadados de um download"""
+    path = Path(path)
+    return path.with_name(path.name + METADATA_SUFFIX)
+
+
+def write_download_metadata(path, url, headers=None):
+    """Grava ao lado do arquivo baixado a URL, o ETag e a data do download"""
+    headers = headers or {}
+    metadata = {
+        'url': url,
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'data_download': datetime.now().isoformat(timespec='seconds'),
+    }
+
+    try:
+        with open(metadata_path(path), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        logger.warning(f"Erro ao gravar metadados do download: {str(e)}")
+
+    return metadata
+
+
+def read_download_metadata(path):
+    """Lê os metadados gravados por write_download_metadata (vazio se não existirem)"""
+    try:
+        with open(metadata_path(path), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_revision_info(pdf_path):
+    """
+    Monta as informações da revisão do Rol para save_to_database:
+    hash do PDF de origem, URL, ETag, data do download e de publicação
+    """
+    metadata = read_download_metadata(pdf_path)
+    data_download = metadata.get('data_download')
+
+    return {
+        'pdf_hash': file_sha256(pdf_path),
+        'pdf_path': str(pdf_path),
+        'url': metadata.get('url'),
+        'etag': metadata.get('etag'),
+        'data_download': datetime.fromisoformat(data_download) if data_download else datetime.now(),
+        'data_publicacao': _parse_http_date(metadata.get('last_modified')),
+    }
+
+
+def _parse_http_date(value):
+    """Converte uma data HTTP (Last-Modified) em datetime local sem fuso, ou None"""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).astimezone().replace(tzinfo=None)
+    except (TypeError, ValueError):
+        return None
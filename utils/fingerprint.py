@@ -0,0 +1,30 @@
+import pandas as pd
+
+from config.settings import ROL_COLUMNS, FINGERPRINT_COLUMN
+
+
+def add_row_fingerprint(df, key_columns=None):
+    """
+    Adiciona a coluna FINGERPRINT com um hash estável de 64 bits das colunas-chave
+    normalizadas (texto sem espaços extras e em maiúsculas)
+    O hash é calculado de forma vetorizada com pd.util.hash_pandas_object
+    """
+    if key_columns is None:
+        key_columns = ROL_COLUMNS
+
+    normalized = pd.DataFrame(index=df.index)
+    for col in key_columns:
+        values = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+        normalized[col] = (values.astype('string')
+                           .fillna('')
+                           .str.replace(r'\s+', ' ', regex=True)
+                           .str.strip()
+                           .str.upper())
+
+    # O hash é armazenado com sinal para caber em colunas BIGINT do banco
+    hashes = pd.util.hash_pandas_object(normalized, index=False)
+    df = df.copy()
+    df[FINGERPRINT_COLUMN] = hashes.to_numpy().view('int64')
+
+    return df
+
@@ -0,0 +1,257 @@
+import logging
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Arquivos gravados por RolMatcher.save (arrays .npy podem ser mapeados em memória)
+ARRAY_FILES = ['trigrams', 'indptr', 'indices', 'row_lengths', 'name_hashes', 'hash_order']
+# Matriz dos trigramas frequentes, gravada para não ser recalculada em cada processo
+DENSE_FILES = ['dense_rank', 'dense_postings']
+ROWS_FILE = 'rol.pkl'
+
+# Quantidade de nomes processados por vez no casamento aproximado
+MATCH_CHUNK_SIZE = 512
+# Limite de células da matriz de similaridade (nomes x linhas do Rol) por lote
+MATCH_CELLS_PER_CHUNK = 4_000_000
+# Trigramas presentes em mais que esta fração das linhas usam uma matriz densa
+DENSE_TRIGRAM_FRACTION = 0.02
+
+
+def normalize_names(names):
+    """
+    Normaliza nomes de procedimentos de forma vetorizada: remove a hifenização
+    de quebra de linha do PDF, acentos, maiúsculas, pontuação e espaços repetidos
+    """
+    s = pd.Series(names, dtype='string').fillna('')
+
+    # "RESSO-\nNÂNCIA" ou "RESSO- NÂNCIA" -> "RESSONÂNCIA"
+    s = s.str.replace(r'(\w)-\s+(\w)', r'\1\2', regex=True)
+
+    s = (s.str.normalize('NFKD')
+         .str.replace('[\u0300-\u036f]', '', regex=True)
+         .str.lower()
+         .str.replace(r'[^\w]+', ' ', regex=True)
+         .str.strip())
+
+    return s
+
+
+def _trigrams(name):
+    """Retorna o conjunto de trigramas de um nome normalizado"""
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class RolMatcher:
+    """
+    Índice em memória para casar nomes de procedimentos com o Rol
+    Combina um índice exato (hash do nome normalizado) com um índice
+    invertido de trigramas para o casamento aproximado (similaridade de Jaccard)
+    """
+
+    def __init__(self, rol_df, trigrams, indptr, indices, row_lengths, name_hashes, hash_order,
+                 dense_rank=None, dense_postings=None):
+        self.rol = rol_df.reset_index(drop=True)
+        self.trigrams = trigrams
+        self.indptr = indptr
+        self.indices = indices
+        self.row_lengths = row_lengths
+        self.name_hashes = name_hashes
+        self.hash_order = hash_order
+
+        if dense_rank is None or dense_postings is None:
+            self._build_dense_postings()
+        else:
+            self.dense_rank = dense_rank
+            self.dense_postings = dense_postings
+
+    def _build_dense_postings(self):
+        """
+        Separa os trigramas muito frequentes (ex.: " de") em uma matriz densa
+        (trigramas x linhas), contada por multiplicação de matrizes em vez de
+        expandir suas listas invertidas longas
+        """
+        n_rows = len(self.rol)
+        doc_freq = np.diff(np.asarray(self.indptr))
+        dense_slots = np.flatnonzero(doc_freq > max(1, n_rows * DENSE_TRIGRAM_FRACTION))
+
+        self.dense_rank = np.full(len(self.trigrams), -1, dtype=np.int64)
+        self.dense_rank[dense_slots] = np.arange(len(dense_slots))
+        self.dense_postings = np.zeros((len(dense_slots), n_rows), dtype=np.float32)
+
+        counts = doc_freq[dense_slots]
+        starts = np.asarray(self.indptr)[dense_slots]
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+        self.dense_postings[np.repeat(np.arange(len(dense_slots)), counts), np.asarray(self.indices)[positions]] = 1
+
+    @classmethod
+    def build(cls, rol_df, name_column='procedimento'):
+        """Constrói o índice a partir do DataFrame retornado por query_database"""
+        rol_df = rol_df.reset_index(drop=True)
+        normalized = normalize_names(rol_df[name_column])
+
+        # Pares (trigrama, linha) de todas as linhas do Rol
+        row_trigrams = [_trigrams(name) for name in normalized]
+        row_lengths = np.fromiter((len(t) for t in row_trigrams), dtype=np.int32, count=len(row_trigrams))
+        pair_rows = np.repeat(np.arange(len(row_trigrams), dtype=np.int32), row_lengths)
+        pair_trigrams = np.array([t for grams in row_trigrams for t in grams], dtype='<U3')
+
+        # Vocabulário ordenado e listas invertidas no formato CSR
+        trigrams, trigram_ids = np.unique(pair_trigrams, return_inverse=True)
+        order = np.argsort(trigram_ids, kind='stable')
+        indices = pair_rows[order]
+        indptr = np.zeros(len(trigrams) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(trigram_ids, minlength=len(trigrams)), out=indptr[1:])
+
+        # Índice exato: hashes ordenados do nome normalizado
+        name_hashes = pd.util.hash_array(normalized.to_numpy(dtype=object))
+        hash_order = np.argsort(name_hashes, kind='stable').astype(np.int32)
+
+        logger.info(f"Índice de procedimentos criado: {len(rol_df)} linhas, {len(trigrams)} trigramas")
+        return cls(rol_df, trigrams, indptr, indices, row_lengths, name_hashes[hash_order], hash_order)
+
+    @classmethod
+    def from_database(cls):
+        """Constrói o índice a partir dos procedimentos gravados no banco de dados"""
+        from database.db_manager import query_database
+
+        rol_df = query_database()
+        if rol_df is None:
+            return None
+        return cls.build(rol_df)
+
+    def save(self, directory):
+        """Grava o índice em um diretório (arrays .npy + linhas do Rol)"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        for name in ARRAY_FILES + DENSE_FILES:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        with open(directory / ROWS_FILE, 'wb') as f:
+            pickle.dump(self.rol, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        logger.info(f"Índice de procedimentos salvo em: {directory}")
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        Carrega um índice salvo com save. Com mmap=True os arrays são mapeados
+        em memória e compartilhados entre processos pelo cache de páginas do SO
+        """
+        directory = Path(directory)
+        mmap_mode = 'r' if mmap else None
+
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in ARRAY_FILES}
+
+        # Índices salvos por versões anteriores não têm a matriz densa: ela é recalculada
+        if all((directory / f"{name}.npy").exists() for name in DENSE_FILES):
+            arrays.update({name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in DENSE_FILES})
+        with open(directory / ROWS_FILE, 'rb') as f:
+            rol_df = pickle.load(f)
+
+        return cls(rol_df, **arrays)
+
+    def _exact_lookup(self, normalized):
+        """Retorna a linha do Rol com o mesmo nome normalizado (-1 se não houver)"""
+        if len(self.name_hashes) == 0:
+            return np.full(len(normalized), -1, dtype=np.int64)
+
+        hashes = pd.util.hash_array(normalized.to_numpy(dtype=object))
+        pos = np.searchsorted(self.name_hashes, hashes)
+        pos = np.minimum(pos, len(self.name_hashes) - 1)
+        found = self.name_hashes[pos] == hashes
+        return np.where(found, self.hash_order[pos], -1)
+
+    def _fuzzy_lookup(self, normalized):
+        """Retorna a melhor linha e a similaridade de Jaccard por trigramas"""
+        best_rows = np.full(len(normalized), -1, dtype=np.int64)
+        best_scores = np.zeros(len(normalized), dtype=np.float64)
+        n_rows = len(self.rol)
+        if n_rows == 0 or len(self.trigrams) == 0:
+            return best_rows, best_scores
+
+        indices = np.asarray(self.indices)
+        row_lengths = np.asarray(self.row_lengths)
+
+        # Lote limitado para que a matriz (nomes x linhas do Rol) caiba na memória
+        chunk_size = max(1, min(MATCH_CHUNK_SIZE, MATCH_CELLS_PER_CHUNK // max(n_rows, 1)))
+
+        for start in range(0, len(normalized), chunk_size):
+            chunk = normalized[start:start + chunk_size]
+
+            query_grams = [_trigrams(name) for name in chunk]
+            query_lengths = np.array([len(g) for g in query_grams], dtype=np.int64)
+            grams = np.array([g for q in query_grams for g in q], dtype='<U3')
+            gram_queries = np.repeat(np.arange(len(chunk)), query_lengths)
+
+            # Mantém apenas os trigramas presentes no vocabulário do Rol
+            slot = np.minimum(np.searchsorted(self.trigrams, grams), len(self.trigrams) - 1)
+            known = self.trigrams[slot] == grams
+            slot, gram_queries = slot[known], gram_queries[known]
+
+            # Trigramas frequentes: contagem densa por multiplicação de matrizes
+            rank = self.dense_rank[slot]
+            is_dense = rank >= 0
+            query_dense = np.zeros((len(chunk), len(self.dense_postings)), dtype=np.float32)
+            query_dense[gram_queries[is_dense], rank[is_dense]] = 1
+            common = (query_dense @ self.dense_postings).astype(np.int64)
+
+            # Demais trigramas: expande as listas invertidas do lote
+            slot, gram_queries = slot[~is_dense], gram_queries[~is_dense]
+            starts = self.indptr[slot]
+            counts = self.indptr[slot + 1] - starts
+            total = int(counts.sum())
+            if total:
+                offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+                rows = indices[offsets + np.arange(total)]
+                queries = np.repeat(gram_queries, counts)
+                common += np.bincount(queries * n_rows + rows,
+                                      minlength=len(chunk) * n_rows).reshape(len(chunk), n_rows)
+
+            # Similaridade de Jaccard por par (nome, linha do Rol)
+            scores = common / (query_lengths[:, None] + row_lengths[None, :] - common)
+
+            # Melhor linha de cada nome
+            winners = scores.argmax(axis=1)
+            best_rows[start:start + len(chunk)] = winners
+            best_scores[start:start + len(chunk)] = scores[np.arange(len(chunk)), winners]
+
+        best_rows[best_scores == 0] = -1
+        return best_rows, best_scores
+
+    def match_batch(self, names, min_score=0.0):
+        """
+        Casa uma lista de nomes com o Rol
+        Retorna um DataFrame com o nome de entrada, a similaridade (1.0 para
+        casamento exato) e as colunas da melhor linha do Rol para cada nome
+        """
+        inputs = pd.Series(names, dtype='string').reset_index(drop=True)
+        normalized = normalize_names(inputs)
+
+        # Cada nome distinto é processado uma única vez
+        codes, uniques = pd.factorize(normalized)
+        uniques = pd.Series(uniques, dtype='string')
+
+        rows = self._exact_lookup(uniques)
+        scores = (rows >= 0).astype(np.float64)
+
+        pending = np.flatnonzero(rows < 0)
+        if len(pending):
+            fuzzy_rows, fuzzy_scores = self._fuzzy_lookup(uniques.iloc[pending].tolist())
+            rows[pending] = fuzzy_rows
+            scores[pending] = fuzzy_scores
+
+        rows = rows[codes]
+        scores = scores[codes]
+        rows[scores < min_score] = -1
+
+        matched = self.rol.reindex(rows).reset_index(drop=True)
+        matched.insert(0, 'score', np.where(rows >= 0, scores, 0.0))
+        matched.insert(0, 'nome', inputs)
+
+        return matched
@@ -1,17 +1,115 @@
+import re
+import sys
+import glob
+import inspect
+import shutil
+import tempfile
 import pandas as pd
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 import zipfile
 
-from docling.document_converter import DocumentConverter
-from docling_core.types.doc import TableItem, DocItemLabel
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
-from config.settings import OUTPUT_DIR, OUTPUT_CSV, OUTPUT_ZIP, ABBREVIATIONS
+from config.settings import OUTPUT_DIR, OUTPUT_CSV, OUTPUT_ZIP, ABBREVIATIONS, ROL_COLUMNS, FINGERPRINT_COLUMN, \
+    DUT_PAGES_PER_TASK, PDF_MAX_WORKERS, BATCH_OUTPUT_DIR, BATCH_DATASET, PDF_MEMORY_BUDGET_MB, \
+    PDF_PAGES_PER_CHUNK, PDF_STAGING_DIR
+from utils.downloads import file_sha256
+from utils.fingerprint import add_row_fingerprint
+
+# Início de uma diretriz no Anexo II: "12. NOME DO PROCEDIMENTO"
+DUT_HEADING_PATTERN = re.compile(r'^\s*(\d{1,3})\s*[.\-–]\s+(.+?)\s*$')
+
+# Hierarquia do Rol, do nível mais alto ao mais baixo (células mescladas vêm vazias)
+HIERARCHY_LEVELS = ['CAPÍTULO', 'GRUPO', 'SUBGRUPO']
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Conversor do Docling reaproveitado por todas as conversões do processo
+_converter = None
+
+
+def get_converter():
+    """Retorna o DocumentConverter do processo, criando-o (e carregando os modelos) na primeira chamada"""
+    global _converter
+    if _converter is None:
+        # O Docling (e seus modelos) só é importado quando há um PDF para converter
+        from docling.document_converter import DocumentConverter
+
+        _converter = DocumentConverter()
+    return _converter
+
+
+def _init_worker():
+    """Inicializador dos processos do pool: carrega o conversor uma única vez por processo"""
+    get_converter()
+
+
+def peak_rss_mb(include_children=False):
+    """
+    Pico de memória residente (RSS) do processo em MiB, ou None onde o módulo
+    resource não existe. include_children considera também o maior processo filho
+    """
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if include_children:
+        peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+    # ru_maxrss é medido em KiB no Linux e em bytes no macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def _page_ranges(pdf_path, pages_per_chunk):
+    """Faixas de páginas (inclusivas, a partir de 1) da conversão; [None] converte o PDF inteiro"""
+    if not pages_per_chunk or 'page_range' not in inspect.signature(get_converter().convert).parameters:
+        return [None]
+
+    from PyPDF2 import PdfReader
+
+    total_pages = len(PdfReader(str(pdf_path)).pages)
+    return [(start, min(start + pages_per_chunk - 1, total_pages))
+            for start in range(1, total_pages + 1, pages_per_chunk)]
+
+
+def iter_pdf_tables(pdf_path, pages_per_chunk=None):
+    """
+    Converte o PDF com o Docling em faixas de páginas e gera as tabelas de cada
+    faixa como DataFrames. O documento de uma faixa é liberado antes da conversão
+    da seguinte (versões do Docling sem page_range convertem o PDF inteiro)
+    """
+    from docling_core.types.doc import TableItem
+
+    converter = get_converter()
+    pages_per_chunk = PDF_PAGES_PER_CHUNK if pages_per_chunk is None else pages_per_chunk
+
+    for page_range in _page_ranges(pdf_path, pages_per_chunk):
+        options = {'page_range': page_range} if page_range else {}
+        result = converter.convert(pdf_path, **options)
+        items = [item for item, _ in result.document.iterate_items() if isinstance(item, TableItem)]
+
+        # Só as tabelas são mantidas: páginas e imagens da faixa são liberadas aqui
+        del result
+        if page_range:
+            logger.info(f"Páginas {page_range[0]}-{page_range[1]}: {len(items)} tabelas")
+
+        for item in items:
+            try:
+                table_df = item.export_to_dataframe()
+            except Exception as e:
+                logger.warning(f"Erro ao converter tabela para DataFrame: {str(e)}")
+                continue
+
+            logger.debug(f"Tabela encontrada com {len(table_df)} linhas e {len(table_df.columns)} colunas")
+            yield table_df
+
 
 def extract_tables_from_pdf(pdf_path):
     """
@@ -21,25 +119,8 @@ def extract_tables_from_pdf(pdf_path):
     logger.info(f"Processando o PDF: {pdf_path}")
 
     try:
-        # Converter o PDF usando Docling
-        converter = DocumentConverter()
-        result = converter.convert(pdf_path)
-
-        # Lista para armazenar todas as tabelas encontradas
-        all_tables = []
-
         logger.info("Extraindo tabelas do documento...")
-
-        # Itera por todos os itens no documento
-        for item, _ in result.document.iterate_items():
-            if isinstance(item, TableItem):
-                # Converte a tabela para DataFrame
-                try:
-                    table_df = item.export_to_dataframe()
-                    all_tables.append(table_df)
-                    logger.debug(f"Tabela encontrada com {len(table_df)} linhas e {len(table_df.columns)} colunas")
-                except Exception as e:
-                    logger.warning(f"Erro ao converter tabela para DataFrame: {str(e)}")
+        all_tables = list(iter_pdf_tables(pdf_path))
 
         logger.info(f"Total de {len(all_tables)} tabelas encontradas no documento")
         return all_tables
@@ -49,6 +130,24 @@ def extract_tables_from_pdf(pdf_path):
         return []
 
 
+def is_rol_table(table):
+    """
+    Verifica se é uma tabela do Rol de Procedimentos
+    Critérios: número de colunas, cabeçalhos específicos
+    """
+    # Se tiver mais de 8 colunas e algumas colunas chave
+    if len(table.columns) < 8:
+        return False
+
+    # Converte todos os cabeçalhos para string para busca
+    headers = [str(col).upper() for col in table.columns]
+
+    # Verifica se contém cabeçalhos relacionados ao Rol
+    return any('PROCEDIMENTO' in h for h in headers) or \
+        any('RN' in h for h in headers) or \
+        any('GRUPO' in h for h in headers)
+
+
 def identify_rol_tables(tables):
     """
     Identifica quais tabelas contêm dados do Rol de Procedimentos
@@ -57,24 +156,142 @@ def identify_rol_tables(tables):
     relevant_tables = []
 
     for i, table in enumerate(tables):
-        # Verifica se é uma tabela do Rol de Procedimentos
-        # Critérios: número de colunas, cabeçalhos específicos
+        if is_rol_table(table):
+            relevant_tables.append(table)
+            logger.info(f"Tabela {i} identificada como relevante: {len(table)} linhas")
 
-        # Se tiver mais de 8 colunas e algumas colunas chave
-        if len(table.columns) >= 8:
-            # Converte todos os cabeçalhos para string para busca
-            headers = [str(col).upper() for col in table.columns]
+    return relevant_tables
 
-            # Verifica se contém cabeçalhos relacionados ao Rol
-            has_relevant_headers = any('PROCEDIMENTO' in h for h in headers) or \
-                                   any('RN' in h for h in headers) or \
-                                   any('GRUPO' in h for h in headers)
 
-            if has_relevant_headers:
-                relevant_tables.append(table)
-                logger.info(f"Tabela {i} identificada como relevante: {len(table)} linhas")
+def _staging_frame(df):
+    """
+    Prepara uma tabela para a área temporária: nomes de coluna em texto e sem
+    repetição (o Arrow não aceita colunas repetidas) e células como texto,
+    para que o esquema dos Parquets seja compatível entre as tabelas
+    """
+    names = []
+    seen = {}
+    for col in df.columns:
+        name = str(col)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+
+    df = df.set_axis(names, axis=1)
+    return df.astype('string')
+
+
+class TableStaging:
+    """
+    Acumula as tabelas extraídas enquanto cabem no orçamento de memória; ao
+    excedê-lo, as tabelas em memória são gravadas em um Parquet da área
+    temporária e liberadas. tables() devolve as tabelas originais se o
+    orçamento nunca foi excedido, ou a tabela unificada a partir dos Parquets
+    """
 
-    return relevant_tables
+    def __init__(self, budget_bytes, staging_dir=None):
+        self.budget_bytes = budget_bytes
+        self.base_dir = Path(staging_dir or PDF_STAGING_DIR)
+        self.staging_dir = None
+        self.spilled = []
+        self.count = 0
+        self._tables = []
+        self._bytes = 0
+
+    def add(self, df):
+        self._tables.append(df)
+        self._bytes += int(df.memory_usage(index=False, deep=True).sum())
+        self.count += 1
+
+        if self._bytes > self.budget_bytes:
+            self.spill()
+
+    def spill(self):
+        """Grava as tabelas em memória em um Parquet da área temporária"""
+        import pyarrow.parquet as pq
+
+        if not self._tables:
+            return
+
+        if self.staging_dir is None:
+            self.base_dir.mkdir(parents=True, exist_ok=True)
+            self.staging_dir = Path(tempfile.mkdtemp(prefix='rol_', dir=self.base_dir))
+
+        path = self.staging_dir / f"{len(self.spilled):05d}.parquet"
+        pq.write_table(self._to_arrow(self._tables), path)
+        self.spilled.append(path)
+
+        logger.info(f"{len(self._tables)} tabelas ({self._bytes / 1024 / 1024:.1f} MiB) gravadas em {path}")
+        self._tables = []
+        self._bytes = 0
+
+    @staticmethod
+    def _to_arrow(tables):
+        import pyarrow as pa
+
+        return pa.concat_tables([pa.Table.from_pandas(_staging_frame(df), preserve_index=False) for df in tables],
+                                promote_options='default')
+
+    def tables(self):
+        """
+        Tabelas acumuladas: as originais, sem conversão, se nada foi gravado em
+        disco; caso contrário, uma única tabela unificada (colunas como texto)
+        """
+        if not self.spilled:
+            tables, self._tables = self._tables, []
+            return tables
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tables = [pq.read_table(path) for path in self.spilled]
+        if self._tables:
+            tables.append(self._to_arrow(self._tables))
+        self._tables = []
+
+        combined = pa.concat_tables(tables, promote_options='default')
+        del tables
+
+        # self_destruct libera cada coluna Arrow assim que ela é convertida
+        return [combined.to_pandas(self_destruct=True, split_blocks=True)]
+
+    def cleanup(self):
+        """Remove os Parquets da área temporária"""
+        if self.staging_dir is not None:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+
+def extract_rol_tables(pdf_path, memory_budget_mb=None):
+    """
+    Extrai as tabelas do Rol de um PDF do Anexo I
+    Com orçamento de memória (PDF_MEMORY_BUDGET_MB > 0), as tabelas só vão para
+    Parquets temporários se o excederem; nesse caso a lista retornada tem uma
+    única tabela já unificada (colunas como texto). Dentro do orçamento, ou sem
+    ele, retorna as tabelas relevantes do PDF como extraídas
+    """
+    budget_mb = PDF_MEMORY_BUDGET_MB if memory_budget_mb is None else memory_budget_mb
+    if not budget_mb:
+        return identify_rol_tables(extract_tables_from_pdf(pdf_path))
+
+    logger.info(f"Processando o PDF: {pdf_path} (orçamento de memória: {budget_mb} MiB)")
+    staging = TableStaging(budget_mb * 1024 * 1024)
+    try:
+        for table in iter_pdf_tables(pdf_path):
+            if is_rol_table(table):
+                staging.add(table)
+
+        tables = staging.tables()
+    except Exception as e:
+        logger.error(f"Erro ao processar o PDF: {str(e)}")
+        return []
+    finally:
+        staging.cleanup()
+
+    logger.info(f"{staging.count} tabelas do Rol extraídas ({len(staging.spilled)} Parquets temporários)")
+    return tables
 
 
 def process_rol_tables(tables):
@@ -108,22 +325,62 @@ def clean_table_data(df):
     if column_mapping:
         df = df.rename(columns=column_mapping)
 
-    # Padroniza os nomes das colunas
-    std_cols = ['PROCEDIMENTO', 'RN', 'VIGÊNCIA', 'OD', 'AMB', 'HCO', 'HSO',
-                'REF', 'PAC', 'DUT', 'SUBGRUPO', 'GRUPO', 'CAPÍTULO']
-
     # Garante que todas as colunas necessárias existem
-    for col in std_cols:
+    for col in ROL_COLUMNS:
         if col not in df.columns:
             df[col] = None
 
+    # Normaliza o texto das células, remove cabeçalhos repetidos e preenche a hierarquia
+    df = normalize_table_text(df)
+
     # Substitui abreviações pelas descrições completas
     for col, full_name in ABBREVIATIONS.items():
         if col in df.columns:
-            df[col] = df[col].apply(lambda x: full_name if pd.notna(x) and x == col else x)
+            df[col] = df[col].mask((df[col] == col).fillna(False), full_name)
 
-    # Remove linhas duplicadas
-    df = df.drop_duplicates()
+    # Remove linhas duplicadas usando o hash das colunas normalizadas
+    df = add_row_fingerprint(df)
+    df = df[~df[FINGERPRINT_COLUMN].duplicated()]
+
+    return df
+
+
+def normalize_table_text(df):
+    """
+    Normaliza as colunas do Rol de forma vetorizada (sem apply por linha):
+    remove a hifenização de quebra de linha, junta espaços repetidos e aplica
+    a forma Unicode NFC; descarta os cabeçalhos repetidos a cada página e
+    preenche capítulo/grupo/subgrupo nas linhas das células mescladas
+    """
+    df = df.copy()
+    for col in ROL_COLUMNS:
+        # Só os valores distintos são normalizados: fora o nome do procedimento,
+        # as colunas repetem poucos valores
+        codes, uniques = pd.factorize(df[col])
+        text = (pd.Series(uniques, dtype='string')
+                .str.replace(r'(\w)-\s+(\w)', r'\1\2', regex=True)
+                .str.replace(r'\s+', ' ', regex=True)
+                .str.strip()
+                .str.normalize('NFC'))
+        text = text.mask(text == '')
+        df[col] = pd.Series(text.array.take(codes, allow_fill=True), index=df.index)
+
+    # Linha de cabeçalho: o procedimento ou pelo menos duas colunas de texto trazem o
+    # próprio nome da coluna (as de segmento trazem a sigla também nas linhas de dados)
+    text_columns = [col for col in ROL_COLUMNS if col not in ABBREVIATIONS]
+    header_cells = pd.concat([(df[col].str.upper() == col).fillna(False) for col in text_columns], axis=1)
+    header_rows = header_cells['PROCEDIMENTO'] | (header_cells.astype(int).sum(axis=1) >= 2)
+    if header_rows.any():
+        logger.info(f"{int(header_rows.sum())} linhas de cabeçalho repetido removidas")
+        df = df[~header_rows]
+
+    # Cada nível é preenchido dentro do bloco do nível acima: um capítulo novo
+    # não herda o grupo do capítulo anterior
+    block = pd.Series(0, index=df.index)
+    for col in HIERARCHY_LEVELS:
+        df[col] = df[col].groupby(block).ffill()
+        changed = (df[col] != df[col].shift()).fillna(True).to_numpy(dtype=bool)
+        block = block + changed.cumsum()
 
     return df
 
@@ -160,10 +417,10 @@ def identify_columns(df):
             mapping[col] = 'PAC'
         elif any(col_content.str.contains('DUT')):
             mapping[col] = 'DUT'
-        elif any(col_content.str.contains('GRUP')):
-            mapping[col] = 'GRUPO'
         elif any(col_content.str.contains('SUBGRUP')):
             mapping[col] = 'SUBGRUPO'
+        elif any(col_content.str.contains('GRUP')):
+            mapping[col] = 'GRUPO'
         elif any(col_content.str.contains('CAP')):
             mapping[col] = 'CAPÍTULO'
 
@@ -176,7 +433,8 @@ def save_to_csv(df, csv_path=None):
         csv_path = OUTPUT_DIR / OUTPUT_CSV
 
     try:
-        df.to_csv(csv_path, index=False, encoding='utf-8-sig')
+        # A impressão digital é interna (deduplicação e revisões no banco): não é publicada
+        df.drop(columns=[FINGERPRINT_COLUMN], errors='ignore').to_csv(csv_path, index=False, encoding='utf-8-sig')
         logger.info(f"Dados salvos em: {csv_path}")
         return csv_path
     except Exception as e:
@@ -203,20 +461,31 @@ def create_output_zip(csv_path=None, zip_path=None):
         return None
 
 
-def process_anexo_i(pdf_path):
+def extract_rol_dataframe(pdf_path):
     """
-    Processa o PDF do Anexo I, extrai a tabela do Rol de Procedimentos,
-    aplica transformações e salva os resultados
+    Extrai, identifica e unifica as tabelas do Rol de um PDF do Anexo I
+    Retorna o DataFrame limpo ou None
     """
-    # Extrai todas as tabelas do PDF
-    all_tables = extract_tables_from_pdf(pdf_path)
-
-    # Identifica as tabelas relevantes do Rol
-    rol_tables = identify_rol_tables(all_tables)
+    # Extrai as tabelas relevantes do Rol (com memória limitada)
+    rol_tables = extract_rol_tables(pdf_path)
 
     # Processa e unifica as tabelas
     rol_df = process_rol_tables(rol_tables)
 
+    peak = peak_rss_mb()
+    if peak is not None:
+        logger.info(f"Pico de memória (RSS) do processo: {peak:.0f} MiB")
+
+    return rol_df
+
+
+def process_anexo_i(pdf_path):
+    """
+    Processa o PDF do Anexo I, extrai a tabela do Rol de Procedimentos,
+    aplica transformações e salva os resultados
+    """
+    rol_df = extract_rol_dataframe(pdf_path)
+
     if rol_df is not None:
         # Salva o DataFrame em CSV
         csv_path = save_to_csv(rol_df)
@@ -227,4 +496,270 @@ def process_anexo_i(pdf_path):
         return rol_df, csv_path, zip_path
     else:
         logger.error("Não foi possível processar as tabelas do Rol de Procedimentos")
-        return None, None, None
\ No newline at end of file
+        return None, None, None
+
+
+def _extract_revision(pdf_path, output_dir):
+    """Extrai uma revisão do Anexo I e grava o CSV com o nome do PDF (processo do pool)"""
+    rol_df = extract_rol_dataframe(pdf_path)
+    if rol_df is None:
+        return None
+
+    csv_path = Path(output_dir) / f"{Path(pdf_path).stem}.csv"
+    return save_to_csv(rol_df, csv_path)
+
+
+def extract_revisions(pdf_paths, output_dir=None, max_workers=None):
+    """
+    Extrai várias revisões do Anexo I em um pool de processos
+    Retorna um dicionário PDF -> CSV gerado (None quando a extração falha)
+    """
+    output_dir = Path(output_dir or OUTPUT_DIR / "revisoes")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    max_workers = min(max_workers or PDF_MAX_WORKERS, max(len(pdf_paths), 1))
+
+    logger.info(f"Extraindo {len(pdf_paths)} revisões do Anexo I com {max_workers} processos")
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        futures = {executor.submit(_extract_revision, path, output_dir): path for path in pdf_paths}
+        for future, path in futures.items():
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                logger.error(f"Erro ao extrair a revisão {path}: {str(e)}")
+                results[path] = None
+
+    logger.info(f"{sum(r is not None for r in results.values())}/{len(pdf_paths)} revisões extraídas")
+    return results
+
+
+def resolve_pdf_inputs(source):
+    """
+    Lista os PDFs de um diretório ou de um padrão glob (ex.: "downloads/*.pdf")
+    Retorna os caminhos ordenados, sem repetições
+    """
+    path = Path(source)
+    if path.is_dir():
+        # A extensão é comparada sem diferenciar maiúsculas (ex.: ANEXO_I.PDF)
+        paths = path.iterdir()
+    elif path.is_file():
+        paths = [path]
+    else:
+        paths = (Path(p) for p in glob.glob(str(source), recursive=True))
+
+    return sorted({p.resolve() for p in paths if p.suffix.lower() == '.pdf'})
+
+
+def _extract_batch_item(pdf_path, pdf_hash, output_dir):
+    """
+    Extrai o Rol de um PDF do lote e grava um Parquet nomeado pelo hash do PDF
+    (processo do pool). PDFs já extraídos são reaproveitados
+    Retorna (caminho do Parquet, total de linhas)
+    """
+    parquet_path = Path(output_dir) / f"{pdf_hash[:16]}.parquet"
+
+    if parquet_path.exists():
+        return parquet_path, None
+
+    rol_df = extract_rol_dataframe(pdf_path)
+    if rol_df is None:
+        return None, 0
+
+    # Colunas do Rol como texto para um esquema Parquet único entre os arquivos
+    table = rol_df[ROL_COLUMNS].astype('string')
+    table[FINGERPRINT_COLUMN] = rol_df[FINGERPRINT_COLUMN].to_numpy()
+    table['PDF_HASH'] = pdf_hash
+    table['PDF_ARQUIVO'] = Path(pdf_path).name
+
+    # Grava em arquivo temporário e renomeia para não deixar Parquets incompletos
+    tmp_path = parquet_path.with_suffix('.parquet.tmp')
+    table.to_parquet(tmp_path, index=False)
+    tmp_path.replace(parquet_path)
+
+    return parquet_path, len(table)
+
+
+def process_batch(source, output_dir=None, max_workers=None):
+    """
+    Processa em lote os PDFs do Anexo I de um diretório ou padrão glob em um
+    pool de processos (um conversor do Docling por processo). Cada PDF gera um
+    Parquet nomeado pelo seu hash e, ao final, os resultados são reunidos em
+    um único dataset Parquet
+    Retorna o caminho do dataset ou None
+    """
+    pdf_paths = resolve_pdf_inputs(source)
+    if not pdf_paths:
+        logger.error(f"Nenhum PDF encontrado em: {source}")
+        return None
+
+    output_dir = Path(output_dir or BATCH_OUTPUT_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # PDFs com o mesmo conteúdo são extraídos uma única vez
+    unique_pdfs = {}
+    for path in pdf_paths:
+        unique_pdfs.setdefault(file_sha256(path), path)
+
+    total = len(unique_pdfs)
+    max_workers = min(max_workers or PDF_MAX_WORKERS, total)
+    logger.info(f"Processando {total} PDFs distintos ({len(pdf_paths)} arquivos) em lote com {max_workers} processos")
+
+    parquet_paths = []
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        futures = {executor.submit(_extract_batch_item, path, pdf_hash, output_dir): path
+                   for pdf_hash, path in unique_pdfs.items()}
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                parquet_path, rows = future.result()
+            except Exception as e:
+                logger.error(f"[{done}/{total}] Erro ao processar {path.name}: {str(e)}")
+                failures += 1
+                continue
+
+            if parquet_path is None:
+                logger.error(f"[{done}/{total}] Nenhuma tabela do Rol em {path.name}")
+                failures += 1
+                continue
+
+            if rows is None:
+                logger.info(f"[{done}/{total}] {path.name}: já processado ({parquet_path.name})")
+            else:
+                logger.info(f"[{done}/{total}] {path.name}: {rows} linhas -> {parquet_path.name}")
+            parquet_paths.append(parquet_path)
+
+    logger.info(f"Lote concluído: {len(parquet_paths)} PDFs extraídos, {failures} falhas")
+
+    peak = peak_rss_mb(include_children=True)
+    if peak is not None:
+        logger.info(f"Pico de memória (RSS) do maior processo do lote: {peak:.0f} MiB")
+    if not parquet_paths:
+        return None
+
+    return combine_batch_outputs(parquet_paths, output_dir / BATCH_DATASET)
+
+
+def combine_batch_outputs(parquet_paths, dataset_path):
+    """Reúne os Parquets do lote em um único arquivo Parquet"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        tables = [pq.read_table(path) for path in sorted(parquet_paths)]
+        combined = pa.concat_tables(tables, promote_options='default')
+        pq.write_table(combined, dataset_path)
+
+        logger.info(f"Dataset combinado salvo em: {dataset_path} ({combined.num_rows} linhas)")
+        return dataset_path
+    except Exception as e:
+        logger.error(f"Erro ao combinar os resultados do lote: {str(e)}")
+        return None
+
+
+def extract_pages_text(pdf_path, start, end):
+    """Extrai o texto das páginas [start, end) de um PDF (executado nos processos do pool)"""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(str(pdf_path))
+    return [reader.pages[i].extract_text() or '' for i in range(start, end)]
+
+
+def extract_pdf_text_parallel(pdf_path, pages_per_task=None, max_workers=None):
+    """
+    Extrai o texto de todas as páginas do PDF dividindo-o em faixas de páginas
+    processadas em paralelo por um pool de processos
+    Retorna a lista de textos das páginas, na ordem do documento
+    """
+    from PyPDF2 import PdfReader
+
+    pages_per_task = pages_per_task or DUT_PAGES_PER_TASK
+    max_workers = max_workers or PDF_MAX_WORKERS
+
+    total_pages = len(PdfReader(str(pdf_path)).pages)
+    ranges = [(start, min(start + pages_per_task, total_pages))
+              for start in range(0, total_pages, pages_per_task)]
+    logger.info(f"Extraindo texto de {total_pages} páginas em {len(ranges)} faixas ({max_workers} processos)")
+
+    pages = []
+    if max_workers <= 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            pages.extend(extract_pages_text(pdf_path, start, end))
+        return pages
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(extract_pages_text, pdf_path, start, end) for start, end in ranges]
+        for future in futures:
+            pages.extend(future.result())
+
+    return pages
+
+
+def _is_dut_heading(title):
+    """Títulos de diretrizes são escritos em maiúsculas; critérios numerados não"""
+    letters = [c for c in title if c.isalpha()]
+    return len(letters) >= 3 and sum(c.isupper() for c in letters) / len(letters) >= 0.8
+
+
+def parse_dut_entries(pages):
+    """
+    Divide o texto do Anexo II em diretrizes de utilização
+    Retorna um DataFrame com as colunas NUMERO, PROCEDIMENTO e CRITERIOS
+    """
+    entries = {}
+    current = None
+
+    for line in '\n'.join(pages).splitlines():
+        match = DUT_HEADING_PATTERN.match(line)
+
+        # Uma nova diretriz tem título em maiúsculas e um número ainda não visto;
+        # saltos e inversões na numeração são registrados e a leitura continua
+        if match and _is_dut_heading(match.group(2)):
+            number = int(match.group(1))
+            if number not in entries:
+                if current is not None and number != current['NUMERO'] + 1:
+                    logger.warning(f"Diretriz {number} encontrada após a {current['NUMERO']} "
+                                   f"(numeração fora de sequência)")
+                current = {'NUMERO': number, 'PROCEDIMENTO': match.group(2), 'CRITERIOS': []}
+                entries[number] = current
+                continue
+
+            logger.warning(f"Título da diretriz {number} repetido mantido nos critérios da "
+                           f"diretriz {current['NUMERO']}: {line.strip()}")
+
+        if current is not None and line.strip():
+            current['CRITERIOS'].append(line.strip())
+
+    entries = [entries[number] for number in sorted(entries)]
+    for entry in entries:
+        entry['CRITERIOS'] = '\n'.join(entry['CRITERIOS'])
+
+    logger.info(f"Total de {len(entries)} diretrizes de utilização encontradas")
+    return pd.DataFrame(entries, columns=['NUMERO', 'PROCEDIMENTO', 'CRITERIOS'])
+
+
+def process_anexo_ii(pdf_path, max_workers=None):
+    """
+    Processa o PDF do Anexo II (Diretrizes de Utilização): extrai o texto em
+    paralelo por faixas de páginas, separa as diretrizes e as grava no banco
+    vinculadas aos procedimentos do Rol que possuem DUT
+    """
+    from database.db_manager import save_dut_to_database
+
+    try:
+        pages = extract_pdf_text_parallel(pdf_path, max_workers=max_workers)
+    except Exception as e:
+        logger.error(f"Erro ao extrair texto do Anexo II: {str(e)}")
+        return None
+
+    dut_df = parse_dut_entries(pages)
+    if dut_df.empty:
+        logger.error("Nenhuma diretriz de utilização encontrada no Anexo II")
+        return None
+
+    if not save_dut_to_database(dut_df):
+        logger.warning("Não foi possível salvar as diretrizes no banco de dados.")
+
+    return dut_df
@@ -0,0 +1,165 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config.settings import ROL_COLUMNS, ABBREVIATIONS
+
+logger = logging.getLogger(__name__)
+
+# Colunas de segmentação: mudanças são classificadas como adicionado/removido
+SEGMENT_FLAGS = list(ABBREVIATIONS)
+
+# Colunas comparadas entre as revisões (a chave é o nome do procedimento)
+COMPARED_COLUMNS = [c for c in ROL_COLUMNS if c != 'PROCEDIMENTO']
+
+# Colunas do changelog
+CHANGELOG_COLUMNS = ['procedimento', 'tipo', 'coluna', 'alteracao', 'valor_anterior', 'valor_novo']
+
+EMPTY_VALUES = ['', 'None', 'nan', 'NaN']
+
+
+def _normalize_column(values):
+    """
+    Limpa os valores de uma coluna (espaços, vazios); as operações de texto são
+    aplicadas só aos valores distintos e expandidas pelos códigos da factorização
+    """
+    codes, uniques = pd.factorize(values)
+    cleaned = (pd.Series(uniques, dtype=object).astype('string')
+               .str.replace(r'\s+', ' ', regex=True)
+               .str.strip())
+    cleaned = cleaned.where(~cleaned.isin(EMPTY_VALUES), '')
+
+    # Código -1 (valor ausente) aponta para o último elemento: ''
+    cleaned = pd.concat([cleaned, pd.Series([''], dtype='string')], ignore_index=True)
+    return cleaned.array.take(codes)
+
+
+def _prepare(df):
+    """
+    Padroniza o DataFrame (aceita também a saída de query_database, em minúsculas)
+    com os valores de texto limpos de todas as colunas do Rol
+    """
+    lower_to_upper = {c.lower(): c for c in ROL_COLUMNS}
+    lower_to_upper['vigencia'] = 'VIGÊNCIA'
+    lower_to_upper['capitulo'] = 'CAPÍTULO'
+    df = df.rename(columns=lambda c: lower_to_upper.get(c, c))
+
+    values = {}
+    for column in ROL_COLUMNS:
+        column_values = df[column] if column in df.columns else pd.Series(None, index=df.index, dtype=object)
+        values[column] = _normalize_column(column_values)
+
+    return pd.DataFrame(values)
+
+
+def _keys(old, new):
+    """
+    Chave de junção das duas revisões: o nome normalizado (maiúsculas) é
+    codificado por uma única tabela hash (factorização conjunta) e combinado
+    com a ordem de ocorrência do nome, para nomes repetidos no Rol
+    """
+    names = pd.concat([old['PROCEDIMENTO'], new['PROCEDIMENTO']], ignore_index=True).str.upper()
+    codes = pd.factorize(names)[0].astype(np.int64)
+    n_names = int(codes.max()) + 1 if len(codes) else 1
+
+    keys = []
+    for part in (codes[:len(old)], codes[len(old):]):
+        occurrence = pd.Series(part).groupby(part, sort=False).cumcount().to_numpy()
+        keys.append(occurrence * n_names + part)
+
+    return keys
+
+
+def diff_rol(old_df, new_df):
+    """
+    Compara duas revisões do Rol (DataFrames) e retorna o changelog com uma
+    linha por procedimento incluído/excluído e uma linha por coluna alterada
+    (ex.: PAC adicionado, DUT removido). A junção é vetorizada pela chave em hash
+    """
+    old = _prepare(old_df)
+    new = _prepare(new_df)
+    old.index, new.index = (pd.Index(k, name='chave') for k in _keys(old, new))
+
+    added_mask = ~new.index.isin(old.index)
+    removed_mask = ~old.index.isin(new.index)
+
+    parts = []
+
+    added = new[added_mask]
+    parts.append(pd.DataFrame({
+        'procedimento': added['PROCEDIMENTO'].to_numpy(), 'tipo': 'incluído',
+        'coluna': None, 'alteracao': None, 'valor_anterior': None, 'valor_novo': None,
+    }))
+
+    removed = old[removed_mask]
+    parts.append(pd.DataFrame({
+        'procedimento': removed['PROCEDIMENTO'].to_numpy(), 'tipo': 'excluído',
+        'coluna': None, 'alteracao': None, 'valor_anterior': None, 'valor_novo': None,
+    }))
+
+    # Procedimentos presentes nas duas revisões, alinhados pela chave
+    common = new.index[~added_mask]
+    before = old.loc[common]
+    after = new.loc[common]
+
+    changed_keys = []
+    for column in COMPARED_COLUMNS:
+        changed = np.asarray(before[column].array != after[column].array, dtype=bool)
+        if not changed.any():
+            continue
+
+        old_values = before[column].to_numpy(dtype=object)[changed]
+        new_values = after[column].to_numpy(dtype=object)[changed]
+        if column in SEGMENT_FLAGS:
+            change = np.select([old_values == '', new_values == ''], ['adicionado', 'removido'], 'alterado')
+        else:
+            change = 'alterado'
+
+        changed_keys.append(common[changed])
+        parts.append(pd.DataFrame({
+            'procedimento': after['PROCEDIMENTO'].to_numpy(dtype=object)[changed],
+            'tipo': 'alterado', 'coluna': column, 'alteracao': change,
+            'valor_anterior': old_values, 'valor_novo': new_values,
+        }))
+
+    changelog = pd.concat(parts, ignore_index=True)[CHANGELOG_COLUMNS]
+
+    total_changed = len(np.unique(np.concatenate(changed_keys))) if changed_keys else 0
+    logger.info(f"Diferenças entre revisões: {int(added_mask.sum())} incluídos, "
+                f"{int(removed_mask.sum())} excluídos, {total_changed} alterados")
+    return changelog
+
+
+def diff_revisions(old_revision, new_revision=None):
+    """
+    Compara duas revisões gravadas no banco (id ou data, como em query_database)
+    Sem new_revision compara com a revisão vigente
+    """
+    from database.db_manager import query_database
+
+    old_df = query_database(as_of=old_revision)
+    new_df = query_database(as_of=new_revision)
+    if old_df is None or new_df is None:
+        logger.error("Não foi possível carregar as revisões para comparação")
+        return None
+
+    return diff_rol(old_df, new_df)
+
+
+def export_changelog(changelog, output_path):
+    """Salva o changelog em CSV ou Parquet (conforme a extensão do arquivo)"""
+    output_path = Path(output_path)
+
+    try:
+        if output_path.suffix.lower() == '.parquet':
+            changelog.to_parquet(output_path, index=False)
+        else:
+            changelog.to_csv(output_path, index=False, encoding='utf-8-sig')
+
+        logger.info(f"Changelog salvo em: {output_path}")
+        return output_path
+    except Exception as e:
+        logger.error(f"Erro ao salvar changelog: {str(e)}")
+        return None
@@ -0,0 +1,285 @@
+import hashlib
+import json
+import logging
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import sessionmaker
+
+from config.settings import SERVICE_HOST, SERVICE_PORT, SERVICE_RELOAD_INTERVAL
+from database.db_manager import query_database, current_revision_id, on_revision_saved, EMPTY_VALUES
+from database.models import setup_database, SEGMENT_COLUMNS, SEGMENT_BITS, HIERARCHY_COLUMNS
+from utils.matcher import normalize_names
+
+logger = logging.getLogger(__name__)
+
+ARROW_MIME = 'application/vnd.apache.arrow.stream'
+
+# Parâmetros aceitos em /procedimentos
+QUERY_PARAMS = set(HIERARCHY_COLUMNS) | {'segmento', 'nome', 'q', 'limit', 'offset', 'format'}
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 10000
+
+
+def _group_positions(values):
+    """Mapeia cada valor distinto às posições (ordenadas) das linhas com esse valor"""
+    codes, uniques = pd.factorize(values)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)}
+
+
+class RolIndex:
+    """
+    Revisão vigente do Rol em memória com índices compactos: posições das
+    linhas por capítulo/grupo/subgrupo e por nome normalizado, e a cobertura
+    de segmentos como máscara de bits
+    """
+
+    def __init__(self, revision_id, rol_df):
+        self.revision_id = revision_id
+        self.rol = rol_df.reset_index(drop=True)
+
+        texts = {c: self.rol[c].astype('string').fillna('').str.strip() for c in HIERARCHY_COLUMNS}
+        self.hierarchy = {c: _group_positions(texts[c].to_numpy(dtype=object)) for c in HIERARCHY_COLUMNS}
+
+        self.segments = np.zeros(len(self.rol), dtype=np.int16)
+        for segment in SEGMENT_COLUMNS:
+            values = self.rol[segment].astype('string').fillna('').str.strip()
+            self.segments |= np.where(values.isin(EMPTY_VALUES), 0, SEGMENT_BITS[segment]).astype(np.int16)
+
+        names = normalize_names(self.rol['procedimento'])
+        self.by_name = _group_positions(names.to_numpy(dtype=object))
+
+        # Palavras dos nomes em ordem alfabética com as linhas de cada uma (formato CSR),
+        # para a busca por prefixo com searchsorted
+        words = names.str.split().explode().dropna()
+        words = words[words != '']
+        self.words, word_ids = np.unique(words.to_numpy(dtype=str), return_inverse=True)
+        order = np.argsort(word_ids, kind='stable')
+        self.word_rows = words.index.to_numpy()[order]
+        self.word_indptr = np.zeros(len(self.words) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(word_ids, minlength=len(self.words)), out=self.word_indptr[1:])
+
+        logger.info(f"Índice do Rol carregado: revisão {revision_id}, {len(self.rol)} procedimentos")
+
+    def select(self, params):
+        """
+        Filtra as linhas: capitulo/grupo/subgrupo (valor exato), segmento (lista
+        separada por vírgulas, todos cobertos), nome (nome normalizado exato) e
+        q (todos os termos presentes no nome, por prefixo, como na busca FTS5)
+        Retorna (total de linhas filtradas, DataFrame da página pedida)
+        """
+        mask = np.ones(len(self.rol), dtype=bool)
+
+        for column in HIERARCHY_COLUMNS:
+            if column in params:
+                selected = np.zeros(len(self.rol), dtype=bool)
+                selected[self.hierarchy[column].get(params[column], [])] = True
+                mask &= selected
+
+        if params.get('segmento'):
+            bits = 0
+            for segment in params['segmento'].lower().split(','):
+                if segment.strip() not in SEGMENT_BITS:
+                    raise ValueError(f"Segmento inválido: {segment}")
+                bits |= SEGMENT_BITS[segment.strip()]
+            mask &= (self.segments & bits) == bits
+
+        if params.get('nome'):
+            selected = np.zeros(len(self.rol), dtype=bool)
+            selected[self.by_name.get(normalize_names([params['nome']]).iloc[0], [])] = True
+            mask &= selected
+
+        for term in normalize_names([params.get('q', '')]).iloc[0].split():
+            first = np.searchsorted(self.words, term)
+            last = np.searchsorted(self.words, term + '\uffff')
+            selected = np.zeros(len(self.rol), dtype=bool)
+            selected[self.word_rows[self.word_indptr[first]:self.word_indptr[last]]] = True
+            mask &= selected
+
+        limit = min(int(params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        offset = int(params.get('offset', 0))
+        positions = np.flatnonzero(mask)
+
+        return len(positions), self.rol.iloc[positions[offset:offset + limit]]
+
+
+def _current_revision():
+    """Id da última revisão gravada no banco"""
+    engine = setup_database()
+    session = sessionmaker(bind=engine)()
+    try:
+        return current_revision_id(session)
+    finally:
+        session.close()
+
+
+def _empty_rol():
+    """Rol vazio com as colunas de query_database (banco sem revisões)"""
+    return pd.DataFrame(columns=['id', 'procedimento'] + SEGMENT_COLUMNS + HIERARCHY_COLUMNS)
+
+
+class RolService:
+    """
+    Mantém o índice da revisão vigente e o recarrega quando uma nova revisão
+    é gravada (aviso de save_to_database no mesmo processo ou consulta
+    periódica do id da última revisão)
+    """
+
+    def __init__(self, reload_interval=None):
+        self.reload_interval = SERVICE_RELOAD_INTERVAL if reload_interval is None else reload_interval
+        self.index = None
+        self._reload = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.load()
+        if self.index is None:
+            # Sem revisão carregada (id None), a próxima consulta periódica tenta de novo
+            self.index = RolIndex(None, _empty_rol())
+        on_revision_saved(lambda revision_id: self._reload.set())
+
+    def load(self):
+        """
+        Carrega a revisão vigente se ela mudou; retorna True se o índice foi trocado
+        Se a leitura falhar (erro transitório, banco travado), o índice atual é
+        mantido e a revisão não é registrada: a próxima consulta tenta de novo
+        """
+        revision_id = _current_revision()
+        if self.index is not None and self.index.revision_id == revision_id:
+            return False
+
+        if revision_id is None:
+            rol_df = _empty_rol()
+        else:
+            rol_df = query_database(as_of=revision_id)
+            if rol_df is None:
+                logger.error(f"Não foi possível carregar a revisão {revision_id}; mantendo o índice atual")
+                return False
+
+        # A troca da referência é atômica: as requisições em andamento usam o índice antigo
+        self.index = RolIndex(revision_id, rol_df)
+        return True
+
+    def _watch(self):
+        while not self._stop.is_set():
+            self._reload.wait(self.reload_interval)
+            self._reload.clear()
+            try:
+                if self.load():
+                    logger.info(f"Nova revisão do Rol carregada: {self.index.revision_id}")
+            except Exception as e:
+                logger.error(f"Erro ao recarregar o Rol: {str(e)}")
+
+    def start(self):
+        """Inicia a thread de recarga automática"""
+        self._thread = threading.Thread(target=self._watch, name='rol-reload', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._reload.set()
+
+
+class RolRequestHandler(BaseHTTPRequestHandler):
+    """Rotas: /procedimentos (JSON ou Arrow), /revisao e /health"""
+
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalhos e corpo saem em um único envio (evita a espera do ACK atrasado do TCP)
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    service = None
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _send(self, status, body=b'', content_type='application/json', etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _send_json(self, status, data, etag=None):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), etag=etag)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        index = self.service.index
+
+        if url.path == '/health':
+            return self._send_json(HTTPStatus.OK, {'status': 'ok'})
+
+        if url.path == '/revisao':
+            return self._send_json(HTTPStatus.OK, {'revisao': index.revision_id, 'registros': len(index.rol)})
+
+        if url.path != '/procedimentos':
+            return self._send_json(HTTPStatus.NOT_FOUND, {'erro': 'rota não encontrada'})
+
+        params = dict(parse_qsl(url.query))
+        unknown = set(params) - QUERY_PARAMS
+        if unknown:
+            return self._send_json(HTTPStatus.BAD_REQUEST, {'erro': f"parâmetros inválidos: {sorted(unknown)}"})
+
+        as_arrow = params.get('format') == 'arrow' or ARROW_MIME in self.headers.get('Accept', '')
+
+        # O ETag depende só da revisão e da consulta: a resposta é validada sem ser calculada
+        canonical = urlencode(sorted(params.items()))
+        digest = hashlib.sha1(f"{canonical}|{as_arrow}".encode('utf-8')).hexdigest()[:16]
+        etag = f'"{index.revision_id}-{digest}"'
+        if etag in self.headers.get('If-None-Match', ''):
+            return self._send(HTTPStatus.NOT_MODIFIED, etag=etag)
+
+        try:
+            total, page = index.select(params)
+        except ValueError as e:
+            return self._send_json(HTTPStatus.BAD_REQUEST, {'erro': str(e)})
+
+        if as_arrow:
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(page, preserve_index=False)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return self._send(HTTPStatus.OK, sink.getvalue().to_pybytes(), ARROW_MIME, etag)
+
+        body = (f'{{"revisao": {json.dumps(index.revision_id)}, "total": {total}, "procedimentos": '
+                f'{page.to_json(orient="records", force_ascii=False)}}}')
+        return self._send(HTTPStatus.OK, body.encode('utf-8'), etag=etag)
+
+
+def create_server(host=None, port=None, reload_interval=None):
+    """Cria o servidor HTTP (ainda não iniciado) com o índice da revisão vigente carregado"""
+    service = RolService(reload_interval)
+    service.start()
+
+    handler = type('Handler', (RolRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host or SERVICE_HOST, SERVICE_PORT if port is None else port), handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def serve(host=None, port=None):
+    """Executa o serviço de consulta do Rol até ser interrompido"""
+    server = create_server(host, port)
+    address, port = server.server_address[:2]
+    logger.info(f"Serviço de consulta do Rol em http://{address}:{port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.service.stop()
+        server.server_close()
@@ -1,47 +1,107 @@
-import time
+import os
 import requests
 from pathlib import Path
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import logging
 import zipfile
 
+from utils.downloads import write_download_metadata, read_download_metadata
 from config.settings import SITE_URL, DOWNLOADS_DIR, ANEXO_I_PATTERN, ANEXO_II_PATTERN, ANEXO_I_NAME, ANEXO_II_NAME, \
-    ANEXOS_ZIP, OUTPUT_DIR
+    ANEXOS_ZIP, OUTPUT_DIR, SELENIUM_HEADLESS, SELENIUM_TIMEOUT, CHROMEDRIVER_PATH, CHROMEDRIVER_CACHE_FILE
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Recursos que não são necessários para encontrar os links (bloqueados via CDP)
+BLOCKED_URLS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp", "*.ico",
+                "*.css", "*.woff", "*.woff2", "*.ttf", "*.otf"]
+
+# Retorna todos os href da página em uma única chamada ao navegador
+HREFS_SCRIPT = "return Array.from(document.querySelectorAll('a[href]'), a => a.href);"
+
+
+def get_driver_path():
+    """
+    Retorna o caminho do chromedriver: CHROMEDRIVER_PATH, o caminho guardado em
+    cache ou, na primeira execução, o instalado pelo webdriver_manager (que
+    acessa a rede) e que passa a ser guardado em cache
+    """
+    if CHROMEDRIVER_PATH and Path(CHROMEDRIVER_PATH).exists():
+        return CHROMEDRIVER_PATH
+
+    try:
+        cached = CHROMEDRIVER_CACHE_FILE.read_text(encoding='utf-8').strip()
+        if cached and Path(cached).exists():
+            return cached
+    except OSError:
+        pass
+
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    driver_path = ChromeDriverManager().install()
+    try:
+        CHROMEDRIVER_CACHE_FILE.write_text(driver_path, encoding='utf-8')
+    except OSError as e:
+        logger.warning(f"Erro ao guardar o caminho do chromedriver: {str(e)}")
+
+    return driver_path
+
+
+def setup_driver(headless=None):
+    """
+    Configura e retorna o driver do Selenium: sem interface por padrão, carregamento
+    'eager' (não espera imagens e folhas de estilo) e sem baixar imagens, CSS e fontes
+    """
+    # O Selenium só é importado quando o navegador é realmente necessário
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+
+    if headless is None:
+        headless = SELENIUM_HEADLESS
 
-def setup_driver():
-    """Configura e retorna o driver do Selenium"""
     chrome_options = Options()
-    # Descomente a linha abaixo para execução sem interface
-    # chrome_options.add_argument("--headless")
+    if headless:
+        chrome_options.add_argument("--headless=new")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.page_load_strategy = 'eager'
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.stylesheets": 2,
+    })
 
-    service = Service(ChromeDriverManager().install())
+    service = Service(get_driver_path())
     driver = webdriver.Chrome(service=service, options=chrome_options)
 
+    # Bloqueio pelo protocolo do DevTools (cobre também fontes e CSS carregados por scripts)
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    except Exception as e:
+        logger.warning(f"Não foi possível bloquear recursos via CDP: {str(e)}")
+
     return driver
 
 
 def download_file(url, output_path):
-    """Faz o download de um arquivo da URL para o caminho especificado"""
+    """
+    Faz o download de um arquivo da URL para o caminho especificado
+    O conteúdo é gravado em um arquivo temporário que só substitui o destino ao
+    final do download: uma falha não deixa um PDF truncado no lugar do anterior
+    """
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(output_path.name + '.part')
+
     try:
         response = requests.get(url, stream=True)
 
         if response.status_code == 200:
-            with open(output_path, 'wb') as f:
+            with open(tmp_path, 'wb') as f:
                 for chunk in response.iter_content(chunk_size=8192):
                     f.write(chunk)
+            os.replace(tmp_path, output_path)
+            write_download_metadata(output_path, url, response.headers)
             logger.info(f"Arquivo baixado com sucesso: {output_path}")
             return True
         else:
@@ -49,60 +109,75 @@ def download_file(url, output_path):
             return False
     except Exception as e:
         logger.error(f"Exceção ao baixar arquivo: {str(e)}")
+        tmp_path.unlink(missing_ok=True)
         return False
 
 
-def find_and_download_anexos():
-    """Encontra e baixa os anexos I e II do site da ANS"""
+def select_anexo_urls(hrefs):
+    """Seleciona entre os links da página as URLs dos PDFs dos anexos I e II"""
+    anexo_i_url = None
+    anexo_ii_url = None
+
+    for href in hrefs:
+        if not href or not href.endswith(".pdf"):
+            continue
+
+        # Identifica o anexo I (PDF)
+        if ANEXO_I_PATTERN in href:
+            anexo_i_url = href
+            logger.info(f"Anexo I encontrado: {href}")
+
+        # Identifica o anexo II (PDF)
+        if ANEXO_II_PATTERN in href:
+            anexo_ii_url = href
+            logger.info(f"Anexo II encontrado: {href}")
+
+    return anexo_i_url, anexo_ii_url
+
+
+def find_anexo_urls_static():
+    """Busca os links dos anexos no HTML da página, sem navegador"""
+    from utils.crawler import page_links
+
+    try:
+        response = requests.get(SITE_URL, timeout=SELENIUM_TIMEOUT)
+        if response.status_code != 200:
+            logger.warning(f"Erro ao acessar o site: {response.status_code}")
+            return None, None
+
+        hrefs = page_links(response.text, response.url)
+        logger.info(f"Buscando links dos anexos entre {len(hrefs)} links do HTML estático")
+        return select_anexo_urls(hrefs)
+
+    except Exception as e:
+        logger.warning(f"Erro ao buscar os links no HTML estático: {str(e)}")
+        return None, None
+
+
+def find_anexo_urls_selenium():
+    """Busca os links dos anexos com o Selenium (página renderizada por JavaScript)"""
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
     driver = setup_driver()
 
     try:
         # Acessa o site
         logger.info(f"Acessando o site: {SITE_URL}")
         driver.get(SITE_URL)
-        time.sleep(5)  # Aguarda o carregamento completo da página
-
-        # Encontra todos os links da página
-        links = driver.find_elements(By.TAG_NAME, "a")
-
-        # URLs dos anexos
-        anexo_i_url = None
-        anexo_ii_url = None
-
-        logger.info(f"Buscando links dos anexos entre {len(links)} links encontrados")
-
-        # Busca pelos links dos anexos
-        for link in links:
-            try:
-                href = link.get_attribute("href")
-                if href:
-                    # Identifica o anexo I (PDF)
-                    if ANEXO_I_PATTERN in href and href.endswith(".pdf"):
-                        anexo_i_url = href
-                        logger.info(f"Anexo I encontrado: {href}")
-
-                    # Identifica o anexo II (PDF)
-                    if ANEXO_II_PATTERN in href and href.endswith(".pdf"):
-                        anexo_ii_url = href
-                        logger.info(f"Anexo II encontrado: {href}")
-            except Exception as e:
-                logger.warning(f"Erro ao processar link: {str(e)}")
-
-        if not anexo_i_url or not anexo_ii_url:
-            logger.error("Não foi possível encontrar os links dos anexos")
-            return None, None
-
-        # Faz o download dos anexos
-        anexo_i_path = DOWNLOADS_DIR / ANEXO_I_NAME
-        anexo_ii_path = DOWNLOADS_DIR / ANEXO_II_NAME
 
-        logger.info(f"Baixando Anexo I: {anexo_i_url}")
-        download_file(anexo_i_url, anexo_i_path)
+        # Aguarda até que os links dos dois anexos estejam na página
+        def anexo_urls(d):
+            urls = select_anexo_urls(d.execute_script(HREFS_SCRIPT) or [])
+            return urls if all(urls) else False
 
-        logger.info(f"Baixando Anexo II: {anexo_ii_url}")
-        download_file(anexo_ii_url, anexo_ii_path)
-
-        return anexo_i_path, anexo_ii_path
+        try:
+            return WebDriverWait(driver, SELENIUM_TIMEOUT).until(anexo_urls)
+        except TimeoutException:
+            # Retorna o que houver na página (um dos anexos pode estar ausente)
+            hrefs = driver.execute_script(HREFS_SCRIPT) or []
+            logger.info(f"Buscando links dos anexos entre {len(hrefs)} links encontrados")
+            return select_anexo_urls(hrefs)
 
     except Exception as e:
         logger.error(f"Erro no processo de scraping: {str(e)}")
@@ -111,6 +186,71 @@ def find_and_download_anexos():
         driver.quit()
 
 
+def find_and_download_anexos():
+    """
+    Encontra e baixa os anexos I e II do site da ANS
+    Os links são buscados primeiro no HTML estático; o Selenium só é usado se necessário
+    Retorna (caminho do Anexo I, caminho do Anexo II) ou (None, None) se algum download falhar
+    """
+    anexo_i_url, anexo_ii_url = find_anexo_urls_static()
+
+    if not anexo_i_url or not anexo_ii_url:
+        logger.info("Links dos anexos não encontrados no HTML estático; usando o Selenium")
+        anexo_i_url, anexo_ii_url = find_anexo_urls_selenium()
+
+    if not anexo_i_url or not anexo_ii_url:
+        logger.error("Não foi possível encontrar os links dos anexos")
+        return None, None
+
+    # Faz o download dos anexos
+    anexo_i_path = DOWNLOADS_DIR / ANEXO_I_NAME
+    anexo_ii_path = DOWNLOADS_DIR / ANEXO_II_NAME
+
+    logger.info(f"Baixando Anexo I: {anexo_i_url}")
+    if not download_file(anexo_i_url, anexo_i_path):
+        return None, None
+
+    logger.info(f"Baixando Anexo II: {anexo_ii_url}")
+    if not download_file(anexo_ii_url, anexo_ii_path):
+        return None, None
+
+    return anexo_i_path, anexo_ii_path
+
+
+def check_new_revision(local_path):
+    """
+    Verifica se o Anexo I publicado é diferente do último baixado, comparando
+    o ETag e o Last-Modified (requisição HEAD) com os metadados do download
+    Retorna {'nova', 'url', 'data_download'} ou None em caso de erro
+    """
+    anexo_i_url, _ = find_anexo_urls_static()
+    if not anexo_i_url:
+        anexo_i_url, _ = find_anexo_urls_selenium()
+    if not anexo_i_url:
+        logger.error("Não foi possível encontrar o link do Anexo I")
+        return None
+
+    metadata = read_download_metadata(local_path)
+    result = {'nova': True, 'url': anexo_i_url, 'data_download': metadata.get('data_download')}
+    if not Path(local_path).exists() or metadata.get('url') != anexo_i_url:
+        return result
+
+    try:
+        response = requests.head(anexo_i_url, allow_redirects=True, timeout=SELENIUM_TIMEOUT)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+    except Exception as e:
+        logger.error(f"Erro ao consultar o Anexo I: {str(e)}")
+        return None
+
+    if etag and metadata.get('etag'):
+        result['nova'] = etag != metadata['etag']
+    elif last_modified and metadata.get('last_modified'):
+        result['nova'] = last_modified != metadata['last_modified']
+
+    return result
+
+
 def compress_files(file_paths, output_zip=None):
     """Compacta uma lista de arquivos em um único arquivo ZIP"""
     if output_zip is None: